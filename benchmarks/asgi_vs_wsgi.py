@@ -0,0 +1,61 @@
+"""
+Comparação de carga entre o servidor WSGI (workers síncronos) e o ASGI (workers uvicorn).
+
+Suba os dois servidores contra o mesmo banco, por exemplo:
+
+    gunicorn weather_api.wsgi:application --bind 127.0.0.1:8001 --workers 4
+    ASYNC_VIEWS=True gunicorn weather_api.asgi:application -k uvicorn.workers.UvicornWorker --bind 127.0.0.1:8002 --workers 4
+
+e execute:
+
+    python -m benchmarks.asgi_vs_wsgi --wsgi http://127.0.0.1:8001 --asgi http://127.0.0.1:8002 \\
+        --token <access token> --station 1 --concurrency 10 100 1000
+
+O relatório (latências p50/p90/p99, vazão e códigos de status por endpoint e nível de
+concorrência) é impresso em JSON e pode ser gravado com `--output`.
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.http_load import run_load
+
+READ_PATHS = [
+    '/api/stations/',
+    '/api/stations/?with_latest=1',
+    '/api/stations/{station}/',
+    '/api/stations/{station}/historical/',
+    '/api/stations/{station}/historical/?last=100',
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wsgi', required=True, help='URL base do servidor WSGI')
+    parser.add_argument('--asgi', required=True, help='URL base do servidor ASGI')
+    parser.add_argument('--token', required=True, help='Token de acesso JWT')
+    parser.add_argument('--station', type=int, default=1, help='ID da estação usada nos endpoints por estação')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--requests', type=int, default=2000, help='Requisições por cenário')
+    parser.add_argument('--output', help='Arquivo para gravar o relatório JSON')
+    args = parser.parse_args()
+
+    headers = {'Authorization': f'Bearer {args.token}'}
+    report = []
+    for path in READ_PATHS:
+        path = path.format(station=args.station)
+        for concurrency in args.concurrency:
+            for server, base_url in (('wsgi', args.wsgi), ('asgi', args.asgi)):
+                result = asyncio.run(run_load(base_url.rstrip('/') + path, headers, concurrency, max(args.requests, concurrency)))
+                result['server'] = server
+                report.append(result)
+                print(f"{server:4} c={concurrency:<5} {path:45} p50={result['latency_ms']['p50']}ms "
+                      f"p99={result['latency_ms']['p99']}ms {result['throughput_rps']} req/s status={result['status']}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
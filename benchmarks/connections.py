@@ -0,0 +1,112 @@
+"""
+Benchmark do custo de abertura de conexões com o banco.
+
+Simula o ciclo de banco de uma requisição (os sinais `request_started`/`request_finished`, que
+verificam, reaproveitam ou fecham a conexão conforme `CONN_MAX_AGE` e `CONN_HEALTH_CHECKS`,
+seguidos de uma consulta simples) em três modos:
+
+- `new connection`: CONN_MAX_AGE=0, uma conexão nova por requisição;
+- `persistent`: a conexão é reaproveitada por até `--max-age` segundos;
+- `persistent + health check`: o mesmo, verificando a conexão (um `SELECT 1` a mais) antes do
+  primeiro uso em cada requisição.
+
+Para cada modo são informadas as latências por requisição (p50/p99, média) e a quantidade de
+conexões abertas. Com `--database replica`, mede a conexão com a réplica; apontando
+`POSTGRES_HOST` para o PgBouncer, mede o custo de conexão através do pool.
+
+    python -m benchmarks.connections --iterations 2000 --output run/benchmarks/connections.json
+"""
+import argparse
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from benchmarks.http_load import percentile
+from benchmarks.report import metadata, write_report
+
+# Modo -> (CONN_MAX_AGE, CONN_HEALTH_CHECKS); None usa o valor de --max-age
+MODES = {
+    'new connection': (0, False),
+    'persistent': (None, False),
+    'persistent + health check': (None, True),
+}
+
+
+def measure(alias: str, max_age: int, health_checks: bool, iterations: int, query: str) -> Dict[str, Any]:
+    from django.core.signals import request_finished, request_started
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection = connections[alias]
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = max_age
+    connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+
+    opened = 0
+
+    def count(sender, connection, **kwargs):
+        nonlocal opened
+        if connection.alias == alias:
+            opened += 1
+
+    connection_created.connect(count, weak=False)
+    durations = []
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            request_started.send(sender=None)
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                cursor.fetchall()
+            request_finished.send(sender=None)
+            durations.append(time.perf_counter() - started)
+    finally:
+        connection_created.disconnect(count)
+        connection.close()
+
+    to_ms = lambda value: None if value is None else round(value * 1000, 3)  # noqa: E731
+    return {
+        'conn_max_age': max_age,
+        'health_checks': health_checks,
+        'iterations': iterations,
+        'connections_opened': opened,
+        'latency_ms': {
+            'p50': to_ms(percentile(durations, 50)),
+            'p99': to_ms(percentile(durations, 99)),
+            'mean': to_ms(statistics.fmean(durations)),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', default='default', help='Alias do banco (default ou replica)')
+    parser.add_argument('--iterations', type=int, default=1000, help='Requisições simuladas por modo')
+    parser.add_argument('--max-age', type=int, default=60, help='CONN_MAX_AGE dos modos persistentes')
+    parser.add_argument('--query', default='SELECT 1')
+    parser.add_argument('--output', help='Arquivo para gravar o relatório JSON')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'weather_api.settings')
+    import django
+
+    django.setup()
+
+    report: Dict[str, Any] = {
+        'metadata': metadata(database_alias=args.database, iterations=args.iterations),
+        'modes': {},
+    }
+    for name, (max_age, health_checks) in MODES.items():
+        result = measure(args.database, args.max_age if max_age is None else max_age, health_checks, args.iterations, args.query)
+        report['modes'][name] = result
+        print(f"{name:28} p50={result['latency_ms']['p50']}ms p99={result['latency_ms']['p99']}ms "
+              f"média={result['latency_ms']['mean']}ms conexões={result['connections_opened']}")
+
+    if args.output:
+        write_report(report, Path(args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Gerador de carga HTTP assíncrono, sem dependências externas.
+
+Cada cliente virtual mantém uma conexão HTTP/1.1 keep-alive e envia requisições em
+sequência; `concurrency` clientes rodam em paralelo no mesmo event loop, o que permite
+simular milhares de conexões simultâneas a partir de um único processo.
+
+A URL e o corpo podem ser funções do número sequencial da requisição, para cenários em que
+cada requisição precisa de dados próprios (por exemplo, criar ou excluir estações distintas).
+"""
+import asyncio
+import itertools
+import statistics
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import SplitResult, urlsplit
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentil por interpolação linear (None para listas vazias)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bool]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("conexão encerrada pelo servidor")
+    status = int(status_line.split()[1])
+
+    length = 0
+    chunked = False
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value.strip())
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+        elif name == 'connection' and 'close' in value.lower():
+            keep_alive = False
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+
+URL = Union[str, Callable[[int], str]]
+Body = Union[None, bytes, Callable[[int], bytes]]
+
+
+def _build_request(method: str, url: str, headers: Dict[str, str], body: Optional[bytes]) -> Tuple[SplitResult, bytes]:
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else '')
+    header_lines = ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+    if body is not None:
+        header_lines += f"Content-Length: {len(body)}\r\n"
+    request = (f"{method} {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n{header_lines}Connection: keep-alive\r\n\r\n").encode()
+    return parts, request + (body or b'')
+
+
+async def _client(method: str, url: URL, headers: Dict[str, str], body: Body, sequence: Iterator[int], requests: int,
+                  latencies: List[float], statuses: Dict[int, int], timeout: float) -> None:
+    fixed = None if callable(url) or callable(body) else _build_request(method, url, headers, body)
+
+    reader = writer = None
+    for _ in range(requests):
+        if fixed is None:
+            number = next(sequence)
+            parts, request = _build_request(
+                method, url(number) if callable(url) else url, headers, body(number) if callable(body) else body,
+            )
+        else:
+            parts, request = fixed
+
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+            writer.write(request)
+            status, keep_alive = await asyncio.wait_for(_read_response(reader), timeout)
+            if not keep_alive:  # Workers síncronos do gunicorn encerram a conexão a cada resposta
+                writer.close()
+                reader = writer = None
+        except (OSError, asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status = 0  # Erro de conexão ou tempo esgotado
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url: URL, headers: Dict[str, str], concurrency: int, total_requests: int, timeout: float = 60,
+                   method: str = 'GET', body: Body = None) -> Dict:
+    """
+    Executa `total_requests` requisições contra `url` com `concurrency` clientes simultâneos.
+
+    `url` e `body` podem ser funções que recebem o número sequencial da requisição (0, 1, 2...).
+
+    Returns:
+        dict: Latências (p50, p90, p99, média e máxima, em ms), vazão (req/s) e contagem por status HTTP.
+    """
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    per_client = [total_requests // concurrency + (1 if i < total_requests % concurrency else 0) for i in range(concurrency)]
+
+    sequence = itertools.count()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(method, url, headers, body, sequence, count, latencies, statuses, timeout) for count in per_client if count
+    ))
+    elapsed = time.perf_counter() - started
+
+    to_ms = lambda value: None if value is None else round(value * 1000, 2)  # noqa: E731
+    return {
+        'url': url(0) if callable(url) else url,
+        'method': method,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': to_ms(percentile(latencies, 50)),
+            'p90': to_ms(percentile(latencies, 90)),
+            'p99': to_ms(percentile(latencies, 99)),
+            'mean': to_ms(statistics.fmean(latencies)) if latencies else None,
+            'max': to_ms(max(latencies)) if latencies else None,
+        },
+        'status': statuses,
+    }
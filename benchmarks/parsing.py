@@ -0,0 +1,120 @@
+"""
+Benchmark da leitura das páginas HTML do SINDA (`stations/sinda.py`) sobre fixtures gravadas.
+
+Lê todas as páginas `cidades_<UF>.html` e `tabela_<ID>.html` do diretório de fixtures com cada
+parser e informa páginas por segundo, MB/s e o tempo mediano por página:
+
+- `lxml`: parser em C do lxml e consultas XPath (o padrão do `import_stations`);
+- `bs4`: BeautifulSoup com `html.parser` (o fallback);
+- `legacy`: a leitura anterior do `import_stations` (BeautifulSoup, e a tabela de `tabela.php`
+  convertida de volta em texto e lida de novo com `pd.read_html`), como referência.
+
+Também verifica se `lxml` e `bs4` extraem os mesmos dados de cada página. Não usa o banco.
+
+    python -m benchmarks.sinda_fixtures --record --output run/benchmarks/sinda-real
+    python -m benchmarks.parsing --fixtures run/benchmarks/sinda-real --repeat 5
+"""
+import argparse
+import json
+import statistics
+import time
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from benchmarks.report import BASE_DIR
+from benchmarks.sinda_fixtures import generate
+from stations import sinda
+
+
+def legacy_station_list(content: bytes) -> List[List[str]]:
+    soup = BeautifulSoup(content, 'html.parser')
+    return [[col.text.strip() for col in row.find_all('td')] for row in soup.find_all('tr')[2:]]
+
+
+def legacy_station_metadata(content: bytes) -> list:
+    soup = BeautifulSoup(content, 'html.parser')
+    table_registration = soup.find_all('table', {'align': 'center'}).__str__()
+    return pd.read_html(StringIO(table_registration))[0].iloc[1].tolist()
+
+
+def parsers() -> Dict[str, Dict[str, Callable[[bytes], object]]]:
+    """Funções de leitura por parser: (`stations` para cidades.php, `metadata` para tabela.php)."""
+    result = {
+        backend: {
+            'stations': lambda content, backend=backend: sinda.parse_station_list(content, backend),
+            'metadata': lambda content, backend=backend: sinda.parse_station_metadata(content, backend),
+        }
+        for backend in sinda.BACKENDS
+    }
+    result['legacy'] = {'stations': legacy_station_list, 'metadata': legacy_station_metadata}
+    return result
+
+
+def load_pages(directory: Path) -> Dict[str, List[bytes]]:
+    return {
+        'stations': [path.read_bytes() for path in sorted(directory.glob('cidades_*.html'))],
+        'metadata': [path.read_bytes() for path in sorted(directory.glob('tabela_*.html'))],
+    }
+
+
+def measure(parse: Callable[[bytes], object], pages: List[bytes], repeat: int) -> Dict:
+    durations = []
+    for _ in range(repeat):
+        for content in pages:
+            started = time.perf_counter()
+            parse(content)
+            durations.append(time.perf_counter() - started)
+    total = sum(durations)
+    size_mb = sum(len(content) for content in pages) * repeat / 1024 / 1024
+    return {
+        'pages': len(pages),
+        'pages_per_s': round(len(durations) / total, 1),
+        'mb_per_s': round(size_mb / total, 2),
+        'per_page_us_p50': round(statistics.median(durations) * 1_000_000, 1),
+    }
+
+
+def mismatches(pages: Dict[str, List[bytes]]) -> int:
+    """Páginas em que `lxml` e `bs4` extraem dados diferentes."""
+    functions = {'stations': sinda.parse_station_list, 'metadata': sinda.parse_station_metadata}
+    return sum(
+        functions[kind](content, 'lxml') != functions[kind](content, 'bs4')
+        for kind, contents in pages.items() for content in contents
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='Diretório de fixtures do SINDA já gravadas (padrão: geradas em run/benchmarks/sinda-parsing)')
+    parser.add_argument('--fixture-stations', type=int, default=500, help='Estações das fixtures geradas')
+    parser.add_argument('--repeat', type=int, default=3, help='Leituras de cada página por parser')
+    parser.add_argument('--output', help='Arquivo para gravar o relatório JSON')
+    args = parser.parse_args()
+
+    directory = Path(args.fixtures) if args.fixtures else BASE_DIR / 'run' / 'benchmarks' / 'sinda-parsing'
+    if not args.fixtures:
+        # Apenas as páginas HTML importam aqui: o CSV de cada estação tem um único registro
+        generate(directory, args.fixture_stations, 1)
+    pages = load_pages(directory)
+
+    report = {
+        'fixtures': str(directory),
+        'results': {
+            name: {kind: measure(parse, pages[kind], args.repeat) for kind, parse in functions.items()}
+            for name, functions in parsers().items()
+        },
+        'lxml_bs4_mismatches': mismatches(pages),
+    }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Funções comuns aos benchmarks: memória de processos, metadados da execução e gravação do relatório.
+
+A memória de pico é lida de `/proc/<pid>/status` (`VmHWM`, Linux). O pico de um processo pode ser
+zerado escrevendo `5` em `/proc/<pid>/clear_refs`, o que permite medir cada cenário separadamente
+sem reiniciar o servidor.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def process_tree(pid: int) -> List[int]:
+    """O processo e todos os seus descendentes (por exemplo, o master do gunicorn e os workers)."""
+    pids = [pid]
+    for current in pids:
+        try:
+            pids.extend(int(child) for child in Path(f'/proc/{current}/task/{current}/children').read_text().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return pids
+
+
+def _status_kb(pid: int, field: str) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            for line in file:
+                if line.startswith(f'{field}:'):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return None
+
+
+def reset_peak_rss(pid: int) -> None:
+    """Zera a memória de pico do processo e dos descendentes (quando o kernel permite)."""
+    for current in process_tree(pid):
+        try:
+            Path(f'/proc/{current}/clear_refs').write_text('5')
+        except OSError:
+            pass
+
+
+def peak_rss_mb(pid: int) -> Dict[str, Optional[float]]:
+    """Memória de pico (VmHWM) do processo e dos descendentes: soma e maior valor individual."""
+    values = [value for value in (_status_kb(current, 'VmHWM') for current in process_tree(pid)) if value is not None]
+    if not values:
+        return {'total': None, 'max_process': None}
+    return {'total': round(sum(values) / 1024, 1), 'max_process': round(max(values) / 1024, 1)}
+
+
+def run_measured(args: List[str], env: Dict[str, str]) -> Dict[str, Any]:
+    """Executa um comando e retorna a duração, o código de saída, a saída e a memória de pico (ru_maxrss)."""
+    started = time.perf_counter()
+    process = subprocess.Popen(args, cwd=BASE_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.stdout.read()  # type: ignore[union-attr]
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        'elapsed_s': round(time.perf_counter() - started, 3),
+        'exit_code': process.returncode,
+        'peak_rss_mb': round(usage.ru_maxrss / 1024, 1),
+        'output': output.decode(errors='replace'),
+    }
+
+
+def metadata(**extra: Any) -> Dict[str, Any]:
+    """Informações da execução, para comparar relatórios de máquinas ou commits diferentes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    from django.db import connection
+
+    connection.ensure_connection()
+    database = {'vendor': connection.vendor}
+    if connection.vendor == 'postgresql':
+        database['server_version'] = connection.pg_version
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'database': database,
+        **extra,
+    }
+
+
+def write_report(report: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
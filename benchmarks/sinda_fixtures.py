@@ -0,0 +1,187 @@
+"""
+Fixtures do SINDA para os benchmarks do comando `import_stations`, sem acesso à internet.
+
+Um diretório de fixtures contém as mesmas páginas que o importador baixa do SINDA:
+
+    cidades_<UF>.html     lista de estações (cidades.php?uf=<UF>)
+    tabela_<ID>.html      dados cadastrais da estação (tabela.php?id=<ID>)
+    dadosCSV_<ID>.csv     histórico da estação (dadosCSV.php?id=<ID>)
+
+As fixtures podem ser geradas (dados sintéticos, determinísticos pela semente) ou gravadas
+uma vez a partir do SINDA real (`--record`, requer internet). `FixtureServer` serve o
+diretório localmente; basta apontar `SINDA_BASE_URL` para ele.
+
+    python -m benchmarks.sinda_fixtures --output run/benchmarks/sinda --stations 10 --rows 5000
+    python -m benchmarks.sinda_fixtures --output run/benchmarks/sinda-real --record --limit 5
+"""
+import argparse
+import html
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import requests
+
+from stations.synthetic import station_info, station_readings
+
+SINDA_BASE_URL = 'http://sinda.crn.inpe.br/PCD/SITE/novo/site'
+
+# IDs das estações das fixtures sintéticas (distintos dos do SINDA e do generate_synthetic_data)
+FIRST_FIXTURE_ID = 800_000
+
+# Página (cidades.php, tabela.php, dadosCSV.php) -> (prefixo do arquivo, parâmetro, extensão)
+PAGES = {
+    '/cidades.php': ('cidades', 'uf', 'html'),
+    '/tabela.php': ('tabela', 'id', 'html'),
+    '/dadosCSV.php': ('dadosCSV', 'id', 'csv'),
+}
+
+
+def _csv_header(field: str) -> str:
+    name, _, unit = field.partition('_')
+    return f"{name} ({unit})" if unit else name
+
+
+def generate(directory: Path, stations: int, rows: int, seed: int = 42, uf: str = 'RN') -> int:
+    """
+    Gera fixtures sintéticas no formato das páginas do SINDA.
+
+    Returns:
+        int: Quantidade total de registros históricos gerados.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    listing = ['<tr><td colspan="3">Plataformas de Coleta de Dados</td></tr>', '<tr><th>ID</th><th>Estação</th><th>Município</th></tr>']
+    for index in range(stations):
+        station_id = FIRST_FIXTURE_ID + index
+        info = station_info(rng, index)
+        listing.append(f"<tr><td>{station_id}</td><td>{html.escape(info['station_name'])}</td><td>{html.escape(info['city'])}</td></tr>")
+
+        (directory / f"tabela_{station_id}.html").write_text(
+            '<html><body><table align="center">'
+            '<tr><td>Proprietário</td><td>Estação</td><td>Município</td><td>UF</td><td>Latitude</td><td>Longitude</td><td>Altitude</td></tr>'
+            f"<tr><td>{info['owner']}</td><td>{html.escape(info['station_name'])}</td><td>{html.escape(info['city'])}</td>"
+            f"<td>{uf}</td><td>{info['latitude']}</td><td>{info['longitude']}</td><td>120</td></tr>"
+            '</table></body></html>',
+            encoding='utf-8',
+        )
+
+        df = station_readings(rng, rows).drop(columns=['hora'])
+        df['DataHora_GMT'] = df['DataHora_GMT'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        df.columns = [_csv_header(column) for column in df.columns]
+        df.to_csv(directory / f"dadosCSV_{station_id}.csv", index=False)
+
+    (directory / f"cidades_{uf}.html").write_text(
+        '<html><body><table>' + ''.join(listing) + '</table></body></html>', encoding='utf-8',
+    )
+    return stations * rows
+
+
+def record(directory: Path, uf: str = 'RN', limit: Optional[int] = None, delay: float = 3) -> int:
+    """
+    Grava as páginas do SINDA real no diretório de fixtures (requer acesso à internet).
+
+    Returns:
+        int: Quantidade de estações gravadas.
+    """
+    from bs4 import BeautifulSoup
+
+    directory.mkdir(parents=True, exist_ok=True)
+    listing = requests.get(f"{SINDA_BASE_URL}/cidades.php", params={'uf': uf}, timeout=60)
+    listing.raise_for_status()
+    (directory / f"cidades_{uf}.html").write_bytes(listing.content)
+
+    station_ids = [row.find('td').text.strip() for row in BeautifulSoup(listing.content, 'html.parser').find_all('tr')[2:]]
+    for station_id in station_ids[:limit]:
+        for page, (prefix, _, extension) in list(PAGES.items())[1:]:
+            response = requests.get(f"{SINDA_BASE_URL}{page}", params={'id': station_id}, timeout=120)
+            response.raise_for_status()
+            (directory / f"{prefix}_{station_id}.{extension}").write_bytes(response.content)
+        time.sleep(delay)
+    return len(station_ids[:limit])
+
+
+def count_rows(directory: Path) -> int:
+    """Quantidade de registros históricos (linhas dos CSVs, sem o cabeçalho) nas fixtures."""
+    total = 0
+    for path in directory.glob('dadosCSV_*.csv'):
+        with open(path, 'rb') as file:
+            total += max(sum(1 for _ in file) - 1, 0)
+    return total
+
+
+class FixtureServer:
+    """
+    Servidor HTTP local que responde às páginas do SINDA a partir de um diretório de fixtures.
+
+    Registra o instante de cada requisição a `tabela.php`, o que permite medir o tempo gasto
+    pelo importador em cada estação.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.station_requests: List[Tuple[str, float]] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                page = next((page for page in PAGES if parts.path.endswith(page)), None)
+                value = parse_qs(parts.query).get(PAGES[page][1], [''])[0] if page else ''
+                path = server.directory / f"{PAGES[page][0]}_{value}.{PAGES[page][2]}" if page else None
+                if path is None or not value or not path.is_file():
+                    self.send_error(404)
+                    return
+
+                if page == '/tabela.php':
+                    server.station_requests.append((value, time.perf_counter()))
+                content = path.read_bytes()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/csv; charset=utf-8' if path.suffix == '.csv' else 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self) -> 'FixtureServer':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', required=True, help='Diretório das fixtures')
+    parser.add_argument('--stations', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=2000, help='Registros por estação')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--uf', default='RN')
+    parser.add_argument('--record', action='store_true', help='Grava as páginas do SINDA real em vez de gerar dados sintéticos')
+    parser.add_argument('--limit', type=int, help='Com --record, quantidade máxima de estações')
+    args = parser.parse_args()
+
+    if args.record:
+        print(f"{record(Path(args.output), args.uf, args.limit)} estações gravadas em {args.output}")
+    else:
+        print(f"{generate(Path(args.output), args.stations, args.rows, args.seed, args.uf)} registros gerados em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
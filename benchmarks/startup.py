@@ -0,0 +1,144 @@
+"""
+Benchmark do custo de inicialização dos workers.
+
+Mede, em processos novos:
+
+- `boot`: `django.setup()` + carregamento das rotas (o que cada worker faz ao iniciar);
+- `boot+analytics`: o mesmo, seguido do carregamento de pandas/statsmodels (`analytics.warm_up`);
+- `manage.py check`: um comando de gerenciamento que não faz análises.
+
+Para cada cenário são informados o tempo de importação e o RSS máximo do processo.
+
+Com `--gunicorn`, sobe o gunicorn com `gunicorn.conf.py` (com e sem `preload_app`) e
+informa RSS, PSS e memória privada de cada worker, lidos de `/proc/<pid>/smaps_rollup`
+(Linux). O PSS divide as páginas compartilhadas entre os processos, evidenciando o ganho
+do copy-on-write.
+
+    python -m benchmarks.startup --repeat 5 --gunicorn --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+BOOT = "import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns"
+WARM_UP = "; from stations import analytics; analytics.warm_up()"
+MEASURE = (
+    "import time, resource, json; started = time.perf_counter(); {code}; "
+    "print(json.dumps({{'seconds': time.perf_counter() - started, "
+    "'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))"
+)
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'weather_api.settings')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(BASE_DIR), env.get('PYTHONPATH')]))
+    return env
+
+
+def measure_import(code: str, repeat: int) -> Dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', MEASURE.format(code=code)],
+            cwd=BASE_DIR, env=_environment(), capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'seconds_median': round(statistics.median(run['seconds'] for run in runs), 3),
+        'max_rss_mb': round(max(run['max_rss_mb'] for run in runs), 1),
+    }
+
+
+def measure_command(args: List[str], repeat: int) -> Dict:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, 'manage.py', *args], cwd=BASE_DIR, env=_environment(), capture_output=True, check=True)
+        durations.append(time.perf_counter() - started)
+    return {'seconds_median': round(statistics.median(durations), 3)}
+
+
+def _smaps_rollup(pid: int) -> Dict[str, float]:
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as file:
+        for line in file:
+            name, _, rest = line.partition(':')
+            if name in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                values[name] = int(rest.split()[0]) / 1024
+    return {
+        'rss_mb': round(values['Rss'], 1),
+        'pss_mb': round(values['Pss'], 1),
+        'private_mb': round(values['Private_Clean'] + values['Private_Dirty'], 1),
+    }
+
+
+def measure_gunicorn(app: str, workers: int, preload: bool, settle: float) -> Dict:
+    args = [sys.executable, '-m', 'gunicorn', app, '-c', str(BASE_DIR / 'gunicorn.conf.py'),
+            '--bind', '127.0.0.1:0', '--workers', str(workers)]
+    env = _environment()
+    env['GUNICORN_PRELOAD'] = str(preload)
+
+    started = time.perf_counter()
+    master = subprocess.Popen(args, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        children: List[int] = []
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline:
+            children = [int(pid) for pid in Path(f'/proc/{master.pid}/task/{master.pid}/children').read_text().split()]
+            if len(children) >= workers:
+                break
+            time.sleep(0.1)
+        ready = time.perf_counter() - started
+        time.sleep(settle)
+
+        per_worker = [_smaps_rollup(pid) for pid in children]
+        return {
+            'preload_app': preload,
+            'workers': len(children),
+            'seconds_until_forked': round(ready, 3),
+            'master': _smaps_rollup(master.pid),
+            'per_worker': per_worker,
+            'total_pss_mb': round(sum(worker['pss_mb'] for worker in per_worker) + _smaps_rollup(master.pid)['pss_mb'], 1),
+        }
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--gunicorn', action='store_true', help='Mede também a memória por worker do gunicorn')
+    parser.add_argument('--app', default='weather_api.wsgi:application')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--settle', type=float, default=3, help='Segundos de espera após o fork dos workers')
+    parser.add_argument('--output', help='Arquivo para gravar o relatório JSON')
+    args = parser.parse_args()
+
+    report = {
+        'boot': measure_import(BOOT, args.repeat),
+        'boot+analytics': measure_import(BOOT + WARM_UP, args.repeat),
+        'manage.py check': measure_command(['check'], args.repeat),
+    }
+    if args.gunicorn:
+        report['gunicorn'] = [
+            measure_gunicorn(args.app, args.workers, preload, args.settle) for preload in (False, True)
+        ]
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+Suíte de benchmarks reproduzível: roda contra um PostgreSQL local e não precisa de internet.
+
+Cenários:
+
+- `generate`: gera o conjunto de dados sintético (`manage.py generate_synthetic_data --size ...`)
+  e mede a vazão da gravação;
+- `http`: sobe o gunicorn (WSGI ou ASGI, com `gunicorn.conf.py`) e executa um cenário de carga
+  para cada rota de `stations/urls.py`, em cada nível de concorrência;
+- `importer`: executa `manage.py import_stations` contra fixtures do SINDA servidas localmente
+  (`benchmarks/sinda_fixtures.py`), geradas automaticamente ou gravadas com `--fixtures`.
+
+O relatório JSON traz, por cenário, latências p50/p99, vazão e memória de pico (RSS), além dos
+metadados da execução (commit, versões, CPU e banco), para comparar execuções diferentes.
+
+    python manage.py migrate
+    python -m benchmarks.suite --size 100k --server wsgi --workers 4 --concurrency 1 16 64 \\
+        --output run/benchmarks/report-wsgi.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from benchmarks.http_load import percentile, run_load
+from benchmarks.report import BASE_DIR, metadata, peak_rss_mb, reset_peak_rss, run_measured, write_report
+from benchmarks.sinda_fixtures import FixtureServer, count_rows, generate
+
+# Estação sintética usada nos endpoints por estação (a primeira de generate_synthetic_data)
+STATION_ID = 900_000
+
+# IDs das estações criadas (e depois excluídas) pelos cenários de escrita
+CREATED_STATION_ID = 950_000
+
+BENCHMARK_USER = 'benchmark'
+
+
+@dataclass
+class Scenario:
+    """
+    Um cenário de carga sobre uma rota de `stations/urls.py`.
+
+    Attributes:
+        route (str): Nome da rota (`name` em `stations/urls.py`).
+        method (str): Método HTTP.
+        path (str): Caminho da requisição; `{station}` é substituído pelo ID da estação, `{created}`
+            pelo ID de uma estação criada pelo cenário de criação e `{job}` pelo ID de um job assíncrono.
+        body (dict | list, opcional): Corpo JSON (um objeto ou uma lista de objetos); os valores de
+            texto também aceitam `{created}`.
+        weight (float): Fração de `--requests` executada no cenário (para rotas lentas).
+    """
+    route: str
+    method: str
+    path: str
+    body: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None
+    weight: float = 1.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('stations', 'GET', '/api/stations/'),
+    Scenario('stations', 'GET', '/api/stations/?with_latest=1'),
+    Scenario('station-create', 'POST', '/api/stations/create/',
+             {'station_id': '{created}', 'station_name': 'Benchmark {created}', 'city': 'Natal', 'uf': 'RN'}),
+    # Atualiza (upsert) as estações criadas no cenário anterior
+    Scenario('stations-bulk', 'POST', '/api/stations/bulk/',
+             [{'station_id': '{created}', 'station_name': 'Benchmark {created}', 'city': 'Mossoró', 'uf': 'RN'}]),
+    Scenario('stations-by-id', 'GET', '/api/stations/{station}/'),
+    Scenario('stations-by-id', 'PUT', '/api/stations/{station}/', {'station_name': 'PCD Sintética 00000'}),
+    Scenario('historical-data', 'GET', '/api/stations/historical', weight=0.05),
+    Scenario('historical-data-by-id', 'GET', '/api/stations/{station}/historical/', weight=0.2),
+    Scenario('historical-data-by-id', 'GET', '/api/stations/{station}/historical/?last=100'),
+    Scenario('analyze', 'GET', '/api/stations/{station}/analyze/?last=500', weight=0.2),
+    Scenario('analyze', 'GET', '/api/stations/{station}/analyze/', weight=0.05),
+    Scenario('predict', 'GET', '/api/stations/{station}/predict/?last=500', weight=0.05),
+    Scenario('predict', 'GET', '/api/stations/{station}/predict/', weight=0.01),
+    # Envio de jobs (deduplicados após o primeiro, pois ninguém os executa durante a carga)
+    Scenario('predict', 'GET', '/api/stations/{station}/predict/?async=1'),
+    Scenario('job-detail', 'GET', '/api/jobs/{job}/'),
+    Scenario('admission-status', 'GET', '/api/admission/'),
+    Scenario('stations-by-id', 'DELETE', '/api/stations/{created}/'),
+]
+
+
+def _environment(**overrides: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'weather_api.settings')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(BASE_DIR), env.get('PYTHONPATH')]))
+    env.update(overrides)
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def check_coverage() -> List[str]:
+    """Rotas de `stations/urls.py` sem cenário de carga (a suíte deve cobrir todas)."""
+    from stations.urls import urlpatterns
+
+    covered = {scenario.route for scenario in SCENARIOS}
+    return [pattern.name for pattern in urlpatterns if pattern.name not in covered]
+
+
+def access_token() -> str:
+    """Cria (se necessário) o usuário administrador dos benchmarks e gera um token de acesso."""
+    from django.contrib.auth import get_user_model
+
+    from users.tokens import StaffClaimRefreshToken
+
+    user, _ = get_user_model().objects.update_or_create(username=BENCHMARK_USER, defaults={'is_staff': True})
+    return str(StaffClaimRefreshToken.for_user(user).access_token)
+
+
+@contextmanager
+def gunicorn(server: str, workers: int, log_path: Path) -> Iterator[subprocess.Popen]:
+    """Sobe o gunicorn em uma porta livre e aguarda até que ele aceite conexões."""
+    port = _free_port()
+    args = [sys.executable, '-m', 'gunicorn', '-c', str(BASE_DIR / 'gunicorn.conf.py'),
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers)]
+    overrides = {
+        # Sem reciclagem de workers e sem limitação por usuário: o objetivo é medir a aplicação
+        'GUNICORN_MAX_REQUESTS': '0',
+        'PREDICT_RATE': '1000000', 'PREDICT_BURST': '1000000',
+        'ANALYZE_RATE': '1000000', 'ANALYZE_BURST': '1000000',
+    }
+    if server == 'asgi':
+        args += ['-k', 'uvicorn.workers.UvicornWorker', 'weather_api.asgi:application']
+        overrides['ASYNC_VIEWS'] = 'True'
+    else:
+        args += ['weather_api.wsgi:application']
+
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'ab') as log:
+        master = subprocess.Popen(args, cwd=BASE_DIR, env=_environment(**overrides), stdout=log, stderr=log)
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            if master.poll() is not None:
+                raise RuntimeError(f"o gunicorn encerrou com código {master.returncode} (veja {log_path})")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"o gunicorn não respondeu em 120 segundos (veja {log_path})")
+                time.sleep(0.2)
+        master.base_url = f'http://127.0.0.1:{port}'  # type: ignore[attr-defined]
+        yield master
+    finally:
+        master.terminate()
+        master.wait(timeout=60)
+
+
+def _formatter(template: Any, offset: int, job: str = '') -> Callable[[int], Any]:
+    """Substitui `{station}`, `{job}` e `{created}` (ID da estação criada pela requisição `number`)."""
+    def format_value(value: Any, number: int) -> Any:
+        if not isinstance(value, str):
+            return value
+        if value == '{created}':
+            return CREATED_STATION_ID + offset + number
+        return value.format(station=STATION_ID, job=job, created=CREATED_STATION_ID + offset + number)
+
+    if isinstance(template, dict):
+        return lambda number: json.dumps({key: format_value(value, number) for key, value in template.items()}).encode()
+    if isinstance(template, list):
+        return lambda number: json.dumps([
+            {key: format_value(value, number) for key, value in item.items()} for item in template
+        ]).encode()
+    return lambda number: format_value(template, number)
+
+
+def run_http(args: argparse.Namespace, log_dir: Path) -> List[Dict[str, Any]]:
+    from stations import jobs
+
+    token = access_token()
+    job, _ = jobs.submit('analyze', STATION_ID, {'last': 500})
+    results = []
+    with gunicorn(args.server, args.workers, log_dir / f'gunicorn-{args.server}.log') as master:
+        base_url = master.base_url  # type: ignore[attr-defined]
+        # Aquecimento: workers carregados e caches preenchidos antes das medições
+        asyncio.run(run_load(f'{base_url}/api/stations/{STATION_ID}/historical/?last=100',
+                             {'Authorization': f'Bearer {token}'}, args.workers, args.workers * 10))
+
+        for level, concurrency in enumerate(args.concurrency):
+            # Os IDs criados em cada nível de concorrência não se repetem entre os níveis
+            offset = level * args.requests
+            for scenario in SCENARIOS:
+                headers = {'Authorization': f'Bearer {token}'}
+                if scenario.body is not None:
+                    headers['Content-Type'] = 'application/json'
+                total = max(1, round(args.requests * scenario.weight))
+
+                reset_peak_rss(master.pid)
+                result = asyncio.run(run_load(
+                    _formatter(base_url + scenario.path, offset, str(job.id)),
+                    headers,
+                    min(concurrency, total),
+                    total,
+                    timeout=args.timeout,
+                    method=scenario.method,
+                    body=None if scenario.body is None else _formatter(scenario.body, offset),
+                ))
+                result.update(
+                    name=f'http {scenario.name}',
+                    route=scenario.route,
+                    server=args.server,
+                    concurrency=concurrency,
+                    peak_rss_mb=peak_rss_mb(master.pid),
+                )
+                results.append(result)
+
+    # As exclusões das estações criadas (e os jobs enviados com ?async=1) ficam na fila dos workers
+    jobs.work(poll_interval=0, exit_when_empty=True)
+    return results
+
+
+def run_generate(args: argparse.Namespace) -> Dict[str, Any]:
+    from stations.management.commands.generate_synthetic_data import SIZES
+
+    stations, rows_per_station = SIZES[args.size]
+    result = run_measured(
+        [sys.executable, 'manage.py', 'generate_synthetic_data', '--size', args.size, '--seed', str(args.seed)],
+        _environment(),
+    )
+    # O gerador não passa pelo importador, que mantém os modelos de previsão: sem eles, o
+    # cenário de previsão com o histórico completo mediria o cálculo sem modelos gravados
+    refit = run_measured(
+        [sys.executable, 'manage.py', 'refit_forecasts', '--station', str(STATION_ID)],
+        _environment(),
+    )
+    rows = stations * rows_per_station
+    return {
+        'name': 'generate',
+        'size': args.size,
+        'rows': rows,
+        'elapsed_s': result['elapsed_s'],
+        'throughput_rows_per_s': round(rows / result['elapsed_s'], 1),
+        'peak_rss_mb': result['peak_rss_mb'],
+        'refit_forecasts_s': refit['elapsed_s'],
+        'exit_code': result['exit_code'] or refit['exit_code'],
+        'output': (result['output'] + refit['output'])[-2000:],
+    }
+
+
+def run_importer(args: argparse.Namespace, fixtures_dir: Path) -> Dict[str, Any]:
+    if not args.fixtures:
+        generate(fixtures_dir, args.fixture_stations, args.fixture_rows, args.seed)
+    rows = count_rows(fixtures_dir)
+
+    with FixtureServer(fixtures_dir) as server:
+        started = time.perf_counter()
+        result = run_measured(
+            [sys.executable, 'manage.py', 'import_stations'],
+            _environment(SINDA_BASE_URL=server.base_url, SINDA_REQUEST_DELAY='0'),
+        )
+        finished = time.perf_counter()
+        marks = [mark for _, mark in server.station_requests]
+
+    # Tempo por estação: do pedido de tabela.php de uma estação até o da próxima (ou o fim do comando)
+    per_station = [end - start for start, end in zip(marks, marks[1:] + [finished])]
+    to_ms = lambda value: None if value is None else round(value * 1000, 2)  # noqa: E731
+    return {
+        'name': 'importer',
+        'fixtures': str(fixtures_dir),
+        'stations': len(marks),
+        'rows': rows,
+        'elapsed_s': result['elapsed_s'],
+        'throughput_rows_per_s': round(rows / result['elapsed_s'], 1),
+        'latency_per_station_ms': {
+            'p50': to_ms(percentile(per_station, 50)),
+            'p99': to_ms(percentile(per_station, 99)),
+        },
+        'peak_rss_mb': result['peak_rss_mb'],
+        'exit_code': result['exit_code'],
+        'output': result['output'][-2000:],
+    }
+
+
+def _summary_line(result: Dict[str, Any]) -> str:
+    if 'latency_ms' in result:
+        return (f"{result['name']:55} c={result['concurrency']:<4} p50={result['latency_ms']['p50']}ms "
+                f"p99={result['latency_ms']['p99']}ms {result['throughput_rps']} req/s "
+                f"rss={result['peak_rss_mb']['total']}MB status={result['status']}")
+    line = f"{result['name']:55} {result['rows']} registros, {result['throughput_rows_per_s']} registros/s, rss={result['peak_rss_mb']}MB"
+    if 'latency_per_station_ms' in result:
+        line += f" p50={result['latency_per_station_ms']['p50']}ms/estação p99={result['latency_per_station_ms']['p99']}ms/estação"
+    return line + ('' if result['exit_code'] == 0 else f" (código de saída {result['exit_code']})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=['generate', 'http', 'importer'], default=['generate', 'http', 'importer'])
+    parser.add_argument('--size', choices=['1k', '100k', '10m'], default='1k', help='Tamanho do conjunto de dados sintético')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--workers', type=int, default=4, help='Workers do gunicorn')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--requests', type=int, default=500, help='Requisições por cenário HTTP (antes do peso do cenário)')
+    parser.add_argument('--timeout', type=float, default=120, help='Tempo máximo de cada requisição, em segundos')
+    parser.add_argument('--fixtures', help='Diretório de fixtures do SINDA já gravadas (padrão: geradas em run/benchmarks/sinda)')
+    parser.add_argument('--fixture-stations', type=int, default=5)
+    parser.add_argument('--fixture-rows', type=int, default=1000, help='Registros por estação das fixtures geradas')
+    parser.add_argument('--output', default=str(BASE_DIR / 'run' / 'benchmarks' / 'report.json'))
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'weather_api.settings')
+    import django
+
+    django.setup()
+
+    missing = check_coverage()
+    if missing:
+        print(f"Aviso: rotas sem cenário de carga: {', '.join(missing)}", file=sys.stderr)
+
+    work_dir = BASE_DIR / 'run' / 'benchmarks'
+    report = {
+        'metadata': metadata(
+            size=args.size, server=args.server, workers=args.workers, concurrency=args.concurrency, requests=args.requests,
+        ),
+        'scenarios': [],
+    }
+
+    if 'generate' in args.scenarios:
+        report['scenarios'].append(run_generate(args))
+    if 'http' in args.scenarios:
+        report['scenarios'].extend(run_http(args, work_dir))
+    if 'importer' in args.scenarios:
+        report['scenarios'].append(run_importer(args, Path(args.fixtures) if args.fixtures else work_dir / 'sinda'))
+
+    for result in report['scenarios']:
+        print(_summary_line(result))
+    write_report(report, Path(args.output))
+    print(f"Relatório gravado em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Configuração do gunicorn (carregada automaticamente a partir do diretório do projeto).
+
+Com `preload_app`, a aplicação Django é carregada uma única vez no processo master e o hook
+`when_ready` importa antecipadamente as bibliotecas pesadas de análise (pandas/statsmodels).
+Os workers são criados por fork e compartilham essas páginas de memória em copy-on-write,
+em vez de cada um carregar a sua própria cópia.
+
+As métricas do Prometheus dos workers são gravadas em um subdiretório próprio do servidor em
+`METRICS_DIR` (`GUNICORN_METRICS_SERVICE`, padrão `web`), separado dos outros serviços que gravam
+métricas no mesmo diretório (`run_workers`, `import_stations`). Os hooks `on_starting` e
+`child_exit` limpam apenas esse subdiretório.
+"""
+import multiprocessing
+import os
+
+from decouple import config as env
+
+bind = env('GUNICORN_BIND', cast=str, default='0.0.0.0:8000')
+workers = env('GUNICORN_WORKERS', cast=int, default=multiprocessing.cpu_count() + 1)
+worker_class = env('GUNICORN_WORKER_CLASS', cast=str, default='sync')
+timeout = env('GUNICORN_TIMEOUT', cast=int, default=60)
+keepalive = env('GUNICORN_KEEPALIVE', cast=int, default=5)
+
+# Reciclar workers periodicamente limita o crescimento de memória em processos de longa duração
+max_requests = env('GUNICORN_MAX_REQUESTS', cast=int, default=2000)
+max_requests_jitter = env('GUNICORN_MAX_REQUESTS_JITTER', cast=int, default=200)
+
+preload_app = env('GUNICORN_PRELOAD', cast=bool, default=True)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'weather_api.settings')
+from weather_api import metrics_dir  # noqa: E402
+
+# Ativado antes de a aplicação ser carregada: o prometheus_client lê a variável ao ser importado.
+# Servidores diferentes na mesma máquina precisam de GUNICORN_METRICS_SERVICE diferentes
+_metrics_service = env('GUNICORN_METRICS_SERVICE', cast=str, default='web')
+_metrics_dir = metrics_dir.enable(_metrics_service)
+
+
+def on_starting(server):
+    """Descarta as métricas gravadas por uma execução anterior deste servidor (e só dele)."""
+    metrics_dir.enable(_metrics_service, clear=True)
+
+
+def when_ready(server):
+    """
+    Aquece o master antes do fork: carrega as rotas, as views e as bibliotecas de análise.
+
+    Conexões de banco eventualmente abertas durante o aquecimento são fechadas, para que os
+    workers não herdem o mesmo socket.
+    """
+    if not server.cfg.preload_app:
+        return
+
+    from django.db import connections
+    from django.urls import get_resolver
+    from stations import analytics
+
+    get_resolver().url_patterns
+    analytics.warm_up()
+    connections.close_all()
+    server.log.info("Aplicação pré-carregada (rotas e bibliotecas de análise)")
+
+
+def child_exit(server, worker):
+    """Remove as métricas de "processo vivo" do worker encerrado."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid, str(_metrics_dir))
@@ -15,6 +15,13 @@ def main():
             "available on your PYTHONPATH environment variable? Did you "
             "forget to activate a virtual environment?"
         ) from exc
+
+    # Os comandos de longa duração publicam métricas em /metrics, cada um no seu subdiretório, sem
+    # as métricas de execuções anteriores
+    from weather_api import metrics_dir
+    if len(sys.argv) > 1 and sys.argv[1] in metrics_dir.METRICS_COMMANDS:
+        metrics_dir.discard_dead(metrics_dir.enable(sys.argv[1]))
+
     execute_from_command_line(sys.argv)
 
 
@@ -0,0 +1,279 @@
+"""
+Controle de admissão dos endpoints com uso intenso de CPU (`predict` e `analyze`).
+
+Dois mecanismos, coordenados entre todos os workers do servidor por arquivos em
+`ADMISSION_DIR` com travas `flock` (liberadas automaticamente se o worker morrer):
+
+- Limite de concorrência por endpoint: cada execução ocupa um dos `concurrency` slots.
+  Sem slot livre, a requisição aguarda em uma fila de até `queue` posições por no máximo
+  `queue_timeout` segundos; fila cheia ou tempo esgotado resultam em 503 com `Retry-After`.
+- Token bucket por usuário: `rate` fichas por segundo com capacidade `burst`; sem fichas,
+  o DRF responde 429 com `Retry-After`. Os buckets de um escopo ficam em um único arquivo JSON, do
+  qual os buckets cheios (usuários inativos) são removidos.
+
+Os limites são configurados por escopo em `settings.ADMISSION_CONTROL`. As requisições admitidas e
+recusadas, a espera e o tamanho da fila são publicados nas métricas do Prometheus (`weather_api_admission_*`).
+"""
+import asyncio
+import fcntl
+import json
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Generator, Iterator, Optional
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from weather_api.metrics import ADMISSION_ACTIVE, ADMISSION_ADMITTED, ADMISSION_QUEUE_WAIT, ADMISSION_QUEUED, ADMISSION_REJECTED
+
+# Intervalo entre tentativas de obter um slot enquanto a requisição está na fila
+POLL_INTERVAL = 0.05
+
+
+class AdmissionRejected(Exception):
+    """A requisição foi recusada pelo controle de concorrência."""
+
+    def __init__(self, scope: str, reason: str, retry_after: int):
+        super().__init__(f"{scope}: {reason}")
+        self.scope = scope
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _config(scope: str) -> Dict[str, Any]:
+    return settings.ADMISSION_CONTROL[scope]
+
+
+@lru_cache(maxsize=None)
+def _directory(path: str) -> Path:
+    """O diretório das travas, criado no primeiro uso."""
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _path(name: str) -> Path:
+    return _directory(settings.ADMISSION_DIR) / name
+
+
+def _try_lock(path: Path) -> Optional[int]:
+    """Tenta travar o arquivo sem bloquear; retorna o descritor se conseguir."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _release(fd: int) -> None:
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def _acquire_any(scope: str, kind: str, size: int) -> Optional[int]:
+    for index in range(size):
+        fd = _try_lock(_path(f"{scope}.{kind}.{index}"))
+        if fd is not None:
+            return fd
+    return None
+
+
+def _count_held(scope: str, kind: str, size: int) -> int:
+    held = 0
+    for index in range(size):
+        fd = os.open(_path(f"{scope}.{kind}.{index}"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        except BlockingIOError:
+            held += 1
+        finally:
+            os.close(fd)
+    return held
+
+
+@contextmanager
+def _locked_json(name: str) -> Iterator[Dict[str, Any]]:
+    """Abre um arquivo JSON com trava exclusiva; alterações no dicionário são gravadas ao sair."""
+    fd = os.open(_path(name), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        with os.fdopen(os.dup(fd), 'r+') as file:
+            content = file.read()
+            state = json.loads(content) if content else {}
+            yield state
+            file.seek(0)
+            file.truncate()
+            json.dump(state, file)
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _acquire(scope: str) -> Generator[None, None, int]:
+    """
+    Obtém um slot de execução do escopo, aguardando na fila se necessário.
+
+    A espera fica a cargo do chamador: o gerador produz um valor a cada tentativa sem sucesso,
+    e o chamador aguarda `POLL_INTERVAL` segundos (com `time.sleep` ou `asyncio.sleep`) antes de
+    continuar. Ao terminar, retorna o descritor do slot.
+
+    Raises:
+        AdmissionRejected: Se a fila estiver cheia ou o tempo de espera se esgotar.
+    """
+    config = _config(scope)
+    slot = _acquire_any(scope, 'slot', config['concurrency'])
+
+    if slot is None:
+        ticket = _acquire_any(scope, 'queue', config['queue'])
+        if ticket is None:
+            ADMISSION_REJECTED.labels(scope, 'queue_full').inc()
+            raise AdmissionRejected(scope, "fila cheia", config['retry_after'])
+
+        started = time.monotonic()
+        ADMISSION_QUEUED.labels(scope).inc()
+        try:
+            deadline = started + config['queue_timeout']
+            while slot is None and time.monotonic() < deadline:
+                yield
+                slot = _acquire_any(scope, 'slot', config['concurrency'])
+        finally:
+            ADMISSION_QUEUED.labels(scope).dec()
+            _release(ticket)
+        ADMISSION_QUEUE_WAIT.labels(scope).observe(time.monotonic() - started)
+
+        if slot is None:
+            ADMISSION_REJECTED.labels(scope, 'timeout').inc()
+            raise AdmissionRejected(scope, "tempo de espera esgotado", config['retry_after'])
+    else:
+        ADMISSION_QUEUE_WAIT.labels(scope).observe(0)
+
+    ADMISSION_ADMITTED.labels(scope).inc()
+    return slot
+
+
+@contextmanager
+def _occupy(scope: str, slot: int) -> Iterator[None]:
+    """Mantém o slot obtido por `_acquire` durante o bloco `with` e o libera ao sair."""
+    ADMISSION_ACTIVE.labels(scope).inc()
+    try:
+        yield
+    finally:
+        ADMISSION_ACTIVE.labels(scope).dec()
+        _release(slot)
+
+
+@contextmanager
+def admission_slot(scope: str) -> Iterator[None]:
+    """
+    Ocupa um slot de execução do escopo durante o bloco `with`.
+
+    Raises:
+        AdmissionRejected: Se a fila estiver cheia ou o tempo de espera se esgotar.
+    """
+    waiting = _acquire(scope)
+    try:
+        while True:
+            next(waiting)
+            time.sleep(POLL_INTERVAL)
+    except StopIteration as acquired:
+        slot = acquired.value
+    finally:
+        waiting.close()
+
+    with _occupy(scope, slot):
+        yield
+
+
+@asynccontextmanager
+async def async_admission_slot(scope: str) -> AsyncIterator[None]:
+    """
+    Versão assíncrona de `admission_slot`: a espera na fila não bloqueia o event loop.
+
+    Raises:
+        AdmissionRejected: Se a fila estiver cheia ou o tempo de espera se esgotar.
+    """
+    waiting = _acquire(scope)
+    try:
+        while True:
+            next(waiting)
+            await asyncio.sleep(POLL_INTERVAL)
+    except StopIteration as acquired:
+        slot = acquired.value
+    finally:
+        # Se a requisição for cancelada durante a espera, a posição na fila é liberada aqui
+        waiting.close()
+
+    with _occupy(scope, slot):
+        yield
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna, por escopo, as execuções e a fila atuais (lidas das travas) e os limites configurados.
+
+    Os contadores acumulados (admitidas, recusadas e espera na fila) ficam nas métricas do
+    Prometheus (`/metrics`).
+
+    Returns:
+        dict: `active`, `concurrency`, `queued` e `queue` por escopo.
+    """
+    return {
+        scope: {
+            'active': _count_held(scope, 'slot', config['concurrency']),
+            'concurrency': config['concurrency'],
+            'queued': _count_held(scope, 'queue', config['queue']),
+            'queue': config['queue'],
+        }
+        for scope, config in settings.ADMISSION_CONTROL.items()
+    }
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle do DRF baseado em token bucket, com estado compartilhado entre os workers.
+
+    Subclasses definem `scope`; a taxa (`rate`, fichas por segundo) e a capacidade (`burst`)
+    vêm de `settings.ADMISSION_CONTROL[scope]`.
+    """
+    scope: str = ''
+
+    def allow_request(self, request, view) -> bool:
+        config = _config(self.scope)
+        ident = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+        now = time.time()
+
+        with _locked_json(f"buckets.{self.scope}.json") as buckets:
+            # Buckets que já teriam se enchido são descartados: equivalem a um bucket novo
+            for key, bucket in list(buckets.items()):
+                if bucket['tokens'] + (now - bucket['ts']) * config['rate'] >= config['burst']:
+                    del buckets[key]
+
+            bucket = buckets.setdefault(str(ident), {'tokens': config['burst'], 'ts': now})
+            tokens = min(config['burst'], bucket['tokens'] + (now - bucket['ts']) * config['rate'])
+            bucket['ts'] = now
+            if tokens >= 1:
+                bucket['tokens'] = tokens - 1
+                self._wait = None
+                return True
+            bucket['tokens'] = tokens
+
+        self._wait = (1 - tokens) / config['rate']
+        ADMISSION_REJECTED.labels(self.scope, 'throttled').inc()
+        return False
+
+    def wait(self) -> Optional[float]:
+        return getattr(self, '_wait', None)
+
+
+class PredictThrottle(TokenBucketThrottle):
+    scope = 'predict'
+
+
+class AnalyzeThrottle(TokenBucketThrottle):
+    scope = 'analyze'
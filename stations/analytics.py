@@ -0,0 +1,477 @@
+"""
+Funções de análise estatística e previsão usadas pelas views de estações.
+
+pandas e statsmodels são importados apenas na primeira chamada (`load_pandas` e
+`load_statsmodels`), para que o boot dos workers e os comandos do `manage.py` que não fazem
+análises não paguem o custo de carregar essas bibliotecas. O arquivo `gunicorn.conf.py`
+chama `warm_up` no processo master, de modo que os workers herdam os módulos já carregados.
+"""
+import math
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, List, Optional, Tuple
+from warnings import filterwarnings
+
+from django.db import transaction
+from django.utils import timezone
+
+from weather_api.metrics import FORECAST_FIT_DURATION
+
+from . import hot_data
+from .models import ForecastModel, RegistrationData
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Modelo usado nas previsões, campos previstos e horizonte (em passos)
+FORECAST_ORDER = (5, 1, 0)
+FORECAST_FIELDS = ['TempAr_C', 'Bateria_volts', 'NivRegua_m', 'Pluvio_mm']
+FORECAST_STEPS = 7
+
+# Campos analisados pelo analyze (resumidos em FieldSketch)
+ANALYZE_FIELDS = ['Pluvio_mm', 'NivRegua_m', 'Bateria_volts']
+
+
+def load_pandas():
+    import pandas as pd
+    return pd
+
+
+@lru_cache(maxsize=None)
+def load_statsmodels():
+    import statsmodels.api as sm
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+    from statsmodels.tools.sm_exceptions import ValueWarning
+
+    # ---------------------------- Suprimir avisos específicos ---------------------------- #
+    filterwarnings("ignore", category=UserWarning, module="statsmodels")
+    filterwarnings("ignore", category=FutureWarning, module="statsmodels")
+    filterwarnings("ignore", category=ValueWarning, module="statsmodels")
+    filterwarnings("ignore", category=ConvergenceWarning, module="statsmodels")
+
+    return sm
+
+
+def warm_up() -> None:
+    """Carrega antecipadamente as bibliotecas usadas por `analyze` e `predict`."""
+    load_pandas()
+    sm = load_statsmodels()
+    sm.tsa.ARIMA  # Importa o submódulo do modelo ARIMA
+
+
+def recent_frame(pk: int, last: int) -> "pd.DataFrame":
+    """
+    Monta um DataFrame com os `last` registros mais recentes de uma estação.
+
+    Os dados são lidos do buffer de dados quentes (`hot_data`) e, se ele não estiver
+    disponível ou não tiver registros suficientes, do banco de dados.
+
+    Args:
+        pk (int): O ID da estação.
+        last (int): Quantidade de registros.
+
+    Returns:
+        DataFrame: Registros em ordem cronológica, indexados pela coluna `data`.
+    """
+    pd = load_pandas()
+    array = hot_data.read_recent(pk, last)
+    if array is not None:
+        df = pd.DataFrame(array)
+    else:
+        rows = (
+            RegistrationData.objects.filter(station_id=pk, DataHora_GMT__isnull=False)
+            .order_by('-DataHora_GMT')
+            .values('DataHora_GMT', *hot_data.HOT_DATA_FIELDS)[:last]
+        )
+        df = pd.DataFrame.from_records(reversed(list(rows)), columns=['DataHora_GMT', *hot_data.HOT_DATA_FIELDS])
+        df[hot_data.HOT_DATA_FIELDS] = df[hot_data.HOT_DATA_FIELDS].apply(pd.to_numeric, errors='coerce')
+
+    df['data'] = pd.to_datetime(df['DataHora_GMT'])
+    df.set_index('data', inplace=True)
+    return df
+
+
+def history_frame(records: List[Dict[str, Any]]) -> "pd.DataFrame":
+    """
+    Monta um DataFrame a partir dos registros serializados de uma estação.
+
+    Args:
+        records (list): Registros serializados com `RegistrationDataSerializer`.
+
+    Returns:
+        DataFrame: Os registros, indexados pela coluna `data` (vazio se não houver registros).
+    """
+    pd = load_pandas()
+    df = pd.DataFrame(records)
+    if not df.empty:
+        df['data'] = pd.to_datetime(df['DataHora_GMT'])
+        df.set_index('data', inplace=True)
+    return df
+
+
+def recent_records(pk: int, last: int) -> List[Dict[str, Any]]:
+    """
+    Retorna os `last` registros mais recentes de uma estação (campos numéricos).
+
+    Args:
+        pk (int): O ID da estação.
+        last (int): Quantidade de registros.
+
+    Returns:
+        list: Registros em ordem cronológica, com `DataHora_GMT` e os campos numéricos.
+    """
+    array = hot_data.read_recent(pk, last)
+    if array is not None:
+        return hot_data.records_to_dicts(array)
+
+    rows = (
+        RegistrationData.objects.filter(station_id=pk, DataHora_GMT__isnull=False)
+        .order_by('-DataHora_GMT')
+        .values('DataHora_GMT', *hot_data.HOT_DATA_FIELDS)[:last]
+    )
+    records = []
+    for row in reversed(list(rows)):
+        record = {'DataHora_GMT': row['DataHora_GMT'].strftime('%Y-%m-%dT%H:%M:%SZ')}
+        for field in hot_data.HOT_DATA_FIELDS:
+            record[field] = None if row[field] is None else float(row[field])
+        records.append(record)
+    return records
+
+
+def describe(df: "pd.DataFrame", campos_interesse: List[str]) -> Dict[str, Any]:
+    """
+    Calcula as estatísticas descritivas dos campos de interesse.
+
+    Args:
+        df (DataFrame): Os registros da estação.
+        campos_interesse (list): Os campos a serem analisados.
+
+    Returns:
+        dict: Os resultados da análise estatística.
+    """
+    pd = load_pandas()
+    df[campos_interesse] = df[campos_interesse].apply(pd.to_numeric, errors='coerce')
+
+    # Estatísticas descritivas básicas
+    analysis_result = df[campos_interesse].describe().to_dict()
+
+    # Estatísticas adicionais
+    analysis_result['mediana'] = df[campos_interesse].median().to_dict()
+    analysis_result['valor_mais_frequente'] = df[campos_interesse].mode().iloc[0].to_dict()
+    analysis_result['quantis '] = df[campos_interesse].quantile([0.25, 0.5, 0.75]).to_dict()
+    analysis_result['variancia'] = df[campos_interesse].var().to_dict()
+    analysis_result['desvio_padrao'] = df[campos_interesse].std().to_dict()
+    analysis_result['assimetria'] = df[campos_interesse].skew().to_dict()
+    analysis_result['curtose'] = df[campos_interesse].kurtosis().to_dict()
+    analysis_result['contagem_nao_nulos'] = df[campos_interesse].count().to_dict()
+
+    # Campos sem leituras (sensores que a estação não possui) produzem NaN, que não é JSON válido
+    return _sem_nan(analysis_result)
+
+
+def sketch_summary(pk: int, campos_interesse: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Calcula as estatísticas de `describe` a partir dos resumos gravados da estação (`FieldSketch`),
+    em tempo constante. Quantis e moda são aproximados; o erro de cada um é informado em `aproximacao`
+    (ver `stations/sketches.py`).
+
+    Args:
+        pk (int): O ID da estação.
+        campos_interesse (list): Os campos a serem analisados.
+
+    Returns:
+        dict | None: Os resultados da análise, ou None se algum campo não tiver resumo (ou se nenhum
+        tiver leituras).
+    """
+    from . import sketches
+
+    resumos = sketches.load(pk, campos_interesse)
+    if len(resumos) < len(campos_interesse) or not any(resumo.moments.count for resumo in resumos.values()):
+        # Sem resumos, ou sem leituras: a análise com o histórico decide a resposta
+        return None
+
+    analysis_result: Dict[str, Any] = {}
+    extras: Dict[str, Dict[str, Any]] = {
+        key: {} for key in ('mediana', 'valor_mais_frequente', 'quantis ', 'variancia', 'desvio_padrao', 'assimetria', 'curtose', 'contagem_nao_nulos')
+    }
+    erro_quantis, erro_moda = {}, {}
+    for campo in campos_interesse:
+        resumo = resumos[campo]
+        momentos = resumo.moments
+        quantis = resumo.quantiles()
+        variancia = momentos.variance()
+        desvio = None if variancia is None else math.sqrt(variancia)
+        moda, erro_moda[campo] = resumo.histogram.mode()
+        vazio = not momentos.count
+
+        analysis_result[campo] = {
+            'count': float(momentos.count),
+            'mean': None if vazio else momentos.mean,
+            'std': desvio,
+            'min': resumo.minimum,
+            '25%': quantis[0.25][0],
+            '50%': quantis[0.5][0],
+            '75%': quantis[0.75][0],
+            'max': resumo.maximum,
+        }
+        extras['mediana'][campo] = quantis[0.5][0]
+        extras['valor_mais_frequente'][campo] = moda
+        extras['quantis '][campo] = {q: valor for q, (valor, _) in quantis.items()}
+        extras['variancia'][campo] = variancia
+        extras['desvio_padrao'][campo] = desvio
+        extras['assimetria'][campo] = momentos.skew()
+        extras['curtose'][campo] = momentos.kurtosis()
+        extras['contagem_nao_nulos'][campo] = momentos.count
+        erro_quantis[campo] = {q: erro for q, (_, erro) in quantis.items()}
+
+    analysis_result.update(extras)
+    analysis_result['aproximacao'] = {
+        'metodo': 'resumos (t-digest e histograma); use ?exact=1 para o cálculo com todo o histórico',
+        'erro_rank_quantis': erro_quantis,
+        'erro_moda': erro_moda,
+    }
+    return _sem_nan(analysis_result)
+
+
+def _sem_nan(valor: Any) -> Any:
+    if isinstance(valor, dict):
+        return {chave: _sem_nan(item) for chave, item in valor.items()}
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+def fazer_previsao(serie: "pd.Series") -> Optional[Dict[str, Any]]:
+    """
+    Ajusta um modelo ARIMA(5, 1, 0) à série e faz a previsão dos próximos 7 passos.
+
+    Args:
+        serie (Series): A série temporal do campo.
+
+    Returns:
+        dict | None: Previsão, erro padrão e intervalo de confiança, ou None se a série estiver vazia.
+    """
+    # As leituras têm falhas de transmissão (índice de datas irregular): a previsão é feita por passos
+    ts = serie.astype(float).dropna().reset_index(drop=True)
+    if ts.empty:
+        return None
+    return resumir_previsao(ajustar_modelo(ts.to_numpy(), str(serie.name)))
+
+
+def ajustar_modelo(valores, campo: str):
+    """Estima os parâmetros do modelo ARIMA(5, 1, 0) para a série (registrando a duração)."""
+    sm = load_statsmodels()
+    model = sm.tsa.ARIMA(valores, order=FORECAST_ORDER)
+    started = time.perf_counter()
+    results = model.fit()
+    FORECAST_FIT_DURATION.labels(campo).observe(time.perf_counter() - started)
+    return results
+
+
+def resumir_previsao(results) -> Dict[str, Any]:
+    """Previsão dos próximos `FORECAST_STEPS` passos, com erro padrão e intervalo de confiança de 95%."""
+    forecast = results.get_forecast(steps=FORECAST_STEPS)
+    previsao = forecast.predicted_mean
+    erro_padrao = forecast.se_mean
+    intervalo_confianca = forecast.conf_int(alpha=0.05)
+    return {
+        'previsao': [round(val, 2) for val in previsao],
+        'erro_padrao': [round(val, 4) for val in erro_padrao],
+        'intervalo_confianca': {
+            'limite_inferior': [round(val, 2) for val in intervalo_confianca[:, 0]],
+            'limite_superior': [round(val, 2) for val in intervalo_confianca[:, 1]]
+        }
+    }
+
+
+def forecast(df: "pd.DataFrame", campos: List[str]) -> Dict[str, Any]:
+    """
+    Faz a previsão de cada campo que não possui valores ausentes.
+
+    Args:
+        df (DataFrame): Os registros da estação, indexados pela data.
+        campos (list): Os campos a serem previstos.
+
+    Returns:
+        dict: As previsões por campo (vazio se nenhum campo puder ser previsto).
+    """
+    previsoes = {}
+    for campo in campos:
+        if df[campo].isnull().sum() == 0:
+            previsoes[campo] = fazer_previsao(df[campo])
+    return previsoes
+
+
+# ----------------------------- Modelos de previsão gravados ----------------------------- #
+def _to_bytes(array) -> bytes:
+    import numpy as np
+    return np.ascontiguousarray(array, dtype='<f8').tobytes()
+
+
+def _from_bytes(value) -> "np.ndarray":
+    import numpy as np
+    return np.frombuffer(bytes(value), dtype='<f8')
+
+
+def _readings(pk: int, campo: str, after=None) -> Tuple["np.ndarray", Optional[datetime], bool]:
+    """
+    Leituras de um campo em ordem cronológica (opcionalmente, apenas as posteriores a `after`).
+
+    Returns:
+        tuple: Os valores (nulos como NaN), a data da última leitura e se há leituras nulas.
+    """
+    import numpy as np
+
+    rows = RegistrationData.objects.filter(station_id=pk, DataHora_GMT__isnull=False)
+    if after is not None:
+        rows = rows.filter(DataHora_GMT__gt=after)
+    rows = list(rows.order_by('DataHora_GMT').values_list('DataHora_GMT', campo))
+    values = np.array([np.nan if value is None else float(value) for _, value in rows], dtype=float)
+    return values, rows[-1][0] if rows else None, bool(np.isnan(values).any())
+
+
+def _state(results) -> Dict[str, Any]:
+    """Campos de `ForecastModel` com o estado do filtro após a última leitura de `results`."""
+    return {
+        'params': _to_bytes(results.params),
+        'state': _to_bytes(results.predicted_state[:, -1]),
+        'state_cov': _to_bytes(results.predicted_state_cov[:, :, -1]),
+        'forecast': resumir_previsao(results),
+    }
+
+
+def estimate_forecast_model(pk: int, campo: str, atomic: Callable[[], ContextManager[None]] = transaction.atomic) -> ForecastModel:
+    """
+    Reestima o modelo de um campo com todo o histórico da estação e grava o resultado.
+
+    O ajuste é feito fora da transação: `atomic` envolve apenas a gravação do modelo.
+
+    Args:
+        pk (int): O ID da estação.
+        campo (str): O campo a ser previsto.
+        atomic (callable, optional): Abre a transação da gravação. Padrão: `transaction.atomic`.
+
+    Returns:
+        ForecastModel: O modelo gravado (`forecast` é None se o campo não puder ser previsto).
+    """
+    values, last_timestamp, has_missing = _readings(pk, campo)
+    defaults = {
+        'params': None, 'state': None, 'state_cov': None, 'forecast': None,
+        'nobs': len(values), 'last_timestamp': last_timestamp, 'has_missing': has_missing, 'fitted_at': timezone.now(),
+    }
+    if len(values) and not has_missing:
+        defaults.update(_state(ajustar_modelo(values, campo)))
+    with atomic():
+        model, _ = ForecastModel.objects.update_or_create(station_id_id=pk, field=campo, defaults=defaults)
+    return model
+
+
+def extend_forecast_model(model: ForecastModel, atomic: Callable[[], ContextManager[None]] = transaction.atomic) -> ForecastModel:
+    """
+    Estende um modelo gravado com as leituras posteriores a `last_timestamp`.
+
+    Os parâmetros ficam fixos: o filtro de Kalman parte do estado gravado e processa apenas as
+    leituras novas, então o custo cresce com a quantidade de leituras novas, e não com o histórico.
+    Sem leituras novas, o modelo não é alterado.
+
+    Leituras nulas são tratadas pelo filtro como observações ausentes: o estado avança sobre elas,
+    mas o campo fica sem previsão (`has_missing`) até a próxima extensão com leituras completas.
+
+    Args:
+        model (ForecastModel): O modelo gravado.
+        atomic (callable, optional): Abre a transação da gravação. Padrão: `transaction.atomic`.
+
+    Returns:
+        ForecastModel: O modelo atualizado.
+    """
+    if model.params is None:
+        if model.has_missing:
+            # O histórico tinha leituras nulas na estimação: o campo aguarda a próxima reestimação
+            return model
+        # O campo ainda não tinha leituras quando o modelo foi estimado
+        return estimate_forecast_model(model.station_id_id, model.field, atomic)
+
+    values, last_timestamp, has_missing = _readings(model.station_id_id, model.field, after=model.last_timestamp)
+    if not len(values):
+        return model
+
+    sm = load_statsmodels()
+    from statsmodels.tsa.statespace.initialization import Initialization
+
+    state = _from_bytes(model.state)
+    extension = sm.tsa.ARIMA(values, order=FORECAST_ORDER)
+    extension.ssm.initialization = Initialization(
+        extension.k_states, 'known', constant=state, stationary_cov=_from_bytes(model.state_cov).reshape(len(state), len(state)),
+    )
+    for name, value in _state(extension.filter(_from_bytes(model.params))).items():
+        setattr(model, name, value)
+    if has_missing:
+        model.forecast = None
+    model.has_missing = has_missing
+    model.nobs += len(values)
+    model.last_timestamp = last_timestamp
+    with atomic():
+        model.save()
+    return model
+
+
+def update_forecast_models(pk: int, campos: List[str], atomic: Callable[[], ContextManager[None]] = transaction.atomic) -> None:
+    """
+    Estende os modelos gravados dos campos com as leituras novas da estação (ou os estima, na
+    primeira vez).
+
+    Chamada pelo `import_stations` depois de gravar as leituras de uma estação, para que as
+    requisições de previsão apenas leiam os modelos: uma escrita durante a requisição prenderia o
+    cliente ao banco primário (`weather_api/db_router.py`). Os ajustes são feitos fora de transação;
+    `atomic` envolve apenas a gravação de cada modelo (no importador, verifica e renova a reserva).
+
+    Args:
+        pk (int): O ID da estação.
+        campos (list): Os campos previstos.
+        atomic (callable, optional): Abre a transação de cada gravação. Padrão: `transaction.atomic`.
+    """
+    models = {model.field: model for model in ForecastModel.objects.filter(station_id=pk, field__in=campos)}
+    for campo in campos:
+        model = models.get(campo)
+        if model is None:
+            estimate_forecast_model(pk, campo, atomic)
+        else:
+            extend_forecast_model(model, atomic)
+
+
+def _history_frame(pk: int, campos: List[str]) -> "pd.DataFrame":
+    """O histórico completo dos campos da estação, em ordem cronológica."""
+    pd = load_pandas()
+    rows = (
+        RegistrationData.objects.filter(station_id=pk, DataHora_GMT__isnull=False)
+        .order_by('DataHora_GMT')
+        .values_list('DataHora_GMT', *campos)
+    )
+    df = pd.DataFrame.from_records(list(rows), columns=['DataHora_GMT', *campos])
+    df[campos] = df[campos].apply(pd.to_numeric, errors='coerce')
+    return df.set_index('DataHora_GMT')
+
+
+def forecast_station(pk: int, campos: List[str]) -> Dict[str, Any]:
+    """
+    Faz a previsão de cada campo com o histórico completo da estação, a partir dos modelos gravados.
+
+    Apenas lê o banco: os modelos são mantidos pelo importador (`update_forecast_models`) e pelo
+    `refit_forecasts`. Estações ainda sem modelos gravados (importadas antes deles) são previstas
+    com todo o histórico, como em `forecast`, sem gravar nada. Campos com leituras nulas não são
+    previstos.
+
+    Args:
+        pk (int): O ID da estação.
+        campos (list): Os campos a serem previstos.
+
+    Returns:
+        dict: As previsões por campo (vazio se nenhum campo puder ser previsto).
+    """
+    models = list(ForecastModel.objects.filter(station_id=pk, field__in=campos))
+    if not models:
+        df = _history_frame(pk, campos)
+        return forecast(df, campos) if len(df) else {}
+    return {model.field: model.forecast for model in models if model.forecast is not None}
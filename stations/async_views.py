@@ -0,0 +1,298 @@
+"""
+Versões assíncronas (ASGI) dos endpoints de leitura.
+
+Usadas quando `ASYNC_VIEWS` está ativo e o projeto é servido por `weather_api.asgi`
+(gunicorn com workers uvicorn). As consultas usam o ORM assíncrono do Django, então o
+event loop continua atendendo outros clientes enquanto o banco responde. `predict` e `analyze`
+executam as mesmas funções das views síncronas (`views.predict_result` e `views.analyze_result`)
+em um pool de processos, e a serialização de listas grandes (estações e histórico) roda em
+threads, fora do event loop. Apenas a autenticação, o throttle, o controle de admissão e a espera
+são próprios destas views.
+
+As respostas têm o mesmo corpo de `views.response_body`. Métodos de escrita (PUT/DELETE em
+`stations_by_id`), o perfilamento (`?profile=1`) e o envio de jobs (`?async=1`) são delegados às
+views síncronas.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import analytics, jobs, live, profiling, views
+from .admission import AdmissionRejected, AnalyzeThrottle, PredictThrottle, TokenBucketThrottle, async_admission_slot
+from .models import RegistrationData, Station
+from .serializers import RegistrationDataSerializer, StationSerializer, StationWithLatestSerializer
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Retorna o pool de processos usado para o trabalho de CPU, criando-o no primeiro uso.
+
+    O pool é criado de forma preguiçosa para que cada worker (após o fork do gunicorn) tenha
+    o seu. Os processos são iniciados com `spawn` e executam `django.setup()` ao iniciar.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.ANALYTICS_EXECUTOR_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+    return _executor
+
+
+def pool_result(result_function: Callable[..., Tuple[Any, Optional[Dict[str, Any]], int]], *args) -> Tuple[Any, Optional[Dict[str, Any]], int]:
+    """Executa `views.predict_result` ou `views.analyze_result` em um processo do pool."""
+    # Fora do ciclo de requisição, as conexões dos processos do pool não são verificadas pelo Django
+    close_old_connections()
+    try:
+        return result_function(*args)
+    finally:
+        close_old_connections()
+
+
+def json_response(data: Any = None, errors: Optional[Dict[str, Any]] = None, status: int = status.HTTP_200_OK) -> JsonResponse:
+    """Equivalente assíncrono de `views.response_template`, retornando um `JsonResponse`."""
+    return JsonResponse(
+        views.response_body(data, errors),
+        status=status,
+        encoder=JSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+async def authenticate(request: HttpRequest) -> bool:
+    """
+    Autentica a requisição com as classes configuradas em `DEFAULT_AUTHENTICATION_CLASSES`.
+
+    Em caso de sucesso, define `request.user` e `request.auth`.
+
+    Returns:
+        bool: True se a requisição foi autenticada.
+    """
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = await sync_to_async(authentication_class().authenticate)(request)
+        except (AuthenticationFailed, NotAuthenticated):
+            return False
+        if result is not None:
+            request.user, request.auth = result
+            return True
+    return False
+
+
+def unauthorized() -> JsonResponse:
+    return json_response(errors={"message": "As credenciais de autenticação não foram fornecidas ou são inválidas."}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+def not_found() -> JsonResponse:
+    return json_response(errors={"message": views.STATION_NOT_FOUND_MESSAGE}, status=status.HTTP_404_NOT_FOUND)
+
+
+def server_error(e: Exception) -> JsonResponse:
+    logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
+    return json_response(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def throttle(request: HttpRequest, throttle_class) -> Optional[JsonResponse]:
+    """Aplica o token bucket do escopo; retorna a resposta 429 se a requisição for recusada."""
+    throttle = throttle_class()
+    allowed = await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, None)
+    if allowed:
+        return None
+
+    response = json_response(errors={"message": "Limite de requisições excedido."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(int(throttle.wait() or 1) + 1)
+    return response
+
+
+def busy(e: AdmissionRejected) -> JsonResponse:
+    response = json_response(errors={"message": f"Servidor ocupado ({e.reason}). Tente novamente em alguns segundos."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(e.retry_after)
+    return response
+
+
+def serialize_many(serializer_class, instances) -> List[Dict[str, Any]]:
+    return serializer_class(instances, many=True).data
+
+
+def station_history(pk: int) -> List[Dict[str, Any]]:
+    """Histórico completo da estação, serializado com `RegistrationDataSerializer`."""
+    return RegistrationDataSerializer(RegistrationData.objects.filter(station_id=pk), many=True).data
+
+
+async def threaded_json_response(data: Any) -> JsonResponse:
+    """`json_response` montado em uma thread: a codificação de listas grandes não bloqueia o event loop."""
+    return await sync_to_async(json_response, thread_sensitive=False)(data=data)
+
+
+# --------------------------------- Estações --------------------------------- #
+async def stations(request: HttpRequest) -> JsonResponse:
+    """Versão assíncrona de `views.stations`."""
+    if request.method != "GET":
+        return json_response(errors={"message": f"Método {request.method} não permitido."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not await authenticate(request):
+        return unauthorized()
+
+    try:
+        if request.GET.get("with_latest") in ("1", "true", "True"):
+            stations = [station async for station in Station.objects.select_related('LatestRegistrationData')]
+            serializer_class = StationWithLatestSerializer
+        else:
+            stations = [station async for station in Station.objects.all()]
+            serializer_class = StationSerializer
+        data = await sync_to_async(serialize_many, thread_sensitive=False)(serializer_class, stations)
+        return await threaded_json_response(data)
+    except Exception as e:
+        return server_error(e)
+
+
+@csrf_exempt
+async def stations_by_id(request: HttpRequest, pk: int):
+    """Versão assíncrona de `views.stations_by_id` (GET); PUT e DELETE usam a view síncrona."""
+    if request.method != "GET":
+        return await sync_to_async(views.stations_by_id)(request, pk=pk)
+    if not await authenticate(request):
+        return unauthorized()
+
+    try:
+        station = await Station.objects.select_related('LatestRegistrationData').filter(pk=pk).afirst()
+        if station is None:
+            return not_found()
+        return json_response(data=StationWithLatestSerializer(station).data)
+    except Exception as e:
+        return server_error(e)
+
+
+# --------------------------------- Dados históricos --------------------------------- #
+async def historical_data_by_id(request: HttpRequest, pk: int) -> JsonResponse:
+    """Versão assíncrona de `views.historical_data_by_id`."""
+    if request.method != "GET":
+        return json_response(errors={"message": f"Método {request.method} não permitido."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not await authenticate(request):
+        return unauthorized()
+
+    try:
+        try:
+            last = views.get_last_param(request)
+        except ValueError:
+            return json_response(errors={"message": views.INVALID_LAST_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not await Station.objects.filter(pk=pk).aexists():
+            return not_found()
+
+        if last is not None:
+            records = await sync_to_async(analytics.recent_records, thread_sensitive=False)(pk, last)
+        else:
+            records = await sync_to_async(station_history, thread_sensitive=False)(pk)
+        return await threaded_json_response(records)
+    except Exception as e:
+        return server_error(e)
+
+
+# --------------------------------- Análise e Previsão --------------------------------- #
+async def computed_view(request: HttpRequest, pk: int, sync_view, throttle_class: Type[TokenBucketThrottle], scope: str,
+                        result_function: Callable[..., Tuple[Any, Optional[Dict[str, Any]], int]], *args) -> JsonResponse:
+    """
+    Executa `result_function(pk, last, *args)` no pool de processos, com a autenticação, o throttle e
+    o controle de admissão da view síncrona `sync_view`.
+    """
+    if request.method != "GET":
+        return json_response(errors={"message": f"Método {request.method} não permitido."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if profiling.profile_requested(request.GET.get("profile")) or jobs.async_requested(request.GET.get("async")):
+        # O perfilamento precisa rodar na mesma thread do cálculo, e o envio do job é rápido (sem
+        # trabalho de CPU): ambos usam a view síncrona
+        return await sync_to_async(sync_view)(request, pk=pk)
+    if not await authenticate(request):
+        return unauthorized()
+
+    throttled = await throttle(request, throttle_class)
+    if throttled is not None:
+        return throttled
+
+    try:
+        try:
+            last = views.get_last_param(request)
+        except ValueError:
+            return json_response(errors={"message": views.INVALID_LAST_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+
+        async with async_admission_slot(scope):
+            loop = asyncio.get_running_loop()
+            data, errors, code = await loop.run_in_executor(get_executor(), pool_result, result_function, pk, last, *args)
+        return json_response(data=data, errors=errors, status=code)
+    except AdmissionRejected as e:
+        return busy(e)
+    except Exception as e:
+        return server_error(e)
+
+
+async def predict(request: HttpRequest, pk: int) -> JsonResponse:
+    """Versão assíncrona de `views.predict`; `views.predict_result` roda no pool de processos."""
+    return await computed_view(request, pk, views.predict, PredictThrottle, "predict", views.predict_result)
+
+
+async def analyze(request: HttpRequest, pk: int) -> JsonResponse:
+    """Versão assíncrona de `views.analyze`; `views.analyze_result` roda no pool de processos."""
+    exact = views.exact_requested(request.GET.get("exact"))
+    return await computed_view(request, pk, views.analyze, AnalyzeThrottle, "analyze", views.analyze_result, exact)
+
+
+# --------------------------------- Stream de leituras --------------------------------- #
+def sse_response(request: HttpRequest, station_id: Optional[int]):
+    """
+    Abre o stream SSE de leituras novas, retomando após o evento de `Last-Event-ID` (cabeçalho enviado
+    pelo `EventSource` ao reconectar, ou o parâmetro `?last_event_id=` na primeira conexão).
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return json_response(errors={"message": "Last-Event-ID deve ser o ID numérico de um evento."}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(live.event_stream(station_id, last_event_id), content_type="text/event-stream")
+    response['Cache-Control'] = 'no-cache'
+    # Desativa o buffer de proxies (nginx), que atrasaria os eventos
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def station_stream(request: HttpRequest, pk: int):
+    """Stream (Server-Sent Events) das leituras novas de uma estação, publicadas pelo importador."""
+    if request.method != "GET":
+        return json_response(errors={"message": f"Método {request.method} não permitido."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not await authenticate(request):
+        return unauthorized()
+
+    try:
+        if not await Station.objects.filter(pk=pk).aexists():
+            return not_found()
+        return sse_response(request, pk)
+    except Exception as e:
+        return server_error(e)
+
+
+async def stations_stream(request: HttpRequest):
+    """Stream (Server-Sent Events) das leituras novas de todas as estações."""
+    if request.method != "GET":
+        return json_response(errors={"message": f"Método {request.method} não permitido."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not await authenticate(request):
+        return unauthorized()
+
+    try:
+        return sse_response(request, None)
+    except Exception as e:
+        return server_error(e)
@@ -0,0 +1,307 @@
+"""
+Camada de dados "quentes" das estações.
+
+Mantém, para cada estação, os N registros mais recentes dos campos numéricos em um
+buffer circular NumPy gravado em disco (`<HOT_DATA_DIR>/station_<id>.buf`). Os workers
+abrem esses arquivos com `mmap`, de modo que todos compartilham a mesma cópia das páginas
+através do cache do sistema operacional. Apenas o comando `import_stations` grava os buffers,
+acrescentando as leituras novas de cada importação (`append_readings`); as views só leem deles,
+recorrendo ao banco de dados quando o dado não está disponível.
+
+Os buffers são locais a cada máquina, e a importação pode rodar em qualquer uma delas. Por
+isso, o cabeçalho do arquivo guarda a versão do snapshot da estação usada na montagem
+(`LatestRegistrationData.updated_at`), e cada leitura a compara com a do banco (uma consulta
+pela chave primária): um buffer desatualizado é ignorado e a leitura vai ao banco, até a
+próxima importação da estação na máquina (ou com `HOT_DATA_DIR` compartilhado entre elas).
+
+O NumPy é importado apenas quando um buffer é lido ou gravado.
+"""
+import os
+import struct
+import tempfile
+from pathlib import Path
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import models
+
+from .models import BaseRegistrationData, LatestRegistrationData, RegistrationData
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Campos numéricos (DecimalField) mantidos nos buffers
+HOT_DATA_FIELDS: List[str] = [
+    field.name for field in BaseRegistrationData._meta.get_fields() if isinstance(field, models.DecimalField)
+]
+
+# Cabeçalho do arquivo, antes do array no formato .npy: identificação e versão do snapshot
+HEADER = struct.Struct('<8sq')
+MAGIC = b'HOTDATA1'
+
+
+@lru_cache(maxsize=None)
+def hot_data_dtype() -> "np.dtype":
+    import numpy as np
+    return np.dtype([('DataHora_GMT', 'datetime64[ns]')] + [(field, 'f8') for field in HOT_DATA_FIELDS])
+
+
+# Cache por processo dos arquivos mapeados: caminho -> (identificação do arquivo, versão, array)
+_mapped: Dict[Path, Tuple[Tuple[int, int], int, "np.ndarray"]] = {}
+
+
+def _station_path(station_id: int) -> Path:
+    return Path(settings.HOT_DATA_DIR) / f"station_{int(station_id)}.buf"
+
+
+def source_version(station_id: int) -> Optional[int]:
+    """
+    Versão atual dos dados da estação no banco: o `updated_at` do snapshot, em microssegundos.
+
+    Returns:
+        int | None: A versão, ou None se a estação não tem snapshot (nenhuma leitura importada).
+    """
+    updated_at = (
+        LatestRegistrationData.objects.filter(station_id=station_id)
+        .values_list('updated_at', flat=True)
+        .first()
+    )
+    if updated_at is None:
+        return None
+    return int(updated_at.timestamp() * 1_000_000)
+
+
+class StationRingBuffer:
+    """
+    Buffer circular de tamanho fixo com os registros mais recentes de uma estação.
+
+    Args:
+        capacity (int): Quantidade máxima de registros mantidos.
+    """
+
+    def __init__(self, capacity: int):
+        import numpy as np
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=hot_data_dtype())
+        self.head = 0  # Próxima posição de escrita
+        self.count = 0
+
+    @classmethod
+    def from_array(cls, array: "np.ndarray", capacity: int) -> "StationRingBuffer":
+        ring = cls(capacity)
+        ring.extend(array)
+        return ring
+
+    def append(self, record: Tuple) -> None:
+        self.data[self.head] = record
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, records: Iterable[Tuple]) -> None:
+        import numpy as np
+        records = records if isinstance(records, np.ndarray) else np.array(list(records), dtype=self.data.dtype)
+        if len(records) >= self.capacity:
+            self.data[:] = records[-self.capacity:]
+            self.head, self.count = 0, self.capacity
+            return
+
+        # Até o fim do array e, ao dar a volta, a partir do início
+        first = min(len(records), self.capacity - self.head)
+        self.data[self.head:self.head + first] = records[:first]
+        self.data[:len(records) - first] = records[first:]
+        self.head = (self.head + len(records)) % self.capacity
+        self.count = min(self.count + len(records), self.capacity)
+
+    def to_array(self) -> "np.ndarray":
+        """Retorna os registros em ordem cronológica (do mais antigo ao mais recente)."""
+        import numpy as np
+        if self.count < self.capacity:
+            return self.data[:self.count].copy()
+        return np.concatenate((self.data[self.head:], self.data[:self.head]))
+
+
+def _as_record(values: Dict) -> Tuple:
+    import numpy as np
+    timestamp = values['DataHora_GMT']
+    if timestamp is not None:
+        timestamp = np.datetime64(timestamp.replace(tzinfo=None), 'ns')
+    else:
+        timestamp = np.datetime64('NaT', 'ns')
+
+    return (timestamp, *(np.nan if values[field] is None else float(values[field]) for field in HOT_DATA_FIELDS))
+
+
+def publish(station_id: int, ring: StationRingBuffer, version: int) -> None:
+    """
+    Grava o buffer da estação de forma atômica.
+
+    O arquivo é escrito em um temporário e substituído com `os.replace`; leitores que já
+    mapearam a versão anterior continuam vendo um snapshot consistente.
+
+    Args:
+        station_id (int): O ID da estação.
+        ring (StationRingBuffer): Os registros.
+        version (int): A versão do snapshot usada na montagem (ver `source_version`).
+    """
+    import numpy as np
+    path = _station_path(station_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(HEADER.pack(MAGIC, version))
+            np.save(tmp_file, ring.to_array())
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def refresh_station(station_id: int) -> Optional[int]:
+    """
+    Reconstrói o buffer de uma estação a partir dos registros mais recentes do banco.
+
+    A versão é lida antes dos registros: se o snapshot mudar durante a leitura, o buffer fica
+    com a versão anterior e é reconstruído na próxima consulta.
+
+    Args:
+        station_id (int): O ID da estação.
+
+    Returns:
+        int | None: A versão gravada, ou None se a estação não tem snapshot (o buffer é removido).
+    """
+    version = source_version(station_id)
+    if version is None:
+        invalidate(station_id)
+        return None
+
+    capacity = settings.HOT_DATA_CAPACITY
+    rows = (
+        RegistrationData.objects.filter(station_id=station_id, DataHora_GMT__isnull=False)
+        .order_by('-DataHora_GMT')
+        .values('DataHora_GMT', *HOT_DATA_FIELDS)[:capacity]
+    )
+    ring = StationRingBuffer(capacity)
+    ring.extend(_as_record(row) for row in reversed(list(rows)))
+    publish(station_id, ring, version)
+    return version
+
+
+def append_readings(station_id: int, readings: Iterable[RegistrationData], previous_version: Optional[int]) -> Optional[int]:
+    """
+    Acrescenta ao buffer de uma estação as leituras novas de uma importação, descartando as mais antigas.
+
+    Deve ser chamada depois de o snapshot da estação ser atualizado com as leituras. O buffer só é
+    estendido se tiver sido montado com o snapshot anterior à importação (`previous_version`); um
+    buffer ausente ou mais antigo é reconstruído a partir do banco (`refresh_station`).
+
+    Args:
+        station_id (int): O ID da estação.
+        readings (Iterable[RegistrationData]): As leituras posteriores à última leitura do snapshot anterior.
+        previous_version (int | None): A versão do snapshot antes da importação (ver `source_version`).
+
+    Returns:
+        int | None: A versão gravada, ou None se a estação não tem snapshot (o buffer é removido).
+    """
+    version = source_version(station_id)
+    if version is None:
+        invalidate(station_id)
+        return None
+
+    current = _load(station_id) if previous_version is not None else None
+    if current is None or current[0] != previous_version:
+        return refresh_station(station_id)
+
+    ring = StationRingBuffer.from_array(current[1], settings.HOT_DATA_CAPACITY)
+    readings = sorted((reading for reading in readings if reading.DataHora_GMT), key=lambda reading: reading.DataHora_GMT)
+    ring.extend([
+        _as_record({field: getattr(reading, field) for field in ('DataHora_GMT', *HOT_DATA_FIELDS)})
+        for reading in readings
+    ])
+    publish(station_id, ring, version)
+    return version
+
+
+def invalidate(station_id: int) -> None:
+    """Remove o buffer de uma estação (por exemplo, quando ela é excluída)."""
+    _station_path(station_id).unlink(missing_ok=True)
+    _mapped.pop(_station_path(station_id), None)
+
+
+def _load(station_id: int) -> Optional[Tuple[int, "np.ndarray"]]:
+    """O buffer mapeado da estação e a versão do snapshot gravada nele, ou None se ele não existir."""
+    path = _station_path(station_id)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        _mapped.pop(path, None)
+        return None
+
+    identity = (stat.st_ino, stat.st_mtime_ns)
+    cached = _mapped.get(path)
+    if cached is not None and cached[0] == identity:
+        return cached[1], cached[2]
+
+    import numpy as np
+    with open(path, 'rb') as file:
+        magic, version = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            return None
+        major, _ = np.lib.format.read_magic(file)
+        read_header = np.lib.format.read_array_header_1_0 if major == 1 else np.lib.format.read_array_header_2_0
+        shape, _, dtype = read_header(file)
+        offset = file.tell()
+    # Um arquivo sem registros não pode ser mapeado
+    array = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape) if shape[0] else np.zeros(shape, dtype=dtype)
+    _mapped[path] = (identity, version, array)
+    return version, array
+
+
+def read_recent(station_id: int, last: int) -> Optional["np.ndarray"]:
+    """
+    Lê os `last` registros mais recentes de uma estação a partir do buffer.
+
+    A leitura não grava nada: um buffer ausente ou com versão diferente da do snapshot no banco
+    (por exemplo, depois de uma importação feita em outra máquina) não é usado.
+
+    Args:
+        station_id (int): O ID da estação.
+        last (int): Quantidade de registros desejada.
+
+    Returns:
+        np.ndarray | None: Os registros em ordem cronológica, ou None se o buffer não estiver
+        disponível ou não contiver registros suficientes (nesse caso o chamador deve consultar o banco).
+    """
+    version = source_version(station_id)
+    if version is None:
+        return None
+
+    loaded = _load(station_id)
+    if loaded is None or loaded[0] != version:
+        return None
+
+    array = loaded[1]
+
+    # Um buffer que não está cheio contém todo o histórico da estação
+    if last > len(array) and len(array) >= settings.HOT_DATA_CAPACITY:
+        return None
+
+    return array[-last:] if last < len(array) else array
+
+
+def records_to_dicts(array: "np.ndarray") -> List[Dict]:
+    """Converte registros do buffer para dicionários serializáveis em JSON."""
+    import numpy as np
+    records = []
+    for row in array:
+        timestamp = row['DataHora_GMT']
+        record = {
+            'DataHora_GMT': None if np.isnat(timestamp) else np.datetime_as_string(timestamp, unit='s') + 'Z',
+        }
+        for field in HOT_DATA_FIELDS:
+            value = row[field]
+            record[field] = None if np.isnan(value) else float(value)
+        records.append(record)
+    return records
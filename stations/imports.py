@@ -0,0 +1,210 @@
+"""
+Fila de importação do comando `import_stations`, distribuída entre processos e máquinas.
+
+O comando lista as estações das UFs pedidas no SINDA e enfileira uma tarefa por estação na tabela
+`ImportTask` (`enqueue`); os processos importadores, iniciados em qualquer quantidade de máquinas,
+consomem a fila (`work`):
+
+- cada processo reserva a tarefa pendente mais antiga com `SELECT ... FOR UPDATE SKIP LOCKED`,
+  então dois processos nunca importam a mesma estação ao mesmo tempo;
+- cada gravação da importação (lote apagado, bloco do CSV, snapshot e resumos, modelos de previsão)
+  é feita em uma transação que bloqueia a tarefa e renova a reserva (`guard`); tarefas sem sinal de
+  vida há mais de `IMPORT_LEASE_TIMEOUT` segundos (processo ou máquina encerrados no meio da
+  importação) voltam para a fila, até `IMPORT_MAX_ATTEMPTS` tentativas, assim como as que falharam;
+- um processo que perdeu a reserva (a tarefa voltou para a fila) é avisado na próxima gravação
+  (`LeaseLost`), que é desfeita, e abandona a estação: as gravações de dois processos nunca se
+  misturam;
+- os processos encerram quando não há tarefas pendentes nem em execução em nenhuma máquina.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import workers
+from .models import ImportTask
+
+# Unidades federativas listadas no SINDA (cidades.php?uf=<UF>)
+UFS = (
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+    'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO',
+)
+
+# Recebe o ID da estação, o nome, a cidade e a transação que verifica e renova a reserva
+StationImporter = Callable[[int, str, str, Callable[[], ContextManager[None]]], None]
+
+
+class LeaseLost(Exception):
+    """A reserva da tarefa expirou e ela voltou para a fila (ou foi reservada por outro processo)."""
+
+
+def enqueue(uf: str, stations: List[Dict]) -> int:
+    """
+    Enfileira (ou reenfileira) as estações de uma UF.
+
+    Tarefas em execução com a reserva válida são mantidas; as demais voltam a ficar pendentes, com
+    as tentativas zeradas.
+
+    Args:
+        uf (str): A UF em que as estações foram listadas.
+        stations (list): Dicionários com `station_id`, `station_name` e `city`.
+
+    Returns:
+        int: A quantidade de tarefas enfileiradas.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        running = set(
+            ImportTask.objects.filter(
+                station_id__in=[station['station_id'] for station in stations],
+                status=ImportTask.RUNNING,
+                heartbeat_at__gte=now - timedelta(seconds=settings.IMPORT_LEASE_TIMEOUT),
+            ).values_list('station_id', flat=True)
+        )
+        tasks = [
+            ImportTask(
+                station_id=station['station_id'], uf=uf, station_name=station['station_name'], city=station['city'],
+                status=ImportTask.PENDING, error='', attempts=0, worker='', queued_at=now,
+                started_at=None, heartbeat_at=None, finished_at=None,
+            )
+            for station in stations if station['station_id'] not in running
+        ]
+        ImportTask.objects.bulk_create(
+            tasks,
+            update_conflicts=True,
+            unique_fields=['station_id'],
+            update_fields=[
+                'uf', 'station_name', 'city', 'status', 'error', 'attempts', 'worker',
+                'queued_at', 'started_at', 'heartbeat_at', 'finished_at',
+            ],
+        )
+    return len(tasks)
+
+
+def claim(worker: str) -> Optional[ImportTask]:
+    """Reserva a tarefa pendente mais antiga, ignorando as que outros processos estão reservando."""
+    with transaction.atomic():
+        task = (
+            ImportTask.objects.select_for_update(skip_locked=True)
+            .filter(status=ImportTask.PENDING)
+            .order_by('queued_at', 'id')
+            .first()
+        )
+        if task is None:
+            return None
+
+        task.status = ImportTask.RUNNING
+        task.worker = worker
+        task.attempts += 1
+        task.started_at = task.heartbeat_at = timezone.now()
+        task.save(update_fields=['status', 'worker', 'attempts', 'started_at', 'heartbeat_at'])
+    return task
+
+
+def owned(task: ImportTask):
+    """A tarefa, se ainda estiver reservada pelo processo."""
+    return ImportTask.objects.filter(pk=task.pk, status=ImportTask.RUNNING, worker=task.worker)
+
+
+@contextmanager
+def guard(task: ImportTask) -> Iterator[None]:
+    """
+    Transação para as gravações da importação: bloqueia a tarefa (`SELECT ... FOR UPDATE`) e renova
+    a reserva, ou levanta `LeaseLost` se ela já não pertence ao processo.
+
+    Enquanto a transação estiver aberta, `requeue_stale` espera o commit para avaliar a tarefa, então
+    uma reserva não expira no meio de uma gravação.
+    """
+    with transaction.atomic():
+        if owned(task).select_for_update().first() is None:
+            raise LeaseLost(f"Reserva da estação {task.station_id} perdida")
+        owned(task).update(heartbeat_at=timezone.now())
+        yield
+
+
+def finish(task: ImportTask, error: Optional[Exception] = None) -> None:
+    """
+    Conclui a tarefa. Com `error`, a tarefa volta para a fila enquanto houver tentativas
+    (`IMPORT_MAX_ATTEMPTS`); depois disso, é marcada como falha.
+    """
+    now = timezone.now()
+    if error is None:
+        owned(task).update(status=ImportTask.DONE, error='', finished_at=now)
+    elif task.attempts < settings.IMPORT_MAX_ATTEMPTS:
+        owned(task).update(status=ImportTask.PENDING, error=str(error) or error.__class__.__name__, worker='')
+    else:
+        owned(task).update(status=ImportTask.FAILED, error=str(error) or error.__class__.__name__, finished_at=now)
+
+
+def requeue_stale() -> int:
+    """
+    Devolve à fila as tarefas em execução sem sinal de vida há mais de `IMPORT_LEASE_TIMEOUT`
+    segundos; as que já atingiram `IMPORT_MAX_ATTEMPTS` tentativas são marcadas como falhas.
+
+    Returns:
+        int: A quantidade de tarefas devolvidas à fila.
+    """
+    now = timezone.now()
+    stale = ImportTask.objects.filter(
+        status=ImportTask.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.IMPORT_LEASE_TIMEOUT),
+    )
+    stale.filter(attempts__gte=settings.IMPORT_MAX_ATTEMPTS).update(
+        status=ImportTask.FAILED, error='Reserva expirada', finished_at=now,
+    )
+    return stale.update(status=ImportTask.PENDING, worker='')
+
+
+def work(import_station: StationImporter, poll_interval: Optional[float] = None, stop: Optional[threading.Event] = None) -> int:
+    """
+    Laço de um processo importador: importa as estações da fila até ela se esgotar (sem tarefas
+    pendentes nem em execução) ou até receber SIGTERM/SIGINT (ou `stop` ser definido).
+
+    A estação em andamento é concluída antes de o processo encerrar. Enquanto houver tarefas em
+    execução em outros processos, o laço aguarda `poll_interval` segundos e devolve à fila as que
+    tiverem a reserva expirada.
+
+    Args:
+        import_station (callable): Importa uma estação (ID, nome, cidade e a transação com a reserva verificada).
+        poll_interval (float, optional): Espera entre consultas à fila vazia. Padrão: `IMPORT_POLL_INTERVAL`.
+        stop (threading.Event, optional): Evento que encerra o laço.
+
+    Returns:
+        int: A quantidade de estações importadas.
+    """
+    poll_interval = settings.IMPORT_POLL_INTERVAL if poll_interval is None else poll_interval
+    stop = stop or threading.Event()
+    worker = workers.worker_name()
+
+    def step() -> Optional[bool]:
+        task = claim(worker)
+        if task is None:
+            return None
+
+        try:
+            import_station(task.station_id, task.station_name, task.city, partial(guard, task))
+        except LeaseLost as e:
+            logging.warning(f"{e}: a estação será importada por outro processo")
+            return False
+        except Exception as e:
+            logging.error(f"Erro ao importar a estação {task.station_id}: {e}", exc_info=True)
+            finish(task, e)
+            imported = False
+        else:
+            finish(task)
+            imported = True
+
+        # Pausa entre as estações, para não sobrecarregar o SINDA
+        stop.wait(settings.SINDA_REQUEST_DELAY)
+        return imported
+
+    def idle() -> bool:
+        requeue_stale()
+        return ImportTask.objects.filter(status__in=[ImportTask.PENDING, ImportTask.RUNNING]).exists()
+
+    return workers.run(step, idle, poll_interval, stop)
@@ -0,0 +1,237 @@
+"""
+Jobs assíncronos: `predict` e `analyze` (requisições com `?async=1`) e a exclusão de estações.
+
+A view registra o job na tabela `Job` e responde com 202; os workers do comando `run_workers`
+consultam a tabela, executam os jobs pendentes e gravam o resultado, consultado em
+`/api/jobs/<id>/`. A fila é o próprio banco:
+
+- cada worker reserva o job pendente mais antigo com `SELECT ... FOR UPDATE SKIP LOCKED`, então
+  vários processos (ou máquinas) podem consumir a fila sem disputar o mesmo job;
+- jobs idênticos (mesmo tipo, estação, parâmetros e versão dos dados, obtida do snapshot
+  `LatestRegistrationData`) pendentes ou em execução são compartilhados: uma restrição única
+  parcial em `dedup_key` impede duplicatas mesmo com envios simultâneos;
+- enquanto executa um job, o worker renova o sinal de vida dele a cada `JOB_TIMEOUT / 3` segundos;
+  jobs em execução sem sinal de vida há mais de `JOB_TIMEOUT` segundos (worker encerrado no meio da
+  execução) voltam para a fila, até `JOB_MAX_ATTEMPTS` tentativas;
+- o resultado só é gravado se o job ainda estiver reservado pelo worker: um job devolvido à fila
+  (e talvez já reservado por outro worker) não é sobrescrito;
+- jobs concluídos são apagados após `JOB_RETENTION_HOURS` horas.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from weather_api.metrics import JOB_DURATION, JOB_QUEUE_WAIT
+
+from . import workers
+from .models import Job, LatestRegistrationData
+
+JOB_KINDS = ('predict', 'analyze', 'delete')
+# Jobs de operações restritas aos administradores, visíveis apenas para eles em `/api/jobs/<id>/`
+ADMIN_JOB_KINDS = ('delete',)
+
+
+def async_requested(value: Optional[str]) -> bool:
+    """Verifica o valor do parâmetro `?async`."""
+    return value in ('1', 'true', 'True')
+
+
+def data_version(station_id: int) -> str:
+    """
+    Versão atual dos dados da estação: o momento da última atualização do snapshot, mantido pelo
+    importador a cada ingestão. Estações sem snapshot têm a versão vazia.
+    """
+    updated_at = LatestRegistrationData.objects.filter(station_id=station_id).values_list('updated_at', flat=True).first()
+    return updated_at.isoformat() if updated_at else ''
+
+
+def dedup_key(kind: str, station_id: int, params: Dict[str, Any], version: str) -> str:
+    payload = json.dumps([kind, station_id, params, version], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def submit(kind: str, station_id: int, params: Dict[str, Any]) -> Tuple[Job, bool]:
+    """
+    Registra um job, ou reaproveita um job idêntico pendente ou em execução.
+
+    Args:
+        kind (str): O tipo do job (`predict`, `analyze` ou `delete`).
+        station_id (int): O ID da estação.
+        params (dict): Os parâmetros da requisição.
+
+    Returns:
+        tuple: O job e se ele foi criado (False quando um job em andamento foi reaproveitado).
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Tipo de job desconhecido: {kind}")
+
+    version = data_version(station_id)
+    key = dedup_key(kind, station_id, params, version)
+    in_flight = Job.objects.filter(dedup_key=key, status__in=Job.IN_FLIGHT)
+
+    job = in_flight.first()
+    if job is not None:
+        return job, False
+
+    try:
+        with transaction.atomic():
+            return Job.objects.create(kind=kind, station_id=station_id, params=params, data_version=version, dedup_key=key), True
+    except IntegrityError:
+        # Outro envio idêntico criou o job entre a consulta e a inserção
+        job = in_flight.first()
+        if job is None:
+            raise
+        return job, False
+
+
+# --------------------------------- Worker --------------------------------- #
+def claim(worker: str) -> Optional[Job]:
+    """Reserva o job pendente mais antigo, ignorando os que outros workers estão reservando."""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.PENDING)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = Job.RUNNING
+        job.worker = worker
+        job.attempts += 1
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'worker', 'attempts', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def owned(job: Job):
+    """O job, se ainda estiver em execução pelo worker que o reservou."""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker)
+
+
+def report_progress(job: Job, deleted: int, total: int) -> None:
+    """Grava o progresso de uma exclusão (também renova o sinal de vida do job)."""
+    owned(job).update(progress={'deleted': deleted, 'total': total}, heartbeat_at=timezone.now())
+
+
+def keep_alive(job: Job, done: threading.Event, interval: float) -> None:
+    """
+    Renova o sinal de vida do job a cada `interval` segundos até `done` ser definido (ou o job deixar
+    de pertencer ao worker). Executada em uma thread, com a própria conexão com o banco.
+    """
+    try:
+        while not done.wait(interval):
+            try:
+                if not owned(job).update(heartbeat_at=timezone.now()):
+                    logging.warning(f"O job {job.id} voltou para a fila durante a execução")
+                    return
+            except Exception as e:
+                logging.warning(f"Erro ao renovar o sinal de vida do job {job.id}: {e}")
+    finally:
+        connection.close()
+
+
+def execute(job: Job) -> None:
+    """Executa o job e grava o resultado (ou a falha)."""
+    from . import views
+
+    handlers = {
+        'predict': lambda: views.predict_result(job.station_id, job.params.get('last')),
+        'analyze': lambda: views.analyze_result(job.station_id, job.params.get('last'), job.params.get('exact', False)),
+        'delete': lambda: views.delete_station_result(job.station_id, partial(report_progress, job)),
+    }
+
+    JOB_QUEUE_WAIT.labels(job.kind).observe((job.started_at - job.created_at).total_seconds())
+    started = time.perf_counter()
+    done = threading.Event()
+    heartbeat = threading.Thread(target=keep_alive, args=(job, done, settings.JOB_TIMEOUT / 3), name=f'job-heartbeat-{job.id}', daemon=True)
+    heartbeat.start()
+    try:
+        data, errors, code = handlers[job.kind]()
+        job.result = views.response_body(data, errors)
+        job.result_status = code
+        job.status = Job.DONE
+    except Exception as e:
+        logging.error(f"Erro ao executar o job {job.id}: {e}", exc_info=True)
+        job.error = str(e) or e.__class__.__name__
+        job.status = Job.FAILED
+    finally:
+        done.set()
+        heartbeat.join()
+
+    job.finished_at = timezone.now()
+    saved = owned(job).update(
+        result=job.result, result_status=job.result_status, error=job.error, status=job.status, finished_at=job.finished_at,
+    )
+    if not saved:
+        logging.warning(f"O job {job.id} voltou para a fila durante a execução: o resultado foi descartado")
+    JOB_DURATION.labels(job.kind, job.status).observe(time.perf_counter() - started)
+
+
+def requeue_stale() -> int:
+    """
+    Devolve à fila os jobs em execução sem sinal de vida há mais de `JOB_TIMEOUT` segundos (o worker
+    foi encerrado durante a execução); os que já atingiram `JOB_MAX_ATTEMPTS` tentativas são marcados
+    como falhos.
+
+    Returns:
+        int: A quantidade de jobs devolvidos à fila.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.JOB_TIMEOUT))
+    stale.filter(attempts__gte=settings.JOB_MAX_ATTEMPTS).update(
+        status=Job.FAILED, error='Tempo de execução esgotado', finished_at=now,
+    )
+    return stale.update(status=Job.PENDING, worker='')
+
+
+def purge_finished() -> int:
+    """Apaga os jobs concluídos há mais de `JOB_RETENTION_HOURS` horas."""
+    cutoff = timezone.now() - timedelta(hours=settings.JOB_RETENTION_HOURS)
+    deleted, _ = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(poll_interval: Optional[float] = None, max_jobs: Optional[int] = None, stop: Optional[threading.Event] = None,
+         exit_when_empty: bool = False) -> int:
+    """
+    Laço de um worker: executa os jobs da fila até receber SIGTERM/SIGINT (ou `stop` ser definido).
+
+    O job em execução é concluído antes de o worker encerrar. Com a fila vazia, o worker faz a
+    manutenção (jobs perdidos e expirados) e aguarda `poll_interval` segundos.
+
+    Args:
+        poll_interval (float, optional): Espera entre consultas à fila vazia. Padrão: `JOB_POLL_INTERVAL`.
+        max_jobs (int, optional): Encerra após executar essa quantidade de jobs.
+        stop (threading.Event, optional): Evento que encerra o laço.
+        exit_when_empty (bool): Encerra quando a fila estiver vazia, em vez de aguardar novos jobs.
+
+    Returns:
+        int: A quantidade de jobs executados.
+    """
+    poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+    worker = workers.worker_name()
+
+    def step() -> Optional[bool]:
+        job = claim(worker)
+        if job is None:
+            return None
+        execute(job)
+        return True
+
+    def idle() -> bool:
+        requeue_stale()
+        purge_finished()
+        return not exit_when_empty
+
+    return workers.run(step, idle, poll_interval, stop, max_jobs)
@@ -0,0 +1,298 @@
+"""
+Stream de leituras novas para os clientes (Server-Sent Events).
+
+O importador grava as leituras novas de cada estação na tabela `ReadingEvent` (`publish`) e, no
+PostgreSQL, avisa os servidores com `NOTIFY`. Em cada processo ASGI, um único `Broadcaster`:
+
+- recebe os avisos por uma thread com uma conexão dedicada em `LISTEN` (nos demais bancos, e
+  como garantia contra avisos perdidos, consulta a tabela a cada `STREAM_POLL_INTERVAL` segundos);
+- lê os eventos novos com uma única consulta, qualquer que seja a quantidade de clientes;
+- distribui os eventos às filas dos clientes conectados à estação e ao stream de todas as estações.
+
+O ID de cada evento é enviado no campo `id` do SSE; ao reconectar, o cliente informa o último
+recebido (`Last-Event-ID`) e os eventos seguintes são lidos do banco antes dos novos. Um cliente
+lento demais para a sua fila (`STREAM_QUEUE_SIZE`) também passa a ler do banco até alcançar os demais.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from weather_api.metrics import STREAM_EVENTS, STREAM_SUBSCRIBERS
+
+from .models import ReadingEvent, RegistrationData
+from .serializers import RegistrationDataSerializer
+
+CHANNEL = 'weather_api_readings'
+
+# Chave do pg_advisory_xact_lock que serializa os publicadores
+PUBLISH_LOCK_ID = 0x5EA1
+
+# Intervalo (em milissegundos) de reconexão sugerido aos clientes
+RETRY_MS = 3000
+
+# (id, station_id, leitura)
+Event = Tuple[int, int, dict]
+
+# Marcador enfileirado quando a fila do cliente enche
+OVERFLOW = None
+
+
+# --------------------------------- Publicação --------------------------------- #
+def publish(station_id: int, registrations: List[RegistrationData]) -> int:
+    """
+    Publica as leituras novas de uma estação para os clientes do stream.
+
+    No PostgreSQL, os publicadores são serializados por uma trava de transação: assim os IDs dos
+    eventos ficam visíveis na ordem em que são gerados e nenhum cliente salta um evento.
+
+    Args:
+        station_id (int): O ID da estação.
+        registrations (list): Os registros novos, gravados em `RegistrationData`.
+
+    Returns:
+        int: A quantidade de eventos publicados.
+    """
+    if not registrations:
+        return 0
+
+    registrations = sorted(registrations, key=lambda registration: registration.DataHora_GMT or timezone.now())
+    events = [
+        ReadingEvent(station_id_id=station_id, data=RegistrationDataSerializer(registration).data)
+        for registration in registrations
+    ]
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [PUBLISH_LOCK_ID])
+                ReadingEvent.objects.bulk_create(events)
+                # Entregue aos servidores em LISTEN somente após o commit
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, str(station_id)])
+        else:
+            ReadingEvent.objects.bulk_create(events)
+
+    purge_events()
+    return len(events)
+
+
+def purge_events() -> int:
+    """Apaga os eventos mais antigos que `STREAM_EVENT_RETENTION_HOURS` (fora da janela de retomada)."""
+    cutoff = timezone.now() - timedelta(hours=settings.STREAM_EVENT_RETENTION_HOURS)
+    deleted, _ = ReadingEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+# --------------------------------- Leitura --------------------------------- #
+async def latest_event_id() -> int:
+    latest = await ReadingEvent.objects.order_by('-id').values_list('id', flat=True).afirst()
+    return latest or 0
+
+
+async def events_after(after: int, station_id: Optional[int] = None) -> List[Event]:
+    """Lê até `STREAM_BATCH_SIZE` eventos posteriores a `after` (de uma estação ou de todas)."""
+    events = ReadingEvent.objects.filter(id__gt=after).order_by('id')
+    if station_id is not None:
+        events = events.filter(station_id=station_id)
+    return [event async for event in events.values_list('id', 'station_id', 'data')[:settings.STREAM_BATCH_SIZE]]
+
+
+def format_event(event: Event) -> str:
+    event_id, _, data = event
+    return f"id: {event_id}\nevent: reading\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+# --------------------------------- Distribuição --------------------------------- #
+class Subscriber:
+    """Um cliente conectado: a estação acompanhada (None para todas) e a fila de eventos."""
+
+    def __init__(self, station_id: Optional[int]):
+        self.station_id = station_id
+        # Uma posição extra para o marcador de fila cheia
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_SIZE + 1)
+        self.overflowed = False
+
+    def put(self, event: Event) -> None:
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= settings.STREAM_QUEUE_SIZE:
+            # O cliente não acompanha o ritmo: descarta a fila e lê os eventos do banco
+            self.overflowed = True
+            self.queue.put_nowait(OVERFLOW)
+            return
+        self.queue.put_nowait(event)
+
+    def reset(self) -> None:
+        self.overflowed = False
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class Broadcaster:
+    """Distribui os eventos novos a todos os clientes conectados ao processo."""
+
+    def __init__(self):
+        self.subscribers: Dict[Optional[int], Set[Subscriber]] = defaultdict(set)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.lock: Optional[asyncio.Lock] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cursor = 0  # Último evento distribuído
+        self.listener: Optional[threading.Thread] = None
+
+    async def subscribe(self, station_id: Optional[int]) -> Subscriber:
+        """
+        Registra um cliente. Todo evento posterior a `cursor` no momento do registro é entregue à
+        fila; os anteriores já estão gravados no banco.
+        """
+        await self.start()
+        subscriber = Subscriber(station_id)
+        self.subscribers[station_id].add(subscriber)
+        STREAM_SUBSCRIBERS.inc()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self.subscribers.get(subscriber.station_id)
+        if subscribers is not None and subscriber in subscribers:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[subscriber.station_id]
+            STREAM_SUBSCRIBERS.dec()
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Primeiro uso no event loop do processo
+            self.loop = loop
+            self.lock = asyncio.Lock()
+            self.wakeup = asyncio.Event()
+            self.task = None
+            self.subscribers.clear()
+
+        async with self.lock:
+            if self.task is not None and not self.task.done():
+                return
+            self.cursor = await latest_event_id()
+            self.task = loop.create_task(self.run())
+            if connection.vendor == 'postgresql' and (self.listener is None or not self.listener.is_alive()):
+                self.listener = threading.Thread(target=self.listen, name='stream-listener', daemon=True)
+                self.listener.start()
+
+    def notify(self) -> None:
+        """Acorda a distribuição (chamado pela thread do LISTEN)."""
+        loop, wakeup = self.loop, self.wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=settings.STREAM_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            try:
+                events = await events_after(self.cursor)
+            except Exception as e:
+                logging.error(f"Erro ao ler os eventos do stream: {e}", exc_info=True)
+                continue
+
+            for event in events:
+                self.dispatch(event)
+            if events:
+                self.cursor = events[-1][0]
+            if len(events) == settings.STREAM_BATCH_SIZE:
+                # Há mais eventos pendentes
+                self.wakeup.set()
+
+    def dispatch(self, event: Event) -> None:
+        for station_id in (event[1], None):
+            for subscriber in self.subscribers.get(station_id, ()):
+                subscriber.put(event)
+
+    def listen(self) -> None:
+        """Thread com a conexão em `LISTEN`: a cada `NOTIFY`, acorda a distribuição."""
+        import psycopg2
+
+        params = connections['default'].get_connection_params()
+        if settings.STREAM_LISTEN_HOST:
+            params.update(host=settings.STREAM_LISTEN_HOST, port=settings.STREAM_LISTEN_PORT)
+
+        while True:
+            listener = None
+            try:
+                listener = psycopg2.connect(**params)
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                # Eventos publicados enquanto a conexão estava fora
+                self.notify()
+                while True:
+                    if select.select([listener], [], [], settings.STREAM_HEARTBEAT) == ([], [], []):
+                        continue
+                    listener.poll()
+                    if listener.notifies:
+                        listener.notifies.clear()
+                        self.notify()
+            except Exception as e:
+                logging.error(f"Erro na conexão LISTEN do stream: {e}", exc_info=True)
+                if listener is not None:
+                    listener.close()
+                threading.Event().wait(settings.STREAM_POLL_INTERVAL)
+
+
+broadcaster = Broadcaster()
+
+
+async def event_stream(station_id: Optional[int], last_event_id: Optional[int]) -> AsyncIterator[str]:
+    """
+    Gera o stream SSE de uma estação (ou de todas, com `station_id` None).
+
+    Args:
+        station_id (int | None): A estação acompanhada.
+        last_event_id (int | None): Último evento recebido pelo cliente; sem ele, apenas as
+            leituras publicadas a partir da conexão são enviadas.
+    """
+    subscriber = await broadcaster.subscribe(station_id)
+    sent = broadcaster.cursor if last_event_id is None else last_event_id
+    catch_up = last_event_id is not None
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+
+        while True:
+            if catch_up:
+                # Eventos gravados antes do registro (ou descartados com a fila cheia)
+                subscriber.reset()
+                while True:
+                    events = await events_after(sent, station_id)
+                    for event in events:
+                        yield format_event(event)
+                        sent = event[0]
+                    STREAM_EVENTS.inc(len(events))
+                    if len(events) < settings.STREAM_BATCH_SIZE:
+                        break
+                catch_up = False
+
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=settings.STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Mantém a conexão aberta em proxies que encerram conexões ociosas
+                yield ": keepalive\n\n"
+                continue
+
+            if event is OVERFLOW:
+                catch_up = True
+            elif event[0] > sent:
+                yield format_event(event)
+                sent = event[0]
+                STREAM_EVENTS.inc()
+    finally:
+        broadcaster.unsubscribe(subscriber)
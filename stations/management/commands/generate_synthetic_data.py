@@ -0,0 +1,111 @@
+import io
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from stations import hot_data, sketches
+from stations.models import FieldSketch, LatestRegistrationData, RegistrationData, Station
+from stations.synthetic import station_info, station_readings
+
+# Tamanhos predefinidos: (estações, registros por estação)
+SIZES = {
+    '1k': (5, 200),
+    '100k': (50, 2_000),
+    '10m': (500, 20_000),
+}
+
+# As estações sintéticas usam IDs a partir deste valor, para não se misturarem às importadas do SINDA
+FIRST_STATION_ID = 900_000
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic stations and historical data for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES, default='1k', help='Tamanho predefinido do conjunto de dados')
+        parser.add_argument('--stations', type=int, help='Quantidade de estações (substitui o valor de --size)')
+        parser.add_argument('--rows-per-station', type=int, help='Registros por estação (substitui o valor de --size)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador (mesma semente, mesmos dados)')
+        parser.add_argument('--null-rate', type=float, default=0.03, help='Probabilidade de uma leitura isolada ser nula')
+        parser.add_argument('--gap-rate', type=float, default=0.01, help='Probabilidade de uma falha de transmissão antes de cada registro')
+        parser.add_argument('--chunk-size', type=int, default=100_000, help='Registros gravados por lote')
+
+    def handle(self, *args, **options):  # type: ignore
+        stations, rows_per_station = SIZES[options['size']]
+        stations = options['stations'] or stations
+        rows_per_station = options['rows_per_station'] or rows_per_station
+        rng = np.random.default_rng(options['seed'])
+
+        started = time.perf_counter()
+        self.clear()
+
+        station_ids = list(range(FIRST_STATION_ID, FIRST_STATION_ID + stations))
+        Station.objects.bulk_create([
+            Station(station_id=station_id, **station_info(rng, index)) for index, station_id in enumerate(station_ids)
+        ])
+
+        pending = []
+        pending_rows = 0
+        latest = {}
+        field_sketches = {}
+        for station_id in station_ids:
+            df = station_readings(rng, rows_per_station, options['null_rate'], options['gap_rate'])
+            field_sketches[station_id] = sketches.new()
+            for campo, sketch in field_sketches[station_id].items():
+                sketch.update(df[campo].to_numpy(dtype=float))
+            df.insert(0, 'station_id', station_id)
+            latest[station_id] = df.iloc[-1].to_dict()
+            pending.append(df)
+            pending_rows += len(df)
+            if pending_rows >= options['chunk_size']:
+                self.write(pending)
+                pending, pending_rows = [], 0
+        if pending:
+            self.write(pending)
+
+        # Snapshot do último registro e cache de dados recentes de cada estação
+        for station_id, values in latest.items():
+            values.pop('station_id')
+            LatestRegistrationData.update_from(RegistrationData(station_id_id=station_id, **values))
+            sketches.save(station_id, field_sketches[station_id])
+            hot_data.refresh_station(station_id)
+
+        elapsed = time.perf_counter() - started
+        total = stations * rows_per_station
+        self.stdout.write(self.style.SUCCESS(
+            f'{stations} stations and {total} records generated in {elapsed:.1f}s ({total / elapsed:.0f} records/s)'
+        ))
+
+    def clear(self) -> None:
+        """Remove as estações sintéticas geradas anteriormente."""
+        for station_id in Station.objects.filter(station_id__gte=FIRST_STATION_ID).values_list('station_id', flat=True):
+            hot_data.invalidate(station_id)
+        RegistrationData.objects.filter(station_id__gte=FIRST_STATION_ID).delete()
+        LatestRegistrationData.objects.filter(station_id__gte=FIRST_STATION_ID).delete()
+        FieldSketch.objects.filter(station_id__gte=FIRST_STATION_ID).delete()
+        Station.objects.filter(station_id__gte=FIRST_STATION_ID).delete()
+
+    def write(self, frames) -> None:
+        """Grava um lote de registros: `COPY` no PostgreSQL, `bulk_create` nos demais bancos."""
+        df = pd.concat(frames, ignore_index=True)
+        if connection.vendor == 'postgresql':
+            quote = connection.ops.quote_name
+            columns = [quote(RegistrationData._meta.get_field(name).column) for name in df.columns]
+            buffer = io.StringIO()
+            df.to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY {quote(RegistrationData._meta.db_table)} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)',
+                    buffer,
+                )
+        else:
+            df = df.rename(columns={'station_id': 'station_id_id'}).astype(object)
+            df = df.where(df.notna(), None)
+            RegistrationData.objects.bulk_create(
+                [RegistrationData(**row) for row in df.to_dict('records')], batch_size=5_000,
+            )
+        self.stdout.write(f'{len(df)} records written')
@@ -1,16 +1,49 @@
 from requests import get
-from bs4 import BeautifulSoup
 import pandas as pd
 from pandas import DataFrame
-from time import sleep
-from io import StringIO
+from time import perf_counter
+from itertools import chain
+from functools import partial
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from stations.models import Station, RegistrationData  
+from django.db import transaction
+from stations.models import Station, RegistrationData, LatestRegistrationData
+from stations import analytics, hot_data, imports, live, purge, sinda, sketches, workers
+from weather_api.metrics import IMPORT_ROWS, IMPORT_ROWS_PER_SECOND
 from datetime import datetime
-import numpy as np
 import pytz
 
-station_data = {}
+# Campos de RegistrationData e o trecho do nome da coluna correspondente no CSV do SINDA
+CSV_COLUMNS = {
+    'DataHora_GMT': 'DataHora',
+    'Bateria_volts': 'Bateria',
+    'ContAguaSolo100_m3': 'ContAguaSolo100',
+    'ContAguaSolo200_m3': 'ContAguaSolo200',
+    'ContAguaSolo400_m3': 'ContAguaSolo400',
+    'CorrPSol_logico': 'CorrPSol',
+    'DirVelVentoMax_oNV': 'DirVelVentoMax',
+    'dirVento_oNV': 'dirVento',
+    'NivMare_m': 'NivMare',
+    'hora': 'hora',
+    'NivRegua_m': 'NivRegua',
+    'Pluvio_mm': 'Pluvio',
+    'PressaoAtm_mb': 'PressaoAtm',
+    'RadSolAcum_MJm2': 'RadSolAcum',
+    'RadSolGlob_Wm2': 'RadSolGlob',
+    'TempAr_C': 'TempAr',
+    'TempMax_C': 'TempMax',
+    'TempMin_C': 'TempMin',
+    'TempInt_C': 'TempInt',
+    'TempSolo100_C': 'TempSolo100',
+    'TempSolo200_C': 'TempSolo200',
+    'TempSolo400_C': 'TempSolo400',
+    'UmidInt_pct': 'UmidInt',
+    'UmiRel_pct': 'UmiRel',
+    'VelVento_ms': 'VelVento',
+    'VelVento10m_ms': 'VelVento10m',
+    'VelVentoMax_ms': 'VelVentoMax',
+}
 
 # Função para encontrar a coluna correspondente
 def find_matching_column(df: DataFrame, substring: str):
@@ -57,123 +90,176 @@ def process_historical_data(historical_data: DataFrame):
 
     return extracted_data
 
-def extract_data(url: str):
-    response = get(url)
+# Mapeia os campos de RegistrationData para as colunas presentes no CSV (a partir do cabeçalho)
+def map_csv_columns(df: DataFrame) -> Dict[str, str]:
+    mapping = {field: find_matching_column(df, substring) for field, substring in CSV_COLUMNS.items()}
+    return {field: column for field, column in mapping.items() if column}
 
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        rows = soup.find_all('tr')
-        table_data = []
+# Função para percorrer as linhas de um bloco do CSV como dicionários {campo: texto ou None}
+def chunk_rows(chunk: DataFrame, mapping: Dict[str, str]) -> Iterator[Dict[str, Optional[str]]]:
+    columns = [chunk[column].tolist() for column in mapping.values()]
+    for values in zip(*columns):
+        yield {field: value if isinstance(value, str) else None for field, value in zip(mapping, values)}
 
-        for row in rows[2:]: 
-            cols = row.find_all('td')
-            cols = [col.text.strip() for col in cols]
-            table_data.append(cols)
+# Função para converter uma linha do CSV em um registro (ainda não gravado)
+def build_registration(station: Station, row: Dict[str, Optional[str]]) -> RegistrationData:
+    data_hora = row.pop('DataHora_GMT', None)
+    hora = row.pop('hora', None)
+    return RegistrationData(
+        station_id=station,
+        DataHora_GMT=datetime.strptime(data_hora, "%Y-%m-%d %H:%M:%S").replace(tzinfo=pytz.timezone('GMT')) if data_hora else None,
+        hora=datetime.strptime(hora.split()[-1].strip(), "%H:%M:%S").time() if hora else None,
+        **row,
+    )
 
-        # Converter para DataFrame do pandas
-        df_html = pd.DataFrame(table_data, columns=['ID', 'Estação', 'Municipio'])
+def list_stations(uf: str) -> List[Dict]:
+    """Lista as estações de uma UF no SINDA (ID, nome e cidade)."""
+    response = get(f"{settings.SINDA_BASE_URL}/cidades.php?uf={uf}")
 
-        for index, row in df_html.iterrows(): #type: ignore
-            station_id = int(row['ID'])
-            station_name = row['Estação']
-            city = row['Municipio']
+    if response.status_code != 200:
+        return []
 
-            station_data[station_id] = {
-                'station_name': station_name,
-                'city': city
-            }
+    return sinda.parse_station_list(response.content)
 
-        for station_id in df_html['ID']:
-            print(station_id)
-            url = f"http://sinda.crn.inpe.br/PCD/SITE/novo/site/tabela.php?id={station_id}"
+def import_station(station_id: int, station_name: str, city: str, guard: Callable[[], ContextManager[None]] = transaction.atomic):
+    """
+    Importa o cadastro e o histórico de uma estação.
 
-            print(url)
+    Args:
+        station_id (int): O ID da estação no SINDA.
+        station_name (str): O nome da estação (da lista de estações da UF).
+        city (str): A cidade da estação.
+        guard (callable, optional): Abre a transação de cada gravação (lote apagado, bloco, snapshot,
+            modelos de previsão). Na fila de importação, verifica e renova a reserva da tarefa e
+            levanta `LeaseLost` se ela expirou (`imports.guard`).
+    """
+    print(station_id)
+    url = f"{settings.SINDA_BASE_URL}/tabela.php?id={station_id}"
 
-            response = get(url)
+    print(url)
 
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                table_registration = soup.find_all('table', {'align': 'center'}).__str__()
-                df_registration = pd.read_html(StringIO(table_registration))[0].fillna(value=np.nan)
-                df_registration = df_registration.where(pd.notnull(df_registration), None)
+    response = get(url)
+
+    if response.status_code == 200:
+        metadata = sinda.parse_station_metadata(response.content)
                 
-                print ("DataFrame Empty: ", df_registration.empty)
+        print ("Metadata Empty: ", metadata is None)
 
-                print ('-'*50)
-                if not df_registration.empty:
+        print ('-'*50)
+        if metadata is not None:
                     
-                    proprietario = df_registration.iloc[1, 0]
-                    #estacao = df_registration.iloc[1, 1]
-                    #municipio = df_registration.iloc[1, 2]
-                    uf = df_registration.iloc[1, 3]
-                    latitude = df_registration.iloc[1, 4]
-                    longitude = df_registration.iloc[1, 5]
-                    #altitude = df_registration.iloc[1, 6]
-
-                    Station.objects.update_or_create(
-                        station_id=station_id, 
-                        station_name=station_data[int(station_id)]['station_name'], 
-                        city=station_data[int(station_id)]['city'],
-                        owner=proprietario,
-                        latitude=latitude,
-                        longitude=longitude,
-                        uf=uf
-                    )
+            uf = metadata['uf']
+
+            # O ID identifica a estação; os demais campos são atualizados a cada importação
+            with guard():
+                Station.objects.update_or_create(
+                    station_id=station_id, 
+                    defaults={
+                        'station_name': station_name, 
+                        'city': city,
+                        'owner': metadata['owner'],
+                        'latitude': metadata['latitude'],
+                        'longitude': metadata['longitude'],
+                        'uf': uf,
+                    },
+                )
                 
-                    read_csv_url = f"http://sinda.crn.inpe.br/PCD/SITE/novo/site/dadosCSV.php?id={station_id}"
-
-                    historical_data = pd.read_csv(read_csv_url, sep=',', encoding='utf-8', encoding_errors='ignore')
-
-                    station = Station.objects.get(station_id=station_id)
-
-                    if len(historical_data.columns) > 1 and not historical_data.empty:
-                        #extracted_data = process_historical_data(historical_data)
-
-                        historical_data = historical_data.map(lambda x: None if pd.isna(x) else str(x))
-
-                        # Deletar dados antigos
-                        RegistrationData.objects.filter(station_id=station).delete()
-                        
-                        for index, row in historical_data.iterrows(): #type: ignore
-                            RegistrationData.objects.create(
-                                station_id=station,
-                                DataHora_GMT=datetime.strptime(row.get(find_matching_column(historical_data, 'DataHora'), None), "%Y-%m-%d %H:%M:%S").replace(tzinfo=pytz.timezone('GMT')) if row.get(find_matching_column(historical_data, 'DataHora'), None) else None,
-                                Bateria_volts=row.get(find_matching_column(historical_data, 'Bateria'), None),
-                                ContAguaSolo100_m3=row.get(find_matching_column(historical_data, 'ContAguaSolo100'), None),
-                                ContAguaSolo200_m3=row.get(find_matching_column(historical_data, 'ContAguaSolo200'), None),
-                                ContAguaSolo400_m3=row.get(find_matching_column(historical_data, 'ContAguaSolo400'), None),
-                                CorrPSol_logico=row.get(find_matching_column(historical_data, 'CorrPSol'), None),
-                                DirVelVentoMax_oNV=row.get(find_matching_column(historical_data, 'DirVelVentoMax'), None),
-                                dirVento_oNV=row.get(find_matching_column(historical_data, 'dirVento'), None),
-                                NivMare_m=row.get(find_matching_column(historical_data, 'NivMare'), None),
-                                hora=datetime.strptime(row.get(find_matching_column(historical_data, 'hora'), None).split()[-1].strip(), "%H:%M:%S").time() if row.get(find_matching_column(historical_data, 'hora'), None) else None,
-                                NivRegua_m=row.get(find_matching_column(historical_data, 'NivRegua'), None),
-                                Pluvio_mm=row.get(find_matching_column(historical_data, 'Pluvio'), None),
-                                PressaoAtm_mb=row.get(find_matching_column(historical_data, 'PressaoAtm'), None),
-                                RadSolAcum_MJm2=row.get(find_matching_column(historical_data, 'RadSolAcum'), None),
-                                RadSolGlob_Wm2=row.get(find_matching_column(historical_data, 'RadSolGlob'), None),
-                                TempAr_C=row.get(find_matching_column(historical_data, 'TempAr'), None),
-                                TempMax_C=row.get(find_matching_column(historical_data, 'TempMax'), None),
-                                TempMin_C=row.get(find_matching_column(historical_data, 'TempMin'), None),
-                                TempInt_C=row.get(find_matching_column(historical_data, 'TempInt'), None),
-                                TempSolo100_C=row.get(find_matching_column(historical_data, 'TempSolo100'), None),
-                                TempSolo200_C=row.get(find_matching_column(historical_data, 'TempSolo200'), None),
-                                TempSolo400_C=row.get(find_matching_column(historical_data, 'TempSolo400'), None),
-                                UmidInt_pct=row.get(find_matching_column(historical_data, 'UmidInt'), None),
-                                UmiRel_pct=row.get(find_matching_column(historical_data, 'UmiRel'), None),
-                                VelVento_ms=row.get(find_matching_column(historical_data, 'VelVento'), None),
-                                VelVento10m_ms=row.get(find_matching_column(historical_data, 'VelVento10m'), None),
-                                VelVentoMax_ms=row.get(find_matching_column(historical_data, 'VelVentoMax'), None)
-                            )
-                        
-                    sleep(3)
+            read_csv_url = f"{settings.SINDA_BASE_URL}/dadosCSV.php?id={station_id}"
+
+            # O CSV é lido direto da resposta HTTP em blocos de IMPORT_CHUNK_SIZE linhas: cada bloco é
+            # convertido e gravado antes do próximo, então a memória não cresce com o histórico da estação
+            with get(read_csv_url, stream=True) as csv_response:
+                csv_response.raise_for_status()
+                csv_response.raw.decode_content = True
+                try:
+                    chunks = pd.read_csv(
+                        csv_response.raw, sep=',', encoding='utf-8', encoding_errors='ignore',
+                        dtype=str, chunksize=settings.IMPORT_CHUNK_SIZE,
+                    )
+                    first_chunk = next(chunks, None)
+                except pd.errors.EmptyDataError:
+                    first_chunk = None
+
+                station = Station.objects.get(station_id=station_id)
+
+                if first_chunk is not None and len(first_chunk.columns) > 1 and not first_chunk.empty:
+                    mapping = map_csv_columns(first_chunk)
+
+                    # Leituras posteriores ao último registro conhecido são publicadas no stream
+                    previous_latest = LatestRegistrationData.objects.filter(station_id=station).values_list('DataHora_GMT', flat=True).first()
+                    # Versão do snapshot antes da importação: o cache de dados recentes só é estendido se estiver nela
+                    previous_version = hot_data.source_version(station_id)
+
+                    # Deletar dados antigos (em lotes, sem uma transação única com todo o histórico)
+                    purge.purge_history(station_id, atomic=guard)
+
+                    latest_registration = None
+                    new_registrations = []
+                    field_sketches = sketches.new()
+                    imported_rows = 0
+                    started = perf_counter()
+
+                    for chunk in chain([first_chunk], chunks):
+                        registrations = [build_registration(station, row) for row in chunk_rows(chunk, mapping)]
+                        with guard():
+                            RegistrationData.objects.bulk_create(registrations)
+                        imported_rows += len(registrations)
+                        IMPORT_ROWS.labels(uf).inc(len(registrations))
+
+                        # Atualizar os resumos usados pelo analyze com as leituras do bloco
+                        for campo, sketch in field_sketches.items():
+                            if campo in mapping:
+                                sketch.update(pd.to_numeric(chunk[mapping[campo]], errors='coerce').to_numpy(dtype=float))
+
+                        for registration in registrations:
+                            # Guardar o registro mais recente para o snapshot da estação
+                            if registration.DataHora_GMT and (latest_registration is None or registration.DataHora_GMT >= latest_registration.DataHora_GMT):
+                                latest_registration = registration
+
+                            if previous_latest is not None and registration.DataHora_GMT and registration.DataHora_GMT > previous_latest:
+                                new_registrations.append(registration)
+
+                    # Publicar a vazão da importação desta estação
+                    IMPORT_ROWS_PER_SECOND.labels(uf).set(imported_rows / (perf_counter() - started))
+
+                    # O snapshot e os resumos só são gravados se a reserva ainda for deste processo
+                    with guard():
+                        if latest_registration is not None:
+                            LatestRegistrationData.update_from(latest_registration)
+                        sketches.save(station_id, field_sketches)
+
+                    # Acrescentar as leituras novas ao cache de dados recentes compartilhado pelos workers
+                    hot_data.append_readings(station_id, new_registrations, previous_version)
+
+                    # Enviar as leituras novas aos clientes conectados ao stream
+                    live.publish(station_id, new_registrations)
+
+                    # Estender os modelos de previsão com as leituras novas (as requisições apenas os leem);
+                    # os ajustes correm fora da transação e só a gravação de cada modelo verifica a reserva
+                    analytics.update_forecast_models(station_id, analytics.FORECAST_FIELDS, atomic=guard)
 
 class Command(BaseCommand):
     help = 'Import data from meteorological stations'
 
-    def handle(self, *args, **kwargs): #type: ignore
-        url = 'http://sinda.crn.inpe.br/PCD/SITE/novo/site/cidades.php?uf=RN'
-        extract_data(url)
+    def add_arguments(self, parser):
+        parser.add_argument('--uf', nargs='+', default=['RN'], help='UFs importadas, ou ALL para todas (padrão: RN)')
+        parser.add_argument('--workers', type=int, default=settings.IMPORT_WORKERS, help='Processos importadores nesta máquina (padrão: IMPORT_WORKERS)')
+        parser.add_argument('--no-enqueue', action='store_true', help='Não enfileira estações: apenas ajuda a consumir a fila (outras máquinas)')
+
+    def handle(self, *args, **options):  # type: ignore
+        if not options['no_enqueue']:
+            ufs = imports.UFS if [uf.upper() for uf in options['uf']] == ['ALL'] else [uf.upper() for uf in options['uf']]
+            for uf in ufs:
+                queued = imports.enqueue(uf, list_stations(uf))
+                self.stdout.write(f'{uf}: {queued} stations queued')
+
+        processes = max(options['workers'], 1)
+        if processes == 1:
+            imported = imports.work(import_station)
+            self.stdout.write(self.style.SUCCESS(f'Data imported successfully ({imported} stations)'))
+            return
+
+        # Os importadores são criados por fork e encerram após a estação em andamento
+        self.stdout.write(f'{processes} importers starting')
+        workers.supervise(partial(imports.work, import_station), processes, 'importer')
         self.stdout.write(self.style.SUCCESS('Data imported successfully'))
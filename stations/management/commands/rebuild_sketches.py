@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from stations import sketches
+from stations.models import FieldSketch, Station
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-field sketches used by analyze from the stored history (e.g. for stations imported before them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--station', type=int, nargs='+', help='IDs das estações (padrão: todas)')
+        parser.add_argument('--missing', action='store_true', help='Recria apenas os resumos das estações que não os têm')
+
+    def handle(self, *args, **options):  # type: ignore
+        stations = Station.objects.all()
+        if options['station']:
+            stations = stations.filter(station_id__in=options['station'])
+        station_ids = list(stations.values_list('station_id', flat=True))
+
+        if options['missing']:
+            existing = set(FieldSketch.objects.filter(station_id__in=station_ids).values_list('station_id', flat=True))
+            station_ids = [station_id for station_id in station_ids if station_id not in existing]
+
+        started = time.perf_counter()
+        for station_id in station_ids:
+            sketches.rebuild(station_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Sketches rebuilt for {len(station_ids)} stations in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,41 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from stations import analytics
+from stations.models import ForecastModel, Station
+
+
+class Command(BaseCommand):
+    help = 'Re-estimate the stored forecast models over the full history (run on a schedule, e.g. daily via cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--station', type=int, nargs='+', help='IDs das estações (padrão: todas)')
+        parser.add_argument('--older-than', type=float, default=0, help='Reestima apenas os modelos estimados há mais de N horas')
+
+    def handle(self, *args, **options):  # type: ignore
+        stations = Station.objects.all()
+        if options['station']:
+            stations = stations.filter(station_id__in=options['station'])
+        station_ids = list(stations.values_list('station_id', flat=True))
+
+        # Modelos estimados recentemente não precisam ser reestimados
+        recent = set()
+        if options['older_than']:
+            cutoff = timezone.now() - timedelta(hours=options['older_than'])
+            recent = set(ForecastModel.objects.filter(station_id__in=station_ids, fitted_at__gte=cutoff).values_list('station_id', 'field'))
+
+        started = time.perf_counter()
+        refitted = 0
+        for station_id in station_ids:
+            for campo in analytics.FORECAST_FIELDS:
+                if (station_id, campo) in recent:
+                    continue
+                analytics.estimate_forecast_model(station_id, campo)
+                refitted += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{refitted} forecast models re-estimated for {len(station_ids)} stations in {time.perf_counter() - started:.1f}s'
+        ))
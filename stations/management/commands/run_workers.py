@@ -0,0 +1,31 @@
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from stations import jobs, workers
+
+
+class Command(BaseCommand):
+    help = 'Run the worker processes that execute the background jobs (?async=1 predict/analyze, station deletion)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOB_WORKERS, help='Processos de worker (padrão: JOB_WORKERS)')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_INTERVAL, help='Espera (segundos) entre consultas à fila vazia')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Encerra cada worker após N jobs (0 = sem limite)')
+        parser.add_argument('--exit-when-empty', action='store_true', help='Encerra os workers quando a fila estiver vazia')
+
+    def handle(self, *args, **options):  # type: ignore
+        work = partial(
+            jobs.work, poll_interval=options['poll_interval'], max_jobs=options['max_jobs'] or None, exit_when_empty=options['exit_when_empty'],
+        )
+        processes = max(options['processes'], 1)
+        if processes == 1:
+            executed = work()
+            self.stdout.write(self.style.SUCCESS(f'{executed} jobs executed'))
+            return
+
+        # Os workers são criados por fork (como os do gunicorn) e encerram após o job em andamento
+        self.stdout.write(f'{processes} job workers starting')
+        workers.supervise(work, processes, 'job-worker')
+        self.stdout.write(self.style.SUCCESS('Job workers stopped'))
@@ -1,4 +1,7 @@
-from django.db import models
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from django.db import models, transaction
 
 class Station(models.Model):
     station_id = models.IntegerField(primary_key=True)
@@ -12,9 +15,35 @@ class Station(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def bulk_upsert(cls, items: List[Dict[str, Any]]) -> Tuple[List[int], List[int]]:
+        """
+        Cria ou atualiza várias estações em uma única transação (INSERT ... ON CONFLICT DO UPDATE).
 
-class RegistrationData(models.Model):
-    station_id = models.ForeignKey(Station, related_name='RegistrationData', on_delete=models.CASCADE)  # Chave estrangeira para Station  
+        Apenas os campos informados em cada item são atualizados nas estações existentes: os itens
+        são agrupados pelo conjunto de campos e cada grupo é gravado com um único `bulk_create`.
+
+        Args:
+            items (list): Os dados validados das estações (com `station_id`).
+
+        Returns:
+            tuple: Os IDs das estações criadas e os das atualizadas.
+        """
+        ids = [item['station_id'] for item in items]
+        groups: Dict[Tuple[str, ...], List["Station"]] = {}
+        for item in items:
+            fields = tuple(sorted(field for field in item if field != 'station_id'))
+            groups.setdefault(fields, []).append(cls(**item))
+
+        with transaction.atomic():
+            existing = set(cls.objects.filter(station_id__in=ids).values_list('station_id', flat=True))
+            for fields, stations in groups.items():
+                cls.objects.bulk_create(stations, update_conflicts=True, unique_fields=['station_id'], update_fields=list(fields))
+
+        return [pk for pk in ids if pk not in existing], [pk for pk in ids if pk in existing]
+
+
+class BaseRegistrationData(models.Model):
     DataHora_GMT = models.DateTimeField(blank=True, null=True)  # Data e hora no formato GMT
     Bateria_volts = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)  # Voltagem da bateria
     ContAguaSolo100_m3 = models.DecimalField(max_digits=10, decimal_places=4, null=True, blank=True)  # Contagem de água no solo com 100 metros cúbicos
@@ -43,6 +72,214 @@ class RegistrationData(models.Model):
     VelVento10m_ms = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)  # Velocidade do vento a 10 metros
     VelVentoMax_ms = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)  # Velocidade máxima do vento
 
+    class Meta:
+        abstract = True
+
+
+class RegistrationData(BaseRegistrationData):
+    station_id = models.ForeignKey(Station, related_name='RegistrationData', on_delete=models.CASCADE)  # Chave estrangeira para Station  
+
     def __str__(self):
         return f"{self.station_id} - {self.DataHora_GMT}"
-    
+
+
+class LatestRegistrationData(BaseRegistrationData):
+    """
+    Último registro conhecido de cada estação (tabela desnormalizada).
+
+    Mantida pelo comando `import_stations` a cada ingestão, permite obter as condições
+    atuais de todas as estações com uma única consulta, sem percorrer o histórico.
+    """
+    station_id = models.OneToOneField(Station, related_name='LatestRegistrationData', primary_key=True, on_delete=models.CASCADE)  # Estação do registro
+    updated_at = models.DateTimeField(auto_now=True)  # Momento da última atualização do snapshot
+
+    @classmethod
+    def update_from(cls, registration: RegistrationData) -> "LatestRegistrationData":
+        """
+        Atualiza (ou cria) o snapshot da estação a partir de um registro histórico.
+
+        Args:
+            registration (RegistrationData): O registro mais recente da estação.
+
+        Returns:
+            LatestRegistrationData: O snapshot atualizado.
+        """
+        values = {
+            field.name: getattr(registration, field.name)
+            for field in BaseRegistrationData._meta.get_fields()
+        }
+        latest, _ = cls.objects.update_or_create(station_id=registration.station_id, defaults=values)
+        return latest
+
+    def __str__(self):
+        return f"{self.station_id} - {self.DataHora_GMT} (último registro)"
+
+
+class ReadingEvent(models.Model):
+    """
+    Leitura nova publicada pelo importador para os clientes do stream (Server-Sent Events).
+
+    O ID é o `id` do evento no stream: os clientes retomam a partir dele com `Last-Event-ID`.
+    Os eventos guardam a leitura serializada (os registros históricos podem ser regravados pelo
+    importador) e são apagados após `STREAM_EVENT_RETENTION_HOURS` horas.
+    """
+    id = models.BigAutoField(primary_key=True)
+    station_id = models.ForeignKey(Station, related_name='ReadingEvents', on_delete=models.CASCADE)  # Estação da leitura
+    data = models.JSONField()  # Leitura no formato de RegistrationDataSerializer
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['station_id', 'id'], name='reading_event_station_idx'),
+            models.Index(fields=['created_at'], name='reading_event_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.station_id_id} - evento {self.id}"
+
+
+class ForecastModel(models.Model):
+    """
+    Estado do modelo de previsão (ARIMA) de um campo de uma estação.
+
+    Guarda os parâmetros estimados e o estado do filtro de Kalman após a última leitura
+    processada (vetor de estado e covariância, em float64). O importador estende o modelo com
+    as leituras novas a partir desse estado, com os parâmetros fixos; a reestimação completa é
+    feita pelo comando `refit_forecasts`, executado periodicamente.
+    """
+    station_id = models.ForeignKey(Station, related_name='ForecastModels', on_delete=models.CASCADE)  # Estação do modelo
+    field = models.CharField(max_length=32)  # Campo previsto (por exemplo, TempAr_C)
+    params = models.BinaryField(null=True)  # Parâmetros estimados
+    state = models.BinaryField(null=True)  # Vetor de estado previsto após a última leitura
+    state_cov = models.BinaryField(null=True)  # Covariância do vetor de estado
+    nobs = models.IntegerField(default=0)  # Leituras processadas pelo modelo
+    last_timestamp = models.DateTimeField(null=True)  # Data da última leitura processada
+    has_missing = models.BooleanField(default=False)  # As últimas leituras processadas têm valores nulos (o campo não é previsto)
+    forecast = models.JSONField(null=True)  # Última previsão calculada
+    fitted_at = models.DateTimeField()  # Momento da última estimação completa
+    updated_at = models.DateTimeField(auto_now=True)  # Momento da última extensão
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['station_id', 'field'], name='unique_forecast_model'),
+        ]
+
+    def __str__(self):
+        return f"{self.station_id_id} - {self.field} (modelo de previsão)"
+
+
+class FieldSketch(models.Model):
+    """
+    Resumo (sketch) das leituras de um campo de uma estação, usado pelo `analyze` sem ler o histórico.
+
+    Mantido pelo importador a cada bloco gravado (ver `stations/sketches.py`): momentos centrais
+    (média e somas das potências 2, 3 e 4 dos desvios), mínimo e máximo, um t-digest para os quantis
+    (médias e pesos dos centróides, em float64) e um histograma de largura fixa para a moda (índices
+    e contagens das classes, em int64, com largura de 10^-casas_decimais * 2^bin_shift).
+    """
+    station_id = models.ForeignKey(Station, related_name='FieldSketches', on_delete=models.CASCADE)  # Estação resumida
+    field = models.CharField(max_length=32)  # Campo resumido (por exemplo, Pluvio_mm)
+    count = models.BigIntegerField(default=0)  # Leituras não nulas
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)  # Soma dos quadrados dos desvios em relação à média
+    m3 = models.FloatField(default=0)  # Soma dos cubos dos desvios
+    m4 = models.FloatField(default=0)  # Soma das quartas potências dos desvios
+    minimum = models.FloatField(null=True)
+    maximum = models.FloatField(null=True)
+    compression = models.IntegerField()  # Compressão do t-digest
+    centroids = models.BinaryField(null=True)  # Médias seguidas dos pesos dos centróides
+    bin_shift = models.IntegerField(default=0)  # Cada classe agrupa 2^bin_shift valores da resolução do campo
+    bins = models.BinaryField(null=True)  # Índices seguidos das contagens das classes
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['station_id', 'field'], name='unique_field_sketch'),
+        ]
+
+    def __str__(self):
+        return f"{self.station_id_id} - {self.field} (resumo)"
+
+
+class Job(models.Model):
+    """
+    Execução assíncrona de `predict` ou `analyze` (requisições com `?async=1`) ou da exclusão de uma
+    estação (`delete`).
+
+    Criado pela view com status `pending` e executado pelos workers do comando `run_workers`, que
+    gravam a resposta completa (o mesmo corpo e código de status da versão síncrona) em `result`.
+    Jobs idênticos (mesmo tipo, estação, parâmetros e versão dos dados) pendentes ou em execução
+    são compartilhados: `dedup_key` é única entre eles.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pendente'), (RUNNING, 'Em execução'), (DONE, 'Concluído'), (FAILED, 'Falhou')]
+    IN_FLIGHT = [PENDING, RUNNING]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=16)  # Operação executada (predict, analyze ou delete)
+    station_id = models.IntegerField()  # Estação consultada
+    params = models.JSONField(default=dict)  # Parâmetros da requisição (por exemplo, {"last": 100})
+    data_version = models.CharField(max_length=64, blank=True)  # Versão dos dados da estação no envio
+    dedup_key = models.CharField(max_length=40)  # Hash de kind, station_id, params e data_version
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    result_status = models.IntegerField(null=True)  # Código de status HTTP do resultado
+    result = models.JSONField(null=True)  # Corpo da resposta (success, data, errors)
+    progress = models.JSONField(null=True)  # Progresso das operações longas (por exemplo, {"deleted": 5000, "total": 80000})
+    error = models.TextField(blank=True)  # Motivo da falha
+    attempts = models.IntegerField(default=0)  # Execuções iniciadas
+    worker = models.CharField(max_length=128, blank=True)  # Worker que executa (ou executou) o job
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    heartbeat_at = models.DateTimeField(null=True)  # Último sinal de vida do worker (início ou progresso)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['dedup_key'], condition=models.Q(status__in=['pending', 'running']), name='unique_inflight_job'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.station_id} ({self.status})"
+
+
+class ImportTask(models.Model):
+    """
+    Estação na fila do comando `import_stations`.
+
+    O comando enfileira uma tarefa por estação listada no SINDA e os processos importadores, em
+    qualquer quantidade de máquinas, reservam as tarefas pendentes (com `SELECT ... FOR UPDATE SKIP
+    LOCKED`) e renovam a reserva a cada bloco importado (`heartbeat_at`). Tarefas sem sinal de vida
+    há mais de `IMPORT_LEASE_TIMEOUT` segundos voltam para a fila.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pendente'), (RUNNING, 'Em execução'), (DONE, 'Concluída'), (FAILED, 'Falhou')]
+
+    station_id = models.IntegerField(unique=True)  # ID da estação no SINDA (a estação pode ainda não existir)
+    uf = models.CharField(max_length=2)  # UF em que a estação foi listada
+    station_name = models.TextField()
+    city = models.TextField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)  # Motivo da última falha
+    attempts = models.IntegerField(default=0)  # Execuções iniciadas desde o enfileiramento
+    worker = models.CharField(max_length=128, blank=True)  # Processo que detém (ou deteve) a reserva
+    queued_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True)
+    heartbeat_at = models.DateTimeField(null=True)  # Último sinal de vida do processo (início ou bloco importado)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'queued_at'], name='import_task_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.uf} {self.station_id} ({self.status})"
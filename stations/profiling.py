@@ -0,0 +1,135 @@
+"""
+Perfilamento sob demanda das views (`?profile=1`, apenas administradores).
+
+Durante a execução da view rodam, ao mesmo tempo, dois perfiladores:
+
+- `cProfile` (determinístico), que gera a tabela das funções com maior tempo acumulado;
+- um amostrador de pilha (`StackSampler`), que registra a pilha da thread da requisição a
+  cada `PROFILE_SAMPLE_INTERVAL` segundos no formato "folded" (uma pilha por linha seguida da
+  quantidade de amostras), aceito por `flamegraph.pl`, speedscope e similares.
+
+Os dois resultados são gravados em `PROFILE_DIR` (`.folded` e `.prof`, este último legível com
+`pstats` ou snakeviz) e um resumo é devolvido junto com a resposta.
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from weather_api.log import request_id
+
+
+def _frame_label(frame: FrameType) -> str:
+    filename = frame.f_code.co_filename
+    for marker in ('site-packages' + os.sep, str(settings.BASE_DIR) + os.sep):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    return f"{filename}:{frame.f_code.co_name}"
+
+
+class StackSampler:
+    """
+    Amostra periodicamente a pilha de uma thread, acumulando as pilhas no formato "folded".
+
+    Args:
+        thread_id (int): A thread a ser amostrada.
+        interval (float): Intervalo entre as amostras, em segundos.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+
+def top_functions(profiler: cProfile.Profile, limit: int) -> List[Dict[str, Any]]:
+    """Retorna as `limit` funções com maior tempo acumulado."""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (primitive_calls, calls, tottime, cumtime, _) in stats.stats.items():  # type: ignore[attr-defined]
+        rows.append({
+            'function': f"{function} ({filename}:{line})" if line else function,
+            'ncalls': calls if calls == primitive_calls else f"{calls}/{primitive_calls}",
+            'tottime': round(tottime, 6),
+            'cumtime': round(cumtime, 6),
+        })
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:limit]
+
+
+def profile_call(name: str, func: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Executa `func` sob os dois perfiladores e grava os resultados em `PROFILE_DIR`.
+
+    Args:
+        name (str): Nome usado nos arquivos gerados (por exemplo, o nome da view).
+        func (Callable): A função a ser executada.
+
+    Returns:
+        tuple: O retorno de `func` e um resumo com a duração, a tabela de funções e os arquivos gerados.
+    """
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+
+    started = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        sampler.stop()
+    elapsed = time.perf_counter() - started
+
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    base_name = f"{datetime.now():%Y%m%d-%H%M%S}-{name}-{request_id.get() or uuid.uuid4().hex}"
+    folded_path = directory / f"{base_name}.folded"
+    pstats_path = directory / f"{base_name}.prof"
+    folded_path.write_text(sampler.folded(), encoding='utf-8')
+    profiler.dump_stats(pstats_path)
+
+    summary = {
+        'duration_ms': round(elapsed * 1000, 1),
+        'samples': sum(sampler.stacks.values()),
+        'top': top_functions(profiler, settings.PROFILE_TOP_N),
+        'files': {'folded': str(folded_path), 'pstats': str(pstats_path)},
+    }
+    return result, summary
+
+
+def profile_requested(value: Optional[str]) -> bool:
+    return value in ('1', 'true', 'True')
@@ -0,0 +1,75 @@
+"""
+Exclusão em lotes do histórico das estações.
+
+Um único `DELETE` com todo o histórico de uma estação (milhões de linhas) mantém uma transação
+longa, com as linhas travadas, um pico de WAL e atraso na réplica, e prende o worker que o
+executa. Aqui as linhas são apagadas em lotes de `PURGE_BATCH_SIZE`, cada um na sua própria
+transação, com SQL direto (sem carregar os objetos) e com o progresso informado a cada lote.
+"""
+from typing import Callable, ContextManager, Optional, Type
+
+from django.conf import settings
+from django.db import connection, models, transaction
+
+from . import hot_data
+from .models import ReadingEvent, RegistrationData, Station
+
+# Recebe a quantidade de linhas apagadas até o momento e o total
+ProgressCallback = Callable[[int, int], None]
+
+
+def delete_in_batches(model: Type[models.Model], station_id: int, progress: Optional[ProgressCallback] = None, batch_size: Optional[int] = None,
+                      atomic: Callable[[], ContextManager[None]] = transaction.atomic) -> int:
+    """
+    Apaga, em lotes, as linhas de `model` ligadas a uma estação.
+
+    Args:
+        model (Model): O modelo com a chave estrangeira `station_id`.
+        station_id (int): O ID da estação.
+        progress (callable, optional): Chamado após cada lote com as linhas apagadas e o total.
+        batch_size (int, optional): Linhas por lote. Padrão: `PURGE_BATCH_SIZE`.
+        atomic (callable, optional): Abre a transação de cada lote. Padrão: `transaction.atomic`.
+
+    Returns:
+        int: A quantidade de linhas apagadas.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    column = connection.ops.quote_name(model._meta.get_field('station_id').column)
+
+    total = model.objects.filter(station_id=station_id).count()
+    deleted = 0
+    while True:
+        with atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {pk} IN (SELECT {pk} FROM {table} WHERE {column} = %s LIMIT %s)",
+                [station_id, batch_size],
+            )
+            count = cursor.rowcount
+        deleted += count
+        if progress is not None:
+            progress(deleted, max(total, deleted))
+        if count < batch_size:
+            return deleted
+
+
+def purge_history(station_id: int, progress: Optional[ProgressCallback] = None,
+                  atomic: Callable[[], ContextManager[None]] = transaction.atomic) -> int:
+    """Apaga o histórico (`RegistrationData`) de uma estação em lotes."""
+    return delete_in_batches(RegistrationData, station_id, progress, atomic=atomic)
+
+
+def delete_station(station_id: int, progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Exclui uma estação: o histórico e os eventos do stream em lotes, depois a estação e os dados
+    restantes (snapshot, modelos de previsão e resumos, uma linha por campo), além do cache de dados recentes.
+
+    Returns:
+        int: A quantidade de registros históricos apagados.
+    """
+    deleted = purge_history(station_id, progress)
+    delete_in_batches(ReadingEvent, station_id)
+    Station.objects.filter(pk=station_id).delete()
+    hot_data.invalidate(station_id)
+    return deleted
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Station, RegistrationData
+from .models import Station, RegistrationData, LatestRegistrationData, Job
 
 class RegistrationDataSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,6 +13,14 @@ class StationSerializer(serializers.ModelSerializer):
         model = Station
         fields = "__all__"
 
+class LatestRegistrationDataSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LatestRegistrationData
+        exclude = ['station_id']
+
+class StationWithLatestSerializer(StationSerializer):
+    latest_data = LatestRegistrationDataSerializer(source='LatestRegistrationData', read_only=True)
+
 class ResponseTemplateSerializer(serializers.Serializer):
     success = serializers.BooleanField(required=False, read_only=True)
     data = serializers.JSONField(required=False, allow_null=True) #type: ignore
@@ -23,5 +31,14 @@ class StationUpdateSerializer(serializers.ModelSerializer):
         model = Station
         fields = ['station_name', 'city', 'owner', 'latitude', 'longitude', 'uf']
 
+class StationBulkSerializer(StationSerializer):
+    # Estações existentes são atualizadas (upsert): o ID não precisa ser inédito
+    station_id = serializers.IntegerField(min_value=-2147483648, max_value=2147483647)
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'station_id', 'params', 'status', 'progress', 'result_status', 'result', 'error', 'attempts', 'created_at', 'started_at', 'finished_at']
+
 
 
@@ -0,0 +1,124 @@
+"""
+Leitura das páginas HTML do SINDA usadas pelo `import_stations`.
+
+- `cidades.php?uf=<UF>`: a lista de estações da UF (ID, nome e município), a partir da 3ª linha;
+- `tabela.php?id=<ID>`: o cadastro da estação, na 2ª linha da primeira tabela centralizada.
+
+As páginas são lidas pelo parser em C do lxml e as células extraídas com uma única consulta XPath
+por página, sem montar a árvore do BeautifulSoup nem converter a tabela de volta em texto para o
+`pd.read_html`. O BeautifulSoup (`html.parser`) continua disponível: é usado com
+`SINDA_HTML_PARSER=bs4`, quando o lxml não está instalado e quando o lxml não consegue ler a página.
+"""
+import re
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from django.conf import settings
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover
+    etree = lxml_html = None
+
+BACKENDS = ('lxml', 'bs4')
+
+# Colunas do cadastro da estação em tabela.php
+METADATA_FIELDS = ('owner', 'station_name', 'city', 'uf', 'latitude', 'longitude', 'altitude')
+
+CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+# Linhas extraídas: todas as linhas (cidades.php) ou as da primeira tabela centralizada (tabela.php)
+XPATHS = {
+    'stations': '//tr',
+    'metadata': '(//table[@align="center"])[1]//tr',
+}
+CELLS = ('td', 'th')
+
+# Consultas compiladas uma única vez
+if etree is not None:
+    COMPILED_XPATHS = {rows: etree.XPath(xpath) for rows, xpath in XPATHS.items()}
+
+
+def decode(content: bytes) -> str:
+    """
+    Decodifica a página com o charset declarado nela (padrão UTF-8; Windows-1252 se o texto não for
+    UTF-8 válido). Sem o charset, o lxml leria os bytes como Latin-1.
+    """
+    match = CHARSET.search(content[:2048])
+    encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return content.decode(encoding)
+    except (LookupError, UnicodeDecodeError):
+        return content.decode('windows-1252', errors='replace')
+
+
+def _cell_text(cell) -> str:
+    # Células sem elementos filhos (quase todas) dispensam o text_content(), bem mais lento
+    return (cell.text or '').strip() if not len(cell) else cell.text_content().strip()
+
+
+def _rows_lxml(content: bytes, rows: str) -> List[List[str]]:
+    document = lxml_html.document_fromstring(decode(content))
+    return [[_cell_text(cell) for cell in row if cell.tag in CELLS] for row in COMPILED_XPATHS[rows](document)]
+
+
+def _rows_bs4(content: bytes, rows: str) -> List[List[str]]:
+    soup = BeautifulSoup(content, 'html.parser')
+    if rows == 'metadata':
+        table = soup.find('table', {'align': 'center'})
+        elements = table.find_all('tr') if table is not None else []
+    else:
+        elements = soup.find_all('tr')
+    return [[cell.text.strip() for cell in row.find_all(CELLS, recursive=False)] for row in elements]
+
+
+def table_rows(content: bytes, rows: str, backend: Optional[str] = None) -> List[List[str]]:
+    """
+    Extrai o texto das células das linhas de uma página.
+
+    Args:
+        content (bytes): O corpo da página.
+        rows (str): As linhas extraídas (`stations` ou `metadata`, ver `XPATHS`).
+        backend (str, optional): `lxml` ou `bs4`. Padrão: `SINDA_HTML_PARSER`.
+
+    Returns:
+        list: Uma lista de células (texto) por linha.
+    """
+    backend = backend or settings.SINDA_HTML_PARSER
+    if backend == 'lxml' and lxml_html is not None:
+        try:
+            return _rows_lxml(content, rows)
+        except (etree.ParserError, ValueError):
+            # Página vazia ou que o lxml não consegue ler
+            pass
+    return _rows_bs4(content, rows)
+
+
+def parse_station_list(content: bytes, backend: Optional[str] = None) -> List[Dict]:
+    """
+    Lê a lista de estações de `cidades.php`.
+
+    Returns:
+        list: Dicionários com `station_id`, `station_name` e `city`.
+    """
+    return [
+        {'station_id': int(cells[0]), 'station_name': cells[1], 'city': cells[2]}
+        for cells in table_rows(content, 'stations', backend)[2:]
+        if len(cells) == 3 and cells[0].isdigit()
+    ]
+
+
+def parse_station_metadata(content: bytes, backend: Optional[str] = None) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Lê o cadastro da estação de `tabela.php`.
+
+    Returns:
+        dict | None: Os campos de `METADATA_FIELDS` (None nas células vazias), ou None se a página
+        não tem o cadastro.
+    """
+    rows = table_rows(content, 'metadata', backend)
+    if len(rows) < 2:
+        return None
+    cells = rows[1] + [''] * (len(METADATA_FIELDS) - len(rows[1]))
+    return {field: value or None for field, value in zip(METADATA_FIELDS, cells)}
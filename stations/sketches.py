@@ -0,0 +1,314 @@
+"""
+Resumos (sketches) das leituras de cada estação, para o `analyze` responder sem ler o histórico.
+
+Para cada estação e campo de `ANALYZE_FIELDS`, a tabela `FieldSketch` guarda três estruturas
+combináveis (dois resumos de partes do histórico formam o resumo do todo), atualizadas pelo
+importador a cada bloco gravado:
+
+- `Moments`: contagem, média e somas das potências 2, 3 e 4 dos desvios, combinadas pelas fórmulas
+  de Welford/Pébay. Variância, desvio padrão, assimetria e curtose saem com as mesmas fórmulas do
+  pandas; a diferença para o cálculo exato é apenas de arredondamento em ponto flutuante. Contagem,
+  mínimo e máximo são exatos.
+- `TDigest`: os quantis (quartis e mediana). O tamanho dos centróides é limitado pela função de
+  escala k1 (`SKETCH_COMPRESSION` = δ): um centróide no quantil q agrupa no máximo cerca de
+  2π·√(q(1−q))/δ das leituras (≈0,6% na mediana com δ = 500), e os das caudas têm uma única leitura.
+  O erro de cada quantil é informado na resposta (`erro_rank_quantis`): metade do peso do centróide
+  que contém o quantil, como fração das leituras. Em campos com muitas leituras repetidas (valores
+  discretos), o valor estimado pode ainda cair entre dois valores vizinhos, a menos de um passo da
+  resolução do campo do valor exato. Com até δ leituras, as leituras são mantidas uma a uma e os
+  quantis são os mesmos do pandas.
+- `Histogram`: a moda. As classes têm a largura da resolução do campo (as casas decimais do
+  `DecimalField`): enquanto houver no máximo `SKETCH_MAX_BINS` valores distintos, a moda é exata.
+  Acima disso, as classes vizinhas são agrupadas aos pares (largura dobrada) e a resposta é o centro
+  da classe modal, a até meia largura (`erro_moda`) dos valores dessa classe. Em campos quase
+  contínuos, em que quase todos os valores são distintos, o "valor mais frequente" exato do pandas
+  é arbitrário e a classe modal é a estimativa útil.
+
+Cada resumo ocupa alguns KB e a resposta é calculada em tempo constante, qualquer que seja o
+tamanho do histórico. Estações sem resumos (importadas antes deles) são analisadas com todo o
+histórico; `rebuild_sketches` cria os resumos a partir do banco.
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .analytics import ANALYZE_FIELDS
+from .models import BaseRegistrationData, FieldSketch, RegistrationData
+
+# Quantis respondidos pelo analyze
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def _empty(dtype) -> np.ndarray:
+    return np.empty(0, dtype=dtype)
+
+
+# --------------------------------- Estruturas --------------------------------- #
+@dataclass
+class Moments:
+    """Contagem, média e somas das potências dos desvios (m2, m3 e m4)."""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    m3: float = 0.0
+    m4: float = 0.0
+
+    @classmethod
+    def of(cls, values: np.ndarray) -> "Moments":
+        if not len(values):
+            return cls()
+        mean = values.mean()
+        deviations = values - mean
+        squares = deviations * deviations
+        return cls(len(values), float(mean), float(squares.sum()), float((squares * deviations).sum()), float((squares * squares).sum()))
+
+    def merge(self, other: "Moments") -> "Moments":
+        """Combina os momentos de duas partes (Pébay, 2008)."""
+        if not other.count:
+            return self
+        if not self.count:
+            return other
+        na, nb = self.count, other.count
+        n = na + nb
+        delta = other.mean - self.mean
+        delta_n = delta / n
+        m2 = self.m2 + other.m2 + delta * delta_n * na * nb
+        m3 = (
+            self.m3 + other.m3 + delta * delta_n * delta_n * na * nb * (na - nb)
+            + 3 * delta_n * (na * other.m2 - nb * self.m2)
+        )
+        m4 = (
+            self.m4 + other.m4 + delta * delta_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+            + 6 * delta_n * delta_n * (na * na * other.m2 + nb * nb * self.m2)
+            + 4 * delta_n * (na * other.m3 - nb * self.m3)
+        )
+        return Moments(n, self.mean + delta_n * nb, m2, m3, m4)
+
+    # Mesmas fórmulas (e casos degenerados) de pandas: var (ddof=1), skew e kurtosis (com correção de viés)
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def skew(self) -> Optional[float]:
+        n = self.count
+        if n < 3:
+            return None
+        if self.m2 == 0:
+            return 0.0
+        return n * (n - 1) ** 0.5 / (n - 2) * (self.m3 / self.m2 ** 1.5)
+
+    def kurtosis(self) -> Optional[float]:
+        n = self.count
+        if n < 4:
+            return None
+        if self.m2 == 0:
+            return 0.0
+        adjustment = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+        return n * (n + 1) * (n - 1) * self.m4 / ((n - 2) * (n - 3) * self.m2 ** 2) - adjustment
+
+
+@dataclass
+class TDigest:
+    """t-digest com a função de escala k1 (centróides em ordem crescente de média)."""
+    compression: int
+    means: np.ndarray = field(default_factory=lambda: _empty(float))
+    weights: np.ndarray = field(default_factory=lambda: _empty(float))
+
+    def update(self, values: np.ndarray) -> None:
+        self.add(values, np.ones(len(values)))
+
+    def merge(self, other: "TDigest") -> None:
+        self.add(other.means, other.weights)
+
+    def add(self, means: np.ndarray, weights: np.ndarray) -> None:
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        if not len(means):
+            return
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        if weights.sum() <= self.compression:
+            # Poucas leituras: mantidas uma a uma (quantis exatos)
+            self.means, self.weights = means, weights
+            return
+
+        # Agrupa os pontos vizinhos cujo quantil central cai no mesmo intervalo unitário de k(q)
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = np.floor(self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: float, minimum: float, maximum: float) -> Tuple[float, float]:
+        """
+        Estima o quantil `q`, com a mesma interpolação linear do pandas quando os centróides são unitários.
+
+        Returns:
+            tuple: O valor e o erro de rank (fração das leituras).
+        """
+        total = self.weights.sum()
+        cumulative = np.cumsum(self.weights)
+        centers = cumulative - self.weights / 2
+        # Posição (em leituras) do quantil: a leitura de ordem i (a partir de 0) está no centro i + 0,5
+        target = q * (total - 1) + 0.5
+        value = np.interp(target, np.r_[0.5, centers, total - 0.5], np.r_[minimum, self.means, maximum])
+        containing = min(int(np.searchsorted(cumulative, target)), len(self.weights) - 1)
+        return float(value), float(self.weights[containing] / 2 / total)
+
+
+@dataclass
+class Histogram:
+    """Histograma esparso de largura fixa: 10^-decimal_places * 2^shift."""
+    decimal_places: int
+    max_bins: int
+    shift: int = 0
+    bins: np.ndarray = field(default_factory=lambda: _empty(np.int64))
+    counts: np.ndarray = field(default_factory=lambda: _empty(np.int64))
+
+    def update(self, values: np.ndarray) -> None:
+        base = np.rint(values * 10 ** self.decimal_places).astype(np.int64)
+        self.add(base >> self.shift, np.ones(len(base), dtype=np.int64), self.shift)
+
+    def merge(self, other: "Histogram") -> None:
+        self.add(other.bins, other.counts, other.shift)
+
+    def add(self, bins: np.ndarray, counts: np.ndarray, shift: int) -> None:
+        # Classes de larguras diferentes são combinadas na maior delas
+        if shift > self.shift:
+            self.bins, self.shift = self.bins >> (shift - self.shift), shift
+        bins = bins >> (self.shift - shift)
+        bins = np.concatenate([self.bins, bins])
+        counts = np.concatenate([self.counts, counts])
+        while True:
+            self.bins, inverse = np.unique(bins, return_inverse=True)
+            self.counts = np.bincount(inverse, weights=counts, minlength=len(self.bins)).astype(np.int64)
+            if len(self.bins) <= self.max_bins:
+                return
+            bins, counts = self.bins >> 1, self.counts
+            self.shift += 1
+
+    def mode(self) -> Tuple[Optional[float], float]:
+        """
+        A moda (o menor valor entre os mais frequentes, como no pandas) e o erro máximo (meia largura).
+        """
+        scale = 10 ** self.decimal_places
+        width = 1 << self.shift
+        error = (width - 1) / 2 / scale
+        if not len(self.bins):
+            return None, error
+        index = int(self.bins[np.argmax(self.counts)])
+        return (index * width + (width - 1) / 2) / scale, error
+
+
+def decimal_places(campo: str) -> int:
+    """Resolução do campo: as casas decimais do `DecimalField` (2 para os demais)."""
+    return getattr(BaseRegistrationData._meta.get_field(campo), 'decimal_places', None) or 2
+
+
+class Sketch:
+    """O resumo das leituras de um campo de uma estação."""
+
+    def __init__(self, campo: str, moments: Moments, digest: TDigest, histogram: Histogram,
+                 minimum: Optional[float] = None, maximum: Optional[float] = None):
+        self.field = campo
+        self.moments = moments
+        self.digest = digest
+        self.histogram = histogram
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @classmethod
+    def empty(cls, campo: str) -> "Sketch":
+        return cls(
+            campo, Moments(), TDigest(settings.SKETCH_COMPRESSION),
+            Histogram(decimal_places(campo), settings.SKETCH_MAX_BINS),
+        )
+
+    @classmethod
+    def from_model(cls, model: FieldSketch) -> "Sketch":
+        centroids = np.frombuffer(bytes(model.centroids or b''), dtype='<f8').reshape(2, -1)
+        bins = np.frombuffer(bytes(model.bins or b''), dtype='<i8').reshape(2, -1)
+        return cls(
+            model.field,
+            Moments(model.count, model.mean, model.m2, model.m3, model.m4),
+            TDigest(model.compression, centroids[0].copy(), centroids[1].copy()),
+            Histogram(decimal_places(model.field), settings.SKETCH_MAX_BINS, model.bin_shift, bins[0].copy(), bins[1].copy()),
+            model.minimum, model.maximum,
+        )
+
+    def update(self, values: np.ndarray) -> None:
+        """Inclui leituras (nulas como NaN, arredondadas à resolução do campo, como no banco)."""
+        values = np.asarray(values, dtype=float)
+        values = np.round(values[~np.isnan(values)], self.histogram.decimal_places)
+        if not len(values):
+            return
+        self.moments = self.moments.merge(Moments.of(values))
+        self.digest.update(values)
+        self.histogram.update(values)
+        low, high = float(values.min()), float(values.max())
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+    def model_fields(self) -> Dict:
+        return {
+            'count': self.moments.count, 'mean': self.moments.mean,
+            'm2': self.moments.m2, 'm3': self.moments.m3, 'm4': self.moments.m4,
+            'minimum': self.minimum, 'maximum': self.maximum,
+            'compression': self.digest.compression,
+            'centroids': np.concatenate([self.digest.means, self.digest.weights]).astype('<f8').tobytes(),
+            'bin_shift': self.histogram.shift,
+            'bins': np.concatenate([self.histogram.bins, self.histogram.counts]).astype('<i8').tobytes(),
+        }
+
+    def quantiles(self) -> Dict[float, Tuple[Optional[float], Optional[float]]]:
+        """Os quantis de `QUANTILES` e o erro de rank de cada um."""
+        if not self.moments.count:
+            return {q: (None, None) for q in QUANTILES}
+        return {q: self.digest.quantile(q, self.minimum, self.maximum) for q in QUANTILES}
+
+
+# --------------------------------- Gravação --------------------------------- #
+def new(campos: Iterable[str] = ANALYZE_FIELDS) -> Dict[str, Sketch]:
+    """Resumos vazios dos campos (para uma estação cujo histórico será gravado do início)."""
+    return {campo: Sketch.empty(campo) for campo in campos}
+
+
+def load(station_id: int, campos: Iterable[str] = ANALYZE_FIELDS) -> Dict[str, Sketch]:
+    """Os resumos gravados de uma estação (apenas os campos que têm resumo)."""
+    return {
+        model.field: Sketch.from_model(model)
+        for model in FieldSketch.objects.filter(station_id=station_id, field__in=list(campos))
+    }
+
+
+def save(station_id: int, sketches: Dict[str, Sketch]) -> None:
+    with transaction.atomic():
+        for campo, sketch in sketches.items():
+            FieldSketch.objects.update_or_create(station_id_id=station_id, field=campo, defaults=sketch.model_fields())
+
+
+def rebuild(station_id: int, campos: List[str] = ANALYZE_FIELDS, chunk_size: int = 50_000) -> Dict[str, Sketch]:
+    """Recria os resumos de uma estação a partir do histórico gravado (lido em blocos)."""
+    sketches = new(campos)
+    rows = RegistrationData.objects.filter(station_id=station_id).values_list(*campos)
+    chunk: List[Tuple] = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _update_from_rows(sketches, campos, chunk)
+            chunk = []
+    _update_from_rows(sketches, campos, chunk)
+    save(station_id, sketches)
+    return sketches
+
+
+def _update_from_rows(sketches: Dict[str, Sketch], campos: List[str], rows: List[Tuple]) -> None:
+    if not rows:
+        return
+    columns = np.array(rows, dtype=object).T
+    for campo, column in zip(campos, columns):
+        sketches[campo].update(np.array([np.nan if value is None else float(value) for value in column], dtype=float))
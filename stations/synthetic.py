@@ -0,0 +1,133 @@
+"""
+Geração de dados sintéticos de estações para benchmarks.
+
+As séries imitam as leituras das PCDs do SINDA: registros horários com falhas de transmissão
+(intervalos sem dados), sensores ausentes em parte das estações (colunas inteiras nulas) e
+leituras nulas isoladas. Os valores seguem ciclos diários e sazonais plausíveis para o Rio
+Grande do Norte. A geração é determinística para uma mesma semente.
+
+Usado pelo comando `generate_synthetic_data` e pelas fixtures do SINDA em `benchmarks/`.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Municípios e área (latitude/longitude) usados para as estações sintéticas
+CITIES: List[str] = ['Natal', 'Mossoró', 'Caicó', 'Currais Novos', 'Macau', 'Pau dos Ferros', 'Apodi', 'Touros', 'Açu', 'Santa Cruz']
+LATITUDE_RANGE = (-6.98, -4.83)
+LONGITUDE_RANGE = (-38.58, -34.97)
+
+# Fração das estações que possuem cada sensor opcional (nas demais a coluna fica nula)
+SENSOR_AVAILABILITY: Dict[str, float] = {
+    'ContAguaSolo100_m3': 0.3,
+    'ContAguaSolo200_m3': 0.3,
+    'ContAguaSolo400_m3': 0.3,
+    'TempSolo100_C': 0.3,
+    'TempSolo200_C': 0.3,
+    'TempSolo400_C': 0.3,
+    'NivMare_m': 0.1,
+    'NivRegua_m': 0.4,
+    'VelVento10m_ms': 0.5,
+    'RadSolAcum_MJm2': 0.6,
+    'RadSolGlob_Wm2': 0.6,
+}
+
+# Sensores principais, sem leituras nulas isoladas (presentes em todas as estações, como no SINDA)
+CORE_SENSORS: List[str] = ['Bateria_volts', 'CorrPSol_logico', 'Pluvio_mm', 'TempAr_C', 'UmiRel_pct']
+
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def station_info(rng: np.random.Generator, index: int) -> Dict[str, str]:
+    """Dados cadastrais de uma estação sintética."""
+    return {
+        'station_name': f"PCD Sintética {index:05d}",
+        'city': CITIES[index % len(CITIES)],
+        'owner': 'Benchmark',
+        'latitude': f"{rng.uniform(*LATITUDE_RANGE):.4f}",
+        'longitude': f"{rng.uniform(*LONGITUDE_RANGE):.4f}",
+        'uf': 'RN',
+    }
+
+
+def station_readings(rng: np.random.Generator, rows: int, null_rate: float = 0.03, gap_rate: float = 0.01) -> pd.DataFrame:
+    """
+    Gera as leituras de uma estação em ordem cronológica.
+
+    Args:
+        rng (Generator): Gerador de números aleatórios (determina a série).
+        rows (int): Quantidade de registros.
+        null_rate (float): Probabilidade de cada leitura isolada ser nula.
+        gap_rate (float): Probabilidade de uma falha de transmissão (de 1 a 72 horas) antes de cada registro.
+
+    Returns:
+        DataFrame: Uma coluna por campo de `BaseRegistrationData`.
+    """
+    steps = np.ones(rows)
+    gaps = rng.random(rows) < gap_rate
+    steps[gaps] += rng.integers(1, 72, gaps.sum())
+    hours = np.cumsum(steps) - steps[0] + rng.integers(0, 24 * 365)
+
+    timestamps = pd.to_datetime(START) + pd.to_timedelta(hours, unit='h')
+    hour_of_day = timestamps.hour.to_numpy()
+    day_of_year = timestamps.dayofyear.to_numpy()
+    daylight = np.clip(np.sin(2 * np.pi * (hour_of_day - 6) / 24), 0, None)
+    diurnal = np.sin(2 * np.pi * (hour_of_day - 9) / 24)
+    seasonal = np.cos(2 * np.pi * (day_of_year - 30) / 365)
+
+    temperature = 26 + 4 * diurnal + 1.5 * seasonal + rng.normal(0, 0.7, rows)
+    raining = rng.random(rows) < 0.06 * (1.5 + seasonal)
+    rain = np.where(raining, rng.gamma(1.2, 3.0, rows), 0.0)
+    wind = rng.gamma(2.0, 2.0, rows)
+    soil_moisture = 0.25 + 0.05 * seasonal + rng.normal(0, 0.01, rows)
+
+    data = {
+        'DataHora_GMT': timestamps,
+        'Bateria_volts': 12.6 + 0.8 * daylight + rng.normal(0, 0.05, rows),
+        'ContAguaSolo100_m3': soil_moisture,
+        'ContAguaSolo200_m3': soil_moisture + 0.02,
+        'ContAguaSolo400_m3': soil_moisture + 0.04,
+        'CorrPSol_logico': daylight > 0.1,
+        'DirVelVentoMax_oNV': np.round(rng.uniform(0, 360, rows)).astype(int).astype(str),
+        'dirVento_oNV': np.round(rng.uniform(0, 360, rows)).astype(int).astype(str),
+        'NivMare_m': 1.3 + 1.1 * np.sin(2 * np.pi * hours / 12.42) + rng.normal(0, 0.05, rows),
+        'hora': timestamps.time,
+        'NivRegua_m': 1.5 + np.cumsum(rng.normal(0, 0.01, rows)),
+        'Pluvio_mm': rain,
+        # numeric(5, 2): valores típicos de uma estação a ~250 m de altitude
+        'PressaoAtm_mb': 985 - 1.5 * diurnal + rng.normal(0, 0.8, rows),
+        'RadSolAcum_MJm2': np.cumsum(daylight * 0.9) % 25,
+        'RadSolGlob_Wm2': 950 * daylight * rng.uniform(0.6, 1.0, rows),
+        'TempAr_C': temperature,
+        'TempMax_C': temperature + rng.uniform(0, 1.5, rows),
+        'TempMin_C': temperature - rng.uniform(0, 1.5, rows),
+        'TempInt_C': temperature + 6 * daylight + rng.normal(0, 0.5, rows),
+        'TempSolo100_C': 27 + 2 * diurnal + rng.normal(0, 0.3, rows),
+        'TempSolo200_C': 27 + 1 * diurnal + rng.normal(0, 0.2, rows),
+        'TempSolo400_C': 27 + 0.3 * seasonal + rng.normal(0, 0.1, rows),
+        'UmidInt_pct': np.clip(40 - 8 * daylight + rng.normal(0, 2, rows), 0, 100),
+        'UmiRel_pct': np.clip(75 - 3 * (temperature - 26) + 10 * raining + rng.normal(0, 3, rows), 0, 100),
+        'VelVento_ms': wind,
+        'VelVento10m_ms': wind * 1.2,
+        'VelVentoMax_ms': wind * rng.uniform(1.2, 2.0, rows),
+    }
+    df = pd.DataFrame(data)
+
+    # Casas decimais das colunas do modelo
+    four_places = ['ContAguaSolo100_m3', 'ContAguaSolo200_m3', 'ContAguaSolo400_m3', 'NivMare_m', 'NivRegua_m']
+    two_places = [column for column in df.columns if df[column].dtype == float and column not in four_places]
+    df[four_places] = df[four_places].round(4)
+    df[two_places] = df[two_places].round(2)
+
+    # Sensores que a estação não possui
+    for column, availability in SENSOR_AVAILABILITY.items():
+        if rng.random() >= availability:
+            df[column] = None
+
+    # Leituras nulas isoladas (exceto a data e os sensores principais)
+    df = df.astype({column: object for column in df.columns if column != 'DataHora_GMT'})
+    for column in df.columns.drop(['DataHora_GMT', *CORE_SENSORS]):
+        df.loc[rng.random(rows) < null_rate, column] = None
+    return df
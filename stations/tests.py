@@ -0,0 +1,200 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import jobs, sketches
+from .models import FieldSketch, Job, Station
+
+
+@override_settings(JOB_TIMEOUT=60, JOB_MAX_ATTEMPTS=2)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        Station.objects.create(station_id=1, station_name='Estação', city='Natal')
+
+    def expire(self, job):
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+
+    def test_identical_jobs_are_shared(self):
+        job, created = jobs.submit('analyze', 1, {'last': 10})
+        same, created_again = jobs.submit('analyze', 1, {'last': 10})
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(same.pk, job.pk)
+
+    def test_claim_expire_requeue_round_trip(self):
+        job, _ = jobs.submit('analyze', 1, {'last': 10})
+
+        first = jobs.claim('w1')
+        self.assertEqual((first.pk, first.status, first.worker, first.attempts), (job.pk, Job.RUNNING, 'w1', 1))
+        self.assertIsNone(jobs.claim('w2'))
+
+        # Com a reserva válida, o job continua com o worker
+        self.assertEqual(jobs.requeue_stale(), 0)
+        self.expire(first)
+        self.assertEqual(jobs.requeue_stale(), 1)
+
+        second = jobs.claim('w2')
+        self.assertEqual((second.pk, second.worker, second.attempts), (job.pk, 'w2', 2))
+
+        # O worker que perdeu a reserva não grava o resultado
+        jobs.execute(first)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.result), (Job.RUNNING, 'w2', None))
+
+        jobs.execute(second)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        # A estação não tem leituras: o resultado é o 404 que a requisição síncrona responderia
+        self.assertEqual(job.result_status, 404)
+        self.assertFalse(job.result['success'])
+
+    def test_stale_job_fails_after_max_attempts(self):
+        job, _ = jobs.submit('analyze', 1, {'last': 10})
+        for _ in range(2):
+            self.expire(jobs.claim('w1'))
+            jobs.requeue_stale()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNone(jobs.claim('w1'))
+
+    def test_delete_jobs_are_visible_only_to_admins(self):
+        job, _ = jobs.submit('delete', 1, {})
+        url = reverse('job-detail', args=[job.pk])
+        client = APIClient()
+
+        client.force_authenticate(User.objects.create_user('usuario', password='senha'))
+        self.assertEqual(client.get(url).status_code, 404)
+
+        client.force_authenticate(User.objects.create_user('admin', password='senha', is_staff=True))
+        self.assertEqual(client.get(url).status_code, 200)
+
+
+class StationsBulkTests(TestCase):
+    def setUp(self):
+        Station.objects.create(station_id=1, station_name='Estação 1', city='Natal', owner='EMPARN', uf='RN')
+        self.url = reverse('stations-bulk')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='senha', is_staff=True))
+
+    def test_creates_new_and_updates_existing_stations(self):
+        response = self.client.post(self.url, [
+            {'station_id': 1, 'station_name': 'Estação 1 (nova)', 'city': 'Natal', 'latitude': '-5.79'},
+            {'station_id': 2, 'station_name': 'Estação 2', 'city': 'Mossoró'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['data']['created'], response.data['data']['updated']), ([2], [1]))
+
+        # Apenas os campos informados são atualizados
+        updated = Station.objects.get(pk=1)
+        self.assertEqual((updated.station_name, updated.latitude), ('Estação 1 (nova)', '-5.79'))
+        self.assertEqual((updated.owner, updated.uf), ('EMPARN', 'RN'))
+        self.assertEqual(Station.objects.get(pk=2).city, 'Mossoró')
+
+    def test_invalid_items_are_reported_and_nothing_is_written(self):
+        response = self.client.post(self.url, [
+            {'station_id': 2, 'station_name': 'Estação 2', 'city': 'Mossoró'},
+            {'station_id': 3, 'city': 'Caicó', 'uf': 'RNN'},
+            {'station_id': 1, 'station_name': 'Estação 1 (nova)', 'city': 'Natal'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        items = response.data['errors']['items']
+        self.assertEqual([(item['index'], item['station_id']) for item in items], [(1, 3)])
+        self.assertEqual(set(items[0]['errors']), {'station_name', 'uf'})
+        self.assertFalse(Station.objects.filter(pk=2).exists())
+        self.assertEqual(Station.objects.get(pk=1).station_name, 'Estação 1')
+
+    def test_repeated_ids_are_rejected(self):
+        response = self.client.post(self.url, [
+            {'station_id': 2, 'station_name': 'Estação 2', 'city': 'Mossoró'},
+            {'station_id': 2, 'station_name': 'Estação 2', 'city': 'Caicó'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors']['items'], [
+            {'index': 1, 'station_id': 2, 'errors': {'station_id': ['ID repetido na requisição.']}},
+        ])
+        self.assertFalse(Station.objects.filter(pk=2).exists())
+
+    def test_body_must_be_a_non_empty_list(self):
+        for body in ([], {'station_id': 2, 'station_name': 'Estação 2', 'city': 'Mossoró'}):
+            self.assertEqual(self.client.post(self.url, body, format='json').status_code, 400)
+
+    def test_only_admins_can_write(self):
+        self.client.force_authenticate(User.objects.create_user('usuario', password='senha'))
+        response = self.client.post(self.url, [{'station_id': 2, 'station_name': 'Estação 2', 'city': 'Mossoró'}], format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Station.objects.filter(pk=2).exists())
+
+
+class SketchTests(TestCase):
+    values = [0.0, 1.2, np.nan, 0.0, 3.4, 12.8, 0.2, 0.0, 5.5, 1.2, np.nan, 27.1, 0.0, 0.4, 1.2, 8.0]
+
+    def sketch(self, *parts):
+        sketch = sketches.Sketch.empty('Pluvio_mm')
+        for part in parts:
+            sketch.update(np.array(part))
+        return sketch
+
+    def assertMatchesPandas(self, sketch, series):
+        series = series.dropna()
+        moments = sketch.moments
+        self.assertEqual(moments.count, series.count())
+        self.assertAlmostEqual(moments.mean, series.mean())
+        self.assertAlmostEqual(moments.variance(), series.var())
+        self.assertAlmostEqual(moments.skew(), series.skew())
+        self.assertAlmostEqual(moments.kurtosis(), series.kurt())
+        self.assertEqual((sketch.minimum, sketch.maximum), (series.min(), series.max()))
+        for q, (value, error) in sketch.quantiles().items():
+            self.assertAlmostEqual(value, series.quantile(q))
+            # Com até SKETCH_COMPRESSION leituras, os centróides são unitários
+            self.assertEqual(error, 0.5 / series.count())
+        self.assertEqual(sketch.histogram.mode(), (series.mode().iloc[0], 0.0))
+
+    def test_small_series_matches_pandas(self):
+        self.assertMatchesPandas(self.sketch(self.values), pd.Series(self.values))
+
+    def test_merged_parts_match_the_whole(self):
+        # Cada bloco do importador atualiza o resumo: o resultado não depende da divisão
+        self.assertMatchesPandas(self.sketch(self.values[:5], self.values[5:11], self.values[11:]), pd.Series(self.values))
+
+    def test_round_trip_through_model(self):
+        sketch = self.sketch(self.values)
+        loaded = sketches.Sketch.from_model(FieldSketch(field='Pluvio_mm', **sketch.model_fields()))
+        self.assertMatchesPandas(loaded, pd.Series(self.values))
+
+    def test_empty_sketch(self):
+        sketch = self.sketch([np.nan])
+        self.assertEqual(sketch.moments.count, 0)
+        self.assertIsNone(sketch.moments.variance())
+        self.assertEqual(sketch.quantiles(), {q: (None, None) for q in sketches.QUANTILES})
+        self.assertEqual(sketch.histogram.mode(), (None, 0.0))
+
+    @override_settings(SKETCH_COMPRESSION=50, SKETCH_MAX_BINS=64)
+    def test_large_series_stays_within_reported_errors(self):
+        rng = np.random.default_rng(0)
+        series = pd.Series(np.round(rng.gamma(2.0, 3.0, 5000), 2))
+        sketch = self.sketch(*np.array_split(series.to_numpy(), 7))
+
+        self.assertLessEqual(len(sketch.digest.means), 100)
+        self.assertAlmostEqual(sketch.moments.mean, series.mean())
+        self.assertAlmostEqual(sketch.moments.variance(), series.var())
+        for q, (value, error) in sketch.quantiles().items():
+            # O rank do valor estimado fica a até `error` (mais um passo da resolução) do quantil pedido
+            rank = (series <= value).mean()
+            self.assertLessEqual(abs(rank - q), error + 1 / len(series))
+
+        # A classe modal contém a moda das classes de mesma largura calculada pelo pandas
+        shift = sketch.histogram.shift
+        self.assertGreater(shift, 0)
+        classes = pd.Series(np.rint(series.to_numpy() * 100).astype(np.int64) >> shift)
+        mode, error = sketch.histogram.mode()
+        self.assertLessEqual(abs(mode * 100 - (classes.mode().iloc[0] << shift)), 2 * error * 100 + 1e-6)
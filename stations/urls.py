@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     stations,
@@ -7,14 +8,39 @@ from .views import (
     analyze,
     predict,
     station_create,
+    stations_bulk,
+    admission_status,
+    job_detail,
 )
 
+# Sob ASGI, os endpoints de leitura são servidos pelas versões assíncronas
+if settings.ASYNC_VIEWS:
+    from .async_views import (  # noqa: F811
+        stations,
+        stations_by_id,
+        historical_data_by_id,
+        analyze,
+        predict,
+        station_stream,
+        stations_stream,
+    )
+
 urlpatterns = [
     path("stations/", stations, name="stations"),
     path("stations/create/", station_create, name="station-create"),
+    path("stations/bulk/", stations_bulk, name="stations-bulk"),
     path("stations/<int:pk>/", stations_by_id, name="stations-by-id"),
     path("stations/historical", historical_data, name="historical-data"),
     path("stations/<int:pk>/historical/", historical_data_by_id, name="historical-data-by-id"),
     path("stations/<int:pk>/analyze/", analyze, name="analyze"),
     path("stations/<int:pk>/predict/", predict, name="predict"),
+    path("admission/", admission_status, name="admission-status"),
+    path("jobs/<uuid:job_id>/", job_detail, name="job-detail"),
 ]
+
+# O stream de leituras mantém a conexão aberta: disponível apenas nas views assíncronas
+if settings.ASYNC_VIEWS:
+    urlpatterns += [
+        path("stations/stream/", stations_stream, name="stations-stream"),
+        path("stations/<int:pk>/stream/", station_stream, name="station-stream"),
+    ]
@@ -1,26 +1,19 @@
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.response import Response
-from .models import Station, RegistrationData
-from .serializers import StationSerializer, RegistrationDataSerializer, StationUpdateSerializer
-from typing import Optional, Dict, Any, List
-import pandas as pd
-import statsmodels.api as sm
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from .models import Station, RegistrationData, Job
+from .serializers import StationSerializer, StationWithLatestSerializer, RegistrationDataSerializer, StationUpdateSerializer, StationBulkSerializer, JobSerializer
+from typing import Optional, Dict, Any, List, Tuple
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
+from django.conf import settings
 from django.http import HttpRequest
+from django.urls import reverse
 from users.models import User
-from warnings import filterwarnings
-from statsmodels.tools.sm_exceptions import ConvergenceWarning
-from statsmodels.tools.sm_exceptions import ValueWarning
+from . import analytics, jobs, profiling, purge
+from .admission import AdmissionRejected, AnalyzeThrottle, PredictThrottle, admission_slot, admission_stats
+from functools import wraps
 import logging
 
-# ---------------------------- Suprimir avisos específicos ---------------------------- #
-
-filterwarnings("ignore", category=UserWarning, module="statsmodels")
-filterwarnings("ignore", category=FutureWarning, module="statsmodels")
-filterwarnings("ignore", category=ValueWarning, module="statsmodels")
-filterwarnings("ignore", category=ConvergenceWarning, module="statsmodels")
-
 # --------------------------------- Funções auxiliares --------------------------------- #
 def is_user_admin(user: User) -> bool:
     """
@@ -56,14 +49,174 @@ def response_template(data: List[Dict[str, Any]] = None, errors: Dict[str, Any]=
     Returns:
         Response: Uma instância de Response do Django REST Framework contendo os dados ou erros formatados com o código de status HTTP
     """
-    response_data = {
-        'success': errors is None,#type: ignore
-        'data': data if errors is None else [], #type: ignore
-        'errors': errors if errors is not None else False, #type: ignore
+    return Response(response_body(data, errors), status=status)
+
+
+def response_body(data: Any = None, errors: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Monta o corpo padronizado das respostas (usado também no resultado dos jobs assíncronos).
+
+    Args:
+        data (Any, optional): Dados da resposta.
+        errors (dict, optional): Mensagens de erro; quando informadas, a resposta não é bem-sucedida.
+
+    Returns:
+        dict: Os campos `success`, `data` e `errors`.
+    """
+    return {
+        'success': errors is None,
+        'data': data if errors is None else [],
+        'errors': errors if errors is not None else False,
     }
 
-    
-    return Response(response_data, status=status)
+
+def get_last_param(request: HttpRequest) -> Optional[int]:
+    """
+    Lê o parâmetro `?last=N`, que limita a consulta aos N registros mais recentes da estação.
+
+    Args:
+        request (HttpRequest): O objeto de requisição HTTP (do Django ou do DRF; usado também pelas
+            views assíncronas).
+
+    Returns:
+        int | None: O valor de N, ou None se o parâmetro não foi informado.
+
+    Raises:
+        ValueError: Se o valor não for um inteiro positivo.
+    """
+    last = request.GET.get("last")
+    if last is None:
+        return None
+    last = int(last)
+    if last <= 0:
+        raise ValueError("last deve ser um inteiro positivo")
+    return last
+
+
+def exact_requested(value: Optional[str]) -> bool:
+    """Verifica o valor do parâmetro `?exact` (análise com todo o histórico, sem os resumos)."""
+    return value in ('1', 'true', 'True')
+
+
+def limit_concurrency(scope: str):
+    """
+    Limita a quantidade de execuções simultâneas de uma view entre todos os workers.
+
+    Quando todos os slots do escopo estão ocupados, a requisição aguarda na fila; se a fila 
+    estiver cheia ou a espera se esgotar, responde imediatamente com 503 e o cabeçalho `Retry-After`.
+
+    Args:
+        scope (str): O escopo configurado em `settings.ADMISSION_CONTROL`.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> Optional[Response]:
+            try:
+                with admission_slot(scope):
+                    return view(request, *args, **kwargs)
+            except AdmissionRejected as e:
+                response = response_template(errors={"message": f"Servidor ocupado ({e.reason}). Tente novamente em alguns segundos."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                response['Retry-After'] = str(e.retry_after)
+                return response
+        return wrapper
+    return decorator
+
+
+def profile_if_requested(view):
+    """
+    Executa a view sob os perfiladores de `profiling` quando um administrador envia `?profile=1`.
+
+    O resumo (duração, funções com maior tempo acumulado e arquivos com o flamegraph e as estatísticas) 
+    é incluído na resposta no campo `profile`. Sem o parâmetro, a view é chamada diretamente.
+    """
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> Optional[Response]:
+        if not profiling.profile_requested(request.query_params.get("profile")) or not is_user_admin(request.user):
+            return view(request, *args, **kwargs)
+
+        response, summary = profiling.profile_call(view.__name__, view, request, *args, **kwargs)
+        if isinstance(response.data, dict):
+            response.data['profile'] = summary
+        return response
+    return wrapper
+
+
+def job_accepted(request: HttpRequest, job: Job) -> Response:
+    """
+    Resposta 202 para uma operação executada em segundo plano, com o ID do job e o endereço para 
+    acompanhá-lo (também no cabeçalho `Location`).
+    """
+    url = request.build_absolute_uri(reverse("job-detail", args=[job.id]))
+    response = response_template(data={"id": str(job.id), "status": job.status, "url": url}, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = url
+    return response
+
+
+def run_as_job_if_requested(kind: str):
+    """
+    Com `?async=1`, registra a requisição como um job em vez de executá-la.
+
+    Responde imediatamente com 202, o ID do job e o endereço (também no cabeçalho `Location`) para 
+    consultar o resultado, calculado pelos workers do comando `run_workers`. Se um job idêntico para 
+    a mesma versão dos dados já estiver pendente ou em execução, ele é reaproveitado. Sem o parâmetro, 
+    a view é chamada diretamente.
+
+    Args:
+        kind (str): O tipo do job (um dos `jobs.JOB_KINDS`).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request: HttpRequest, pk: int, *args, **kwargs) -> Optional[Response]:
+            if not jobs.async_requested(request.query_params.get("async")):
+                return view(request, pk, *args, **kwargs)
+
+            try:
+                try:
+                    last = get_last_param(request)
+                except ValueError:
+                    return response_template(errors={"message": INVALID_LAST_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+
+                if not Station.objects.filter(pk=pk).exists():
+                    return response_template(errors={"message": STATION_NOT_FOUND_MESSAGE}, status=status.HTTP_404_NOT_FOUND)
+
+                params: Dict[str, Any] = {"last": last}
+                if kind == "analyze":
+                    params["exact"] = exact_requested(request.query_params.get("exact"))
+                job, _ = jobs.submit(kind, pk, params)
+                return job_accepted(request, job)
+            except Exception as e:
+                logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
+                return response_template(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return wrapper
+    return decorator
+
+
+LAST_PARAMETER = OpenApiParameter(
+    name="last",
+    type=int,
+    description="Considera apenas os N registros mais recentes (campos numéricos), servidos a partir do cache de dados recentes",
+)
+
+PROFILE_PARAMETER = OpenApiParameter(
+    name="profile",
+    type=bool,
+    description="Apenas administradores: executa a requisição sob os perfiladores e inclui o resultado no campo `profile`",
+)
+
+ASYNC_PARAMETER = OpenApiParameter(
+    name="async",
+    type=bool,
+    description="Executa a requisição em segundo plano: responde com 202 e o ID do job, consultado em /api/jobs/<id>/",
+)
+
+EXACT_PARAMETER = OpenApiParameter(
+    name="exact",
+    type=bool,
+    description="Calcula quantis e moda com todo o histórico, em vez de usar os resumos da estação (aproximados, com o erro informado em `aproximacao`)",
+)
+
+INVALID_LAST_MESSAGE = "O parâmetro 'last' deve ser um inteiro positivo."
+STATION_NOT_FOUND_MESSAGE = "Estação não encontrada, verifique o ID da estação"
 
 
 # --------------------------------- Estações --------------------------------- #   
@@ -71,6 +224,9 @@ def response_template(data: List[Dict[str, Any]] = None, errors: Dict[str, Any]=
     description="Esse endpoint permite a listagem de todas as estações cadastradas",
     methods=['GET', 'POST'],
     request=StationSerializer,
+    parameters=[
+        OpenApiParameter(name="with_latest", type=bool, description="Inclui o último registro de cada estação (latest_data)"),
+    ],
     responses={
         200: OpenApiResponse(description="Lista de todas as estações cadastradas", response=StationSerializer),
         400: OpenApiResponse(description="Erro na requisição"),
@@ -84,7 +240,8 @@ def stations(request: HttpRequest) -> Optional[Response]:
 
     Este endpoint responde a uma requisição GET retornando uma lista de todas as estações cadastradas no projeto. 
     Cada estação é serializada utilizando o StationSerializer, que converte os objetos da estação 
-    em um formato JSON adequado para resposta HTTP.
+    em um formato JSON adequado para resposta HTTP. Com o parâmetro `?with_latest=1`, cada estação 
+    inclui o seu último registro (latest_data), obtido na mesma consulta a partir da tabela de snapshots.
 
     Args:
         request (HttpRequest): O objeto de requisição HTTP.
@@ -94,8 +251,12 @@ def stations(request: HttpRequest) -> Optional[Response]:
     """
     try:
         if request.method == "GET":
-            stations = Station.objects.all()
-            serializer = StationSerializer(stations, many=True)
+            if request.query_params.get("with_latest") in ("1", "true", "True"):
+                stations = Station.objects.select_related('LatestRegistrationData')
+                serializer = StationWithLatestSerializer(stations, many=True)
+            else:
+                stations = Station.objects.all()
+                serializer = StationSerializer(stations, many=True)
             return response_template(data=serializer.data)
     except Exception as e:
         logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
@@ -125,9 +286,9 @@ def stations(request: HttpRequest) -> Optional[Response]:
 )
 @extend_schema(
     methods=['DELETE'],
-    description="Exclui uma estação específica por ID",
+    description="Agenda a exclusão de uma estação específica por ID (executada em segundo plano pelos workers)",
     responses={
-        204: OpenApiResponse(description="Estação deletada com sucesso."),
+        202: OpenApiResponse(description="Exclusão agendada: ID do job que acompanha o progresso"),
         401: OpenApiResponse(description="Não autorizado - Autenticação falhou ou não foi fornecida"),
         403: OpenApiResponse(description="Acesso negado. Apenas administradores podem modificar os dados."),
         404: OpenApiResponse(description="Estação não encontrada"),
@@ -149,7 +310,7 @@ def stations_by_id(request: HttpRequest, pk: int) -> Optional[Response]:
         Response: Dependendo do método HTTP:
             - GET: Retorna os detalhes da estação, incluindo os últimos dados de registro, se disponíveis.
             - PUT: Atualiza o nome da estação e retorna uma mensagem de sucesso (Usuário administrador é necessário).
-            - DELETE: Deleta a estação e retorna uma mensagem de sucesso (Usuário administrador é necessário).
+            - DELETE: Agenda a exclusão da estação e do seu histórico e retorna o job que acompanha o progresso (Usuário administrador é necessário).
             Se a estação especificada não for encontrada, retorna um erro 404.
             Se o método PUT ou DELETE é chamado por um usuário não administrador, retorna um erro 403.
     """
@@ -158,12 +319,15 @@ def stations_by_id(request: HttpRequest, pk: int) -> Optional[Response]:
             return response_template(errors={"message": "Acesso negado! apenas adminstradores podem modificar esses dados."}, status=status.HTTP_403_FORBIDDEN)
         
         try:
-            station = Station.objects.get(pk=pk)
+            if request.method == "GET":
+                station = Station.objects.select_related('LatestRegistrationData').get(pk=pk)
+            else:
+                station = Station.objects.get(pk=pk)
         except Station.DoesNotExist:
-            return response_template(errors={"message": "Estação não encontrada, verifique o ID da estação"}, status=status.HTTP_404_NOT_FOUND)
+            return response_template(errors={"message": STATION_NOT_FOUND_MESSAGE}, status=status.HTTP_404_NOT_FOUND)
 
         if request.method == "GET":
-            station_serializer = StationSerializer(station)
+            station_serializer = StationWithLatestSerializer(station)
             response_data = station_serializer.data
             
             return response_template(data=response_data, status=status.HTTP_200_OK)
@@ -185,13 +349,32 @@ def stations_by_id(request: HttpRequest, pk: int) -> Optional[Response]:
                 #return response_template(errors={"message": "é necessário informar pelo menos um campo para a atualização."}, status=status.HTTP_400_BAD_REQUEST)
             
         elif request.method == "DELETE":
-            station.delete()
-            return response_template(data={"message": "Estação deletada com sucesso."}, status=status.HTTP_204_NO_CONTENT)
+            # O histórico é apagado em lotes pelos workers (stations/purge.py)
+            job, _ = jobs.submit("delete", pk, {})
+            return job_accepted(request, job)
 
     except Exception as e:
         logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
         return response_template(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def delete_station_result(pk: int, progress: Optional[purge.ProgressCallback] = None) -> Tuple[Any, Optional[Dict[str, Any]], int]:
+    """
+    Exclui uma estação e o seu histórico em lotes (executado pelos jobs de exclusão).
+
+    Args:
+        pk (int): O ID da estação.
+        progress (callable, optional): Recebe os registros apagados e o total após cada lote.
+
+    Returns:
+        tuple: Os dados, os erros (ou None) e o código de status HTTP da resposta.
+    """
+    if not Station.objects.filter(pk=pk).exists():
+        return None, {"message": STATION_NOT_FOUND_MESSAGE}, status.HTTP_404_NOT_FOUND
+
+    deleted = purge.delete_station(pk, progress)
+    return {"message": f"Estação {pk} excluída ({deleted} registros históricos)."}, None, status.HTTP_200_OK
+
+
 @extend_schema(
     description="Cria uma nova estação com os dados fornecidos.",
     request=StationSerializer,
@@ -230,6 +413,72 @@ def station_create(request: HttpRequest) -> Optional[Response]:
         logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
         return response_template(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@extend_schema(
+    description="Cria ou atualiza várias estações em uma única requisição (apenas administradores).",
+    request=StationBulkSerializer(many=True),
+    responses={
+        200: OpenApiResponse(description="IDs das estações criadas e das atualizadas"),
+        400: OpenApiResponse(description="Erro na requisição - erros de validação por item"),
+        401: OpenApiResponse(description="Não autorizado - Autenticação falhou ou não foi fornecida"),
+        403: OpenApiResponse(description="Acesso negado. Apenas administradores podem modificar os dados."),
+    }
+)
+@api_view(["POST"])
+def stations_bulk(request: HttpRequest) -> Optional[Response]:
+    """
+    Cria ou atualiza (upsert) uma lista de estações.
+
+    Todos os itens são validados antes da gravação; se algum for inválido (ou repetir o ID de um item 
+    anterior), nada é gravado e a resposta lista os erros de cada item pela sua posição na lista. 
+    Caso contrário, as estações são gravadas em uma única transação: as novas são criadas e, nas 
+    existentes, os campos informados são atualizados.
+
+    Args:
+        request (HttpRequest): O objeto de requisição HTTP, com a lista de estações no corpo.
+
+    Returns:
+        Response: Os IDs das estações criadas e das atualizadas, ou os erros por item com status HTTP 400.
+    """
+    try:
+        if not is_user_admin(request.user):
+            return response_template(errors={"message": "Acesso negado! apenas adminstradores podem modificar esses dados."}, status=status.HTTP_403_FORBIDDEN)
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return response_template(errors={"message": "O corpo da requisição deve ser uma lista de estações."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.STATION_BULK_MAX_ITEMS:
+            return response_template(errors={"message": f"Envie no máximo {settings.STATION_BULK_MAX_ITEMS} estações por requisição."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = StationBulkSerializer(data=items, many=True)
+        if serializer.is_valid():
+            item_errors = [{} for _ in items]
+            seen = set()
+            for index, item in enumerate(serializer.validated_data):
+                if item['station_id'] in seen:
+                    item_errors[index] = {"station_id": ["ID repetido na requisição."]}
+                seen.add(item['station_id'])
+        else:
+            item_errors = serializer.errors
+
+        if any(item_errors):
+            return response_template(errors={
+                "message": "Nenhuma estação foi gravada: corrija os itens inválidos.",
+                "items": [
+                    {"index": index, "station_id": items[index].get("station_id") if isinstance(items[index], dict) else None, "errors": errors}
+                    for index, errors in enumerate(item_errors) if errors
+                ],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        created, updated = Station.bulk_upsert(serializer.validated_data)
+        return response_template(data={
+            "message": f"{len(created)} estações criadas e {len(updated)} atualizadas",
+            "created": created,
+            "updated": updated,
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
+        return response_template(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 # --------------------------------- Dados históricos --------------------------------- #
 @extend_schema(
     description="Recupera e retorna os dados históricos de registro para todas as estações.",
@@ -262,8 +511,10 @@ def historical_data(request: HttpRequest) -> Optional[Response]:
 @extend_schema(
     description="Recupera e retorna os dados históricos de registro para uma estação específica.",
     methods=['GET'],
+    parameters=[LAST_PARAMETER],
     responses={
         200: RegistrationDataSerializer(many=True),
+        400: OpenApiResponse(description="Erro na requisição"),
         404: OpenApiResponse(description="Estação não encontrada"),
         401: OpenApiResponse(description="Não autorizado - Autenticação falhou ou não foi fornecida"),
     }
@@ -277,6 +528,9 @@ def historical_data_by_id(request: HttpRequest, pk: int) -> Optional[Response]:
     pelo seu ID (chave primária). Se a estação não for encontrada, retorna um erro 404. Caso contrário, 
     retorna os dados de registro em formato serializado.
 
+    Com o parâmetro `?last=N`, retorna apenas os N registros mais recentes com os campos numéricos, 
+    lidos do cache de dados recentes compartilhado entre os workers (ou do banco, se não estiverem em cache).
+
     Args:
         request (HttpRequest): O objeto de requisição HTTP.
         pk (int): O ID (chave primária) da estação onde os dados históricos de registro são solicitados.
@@ -286,10 +540,18 @@ def historical_data_by_id(request: HttpRequest, pk: int) -> Optional[Response]:
         se a estação for encontrada. Caso contrário, retorna uma mensagem de erro indicando que a estação não foi encontrada.
     """
     try:
+        try:
+            last = get_last_param(request)
+        except ValueError:
+            return response_template(errors={"message": INVALID_LAST_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             Station.objects.get(pk=pk)
         except Station.DoesNotExist:
-            return response_template(errors={"message": "Estação não encontrada, verifique o ID da estação"}, status=status.HTTP_404_NOT_FOUND)
+            return response_template(errors={"message": STATION_NOT_FOUND_MESSAGE}, status=status.HTTP_404_NOT_FOUND)
+
+        if last is not None:
+            return response_template(data=analytics.recent_records(pk, last), status=status.HTTP_200_OK)
 
         data = RegistrationData.objects.filter(station_id=pk)
         serializer = RegistrationDataSerializer(data, many=True)
@@ -301,17 +563,104 @@ def historical_data_by_id(request: HttpRequest, pk: int) -> Optional[Response]:
 
 
 # --------------------------------- Análise e Previsão --------------------------------- #
+def predict_result(pk: int, last: Optional[int]) -> Tuple[Any, Optional[Dict[str, Any]], int]:
+    """
+    Calcula a previsão de uma estação (usado pela view `predict` e pelos jobs assíncronos).
+
+    Args:
+        pk (int): O ID da estação.
+        last (int | None): Considera apenas os N registros mais recentes.
+
+    Returns:
+        tuple: Os dados, os erros (ou None) e o código de status HTTP da resposta.
+    """
+    try:
+        Station.objects.get(pk=pk)
+    except Station.DoesNotExist:
+        return None, {"message": STATION_NOT_FOUND_MESSAGE}, status.HTTP_404_NOT_FOUND
+
+    if last is not None:
+        df = analytics.recent_frame(pk, last)
+        has_data = not df.empty
+    else:
+        has_data = RegistrationData.objects.filter(station_id=pk).exists()
+
+    if not has_data:
+        return None, {"message": "Sem dados históricos para analisar. Tente novamente com outro ID"}, status.HTTP_404_NOT_FOUND
+
+    # Verificar e fazer previsões para cada campo. Com o histórico completo, a previsão vem dos
+    # modelos gravados, mantidos pelo importador (a requisição não escreve no banco)
+    if last is not None:
+        previsoes = analytics.forecast(df, analytics.FORECAST_FIELDS)
+    else:
+        previsoes = analytics.forecast_station(pk, analytics.FORECAST_FIELDS)
+
+    if not previsoes:
+        return None, {'mensagem': 'Não há dados suficientes para fazer previsões.'}, status.HTTP_400_BAD_REQUEST
+
+    return {
+        'mensagem': 'Previsão para os próximos 7 dias.',
+        'dados': previsoes
+    }, None, status.HTTP_200_OK
+
+
+def analyze_result(pk: int, last: Optional[int], exact: bool = False) -> Tuple[Any, Optional[Dict[str, Any]], int]:
+    """
+    Calcula a análise estatística de uma estação (usado pela view `analyze` e pelos jobs assíncronos).
+
+    Sem `last` e sem `exact`, a análise usa os resumos da estação (`FieldSketch`), em tempo constante;
+    estações sem resumos são analisadas com todo o histórico.
+
+    Args:
+        pk (int): O ID da estação.
+        last (int | None): Considera apenas os N registros mais recentes.
+        exact (bool): Analisa todo o histórico, sem os resumos.
+
+    Returns:
+        tuple: Os dados, os erros (ou None) e o código de status HTTP da resposta.
+    """
+    try:
+        Station.objects.get(pk=pk)
+    except Station.DoesNotExist:
+        return None, {"message": STATION_NOT_FOUND_MESSAGE}, status.HTTP_404_NOT_FOUND
+
+    if last is None and not exact:
+        analysis_result = analytics.sketch_summary(pk, analytics.ANALYZE_FIELDS)
+        if analysis_result is not None:
+            return analysis_result, None, status.HTTP_200_OK
+
+    if last is not None:
+        df = analytics.recent_frame(pk, last)
+    else:
+        data = RegistrationData.objects.filter(station_id=pk)
+        serializer = RegistrationDataSerializer(data, many=True)
+        df = analytics.history_frame(serializer.data)
+
+    if df.empty:
+        return None, {"message": "Sem dados históricos para analisar. Tente novamente com outro ID"}, status.HTTP_404_NOT_FOUND
+
+    return analytics.describe(df, analytics.ANALYZE_FIELDS), None, status.HTTP_200_OK
+
+
 @extend_schema(
     description="Realiza uma previsão de 7 dias dados especificos da uma estação.",
     methods=['GET'],
+    parameters=[LAST_PARAMETER, PROFILE_PARAMETER, ASYNC_PARAMETER],
     responses={
         200: OpenApiResponse(description="Previsão de temperatura para os próximos 7 dias"),
+        202: OpenApiResponse(description="Job criado (com ?async=1)"),
         404: OpenApiResponse(description="Estação não encontrada ou sem dados para a analise"),
         400: OpenApiResponse(description="Erro na requisição"),
         401: OpenApiResponse(description="Não autorizado - Autenticação falhou ou não foi fornecida"),
+        429: OpenApiResponse(description="Limite de requisições do usuário excedido"),
+        503: OpenApiResponse(description="Servidor ocupado - fila de processamento cheia"),
     },
 )
 @api_view(["GET"])
+@throttle_classes([PredictThrottle])
+@run_as_job_if_requested("predict")
+@limit_concurrency("predict")
+@profile_if_requested
 def predict(request: HttpRequest, pk: int) -> Optional[Response]:
     """
     Realiza uma previsão de 7 dias para vários parâmetros de uma estação específica.
@@ -319,6 +668,9 @@ def predict(request: HttpRequest, pk: int) -> Optional[Response]:
     Este endpoint busca os dados de registro de uma estação específica pelo seu ID (chave primária) 
     e utiliza um modelo ARIMA para fazer uma previsão de 7 dias para vários parâmetros, incluindo 
     temperatura, voltagem da bateria, nível da régua e precipitação.
+    Com o parâmetro `?last=N`, o modelo é ajustado apenas aos N registros mais recentes. Sem ele, a
+    previsão usa o modelo gravado da estação (`ForecastModel`), estendido com as leituras novas.
+    Com `?async=1`, a previsão é calculada em segundo plano (ver `run_as_job_if_requested`).
 
     Args:
         request (HttpRequest): O objeto de requisição HTTP.
@@ -331,56 +683,12 @@ def predict(request: HttpRequest, pk: int) -> Optional[Response]:
     """
     try:
         try:
-            Station.objects.get(pk=pk)
-        except Station.DoesNotExist:
-            return response_template(errors={"message": "Estação não encontrada, verifique o ID da estação"}, status=status.HTTP_404_NOT_FOUND)
+            last = get_last_param(request)
+        except ValueError:
+            return response_template(errors={"message": INVALID_LAST_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
 
-        data = RegistrationData.objects.filter(station_id=pk)
-        serializer = RegistrationDataSerializer(data, many=True)
-
-        if serializer.data:
-            df = pd.DataFrame(serializer.data)
-            df['data'] = pd.to_datetime(df['DataHora_GMT'])
-            df.set_index('data', inplace=True)
-
-            previsoes = {}
-
-            # Função auxiliar para fazer previsão
-            def fazer_previsao(serie, nome): #type: ignore
-                ts = serie.astype(float).dropna()
-                if ts.empty:
-                    return None
-                model = sm.tsa.ARIMA(ts, order=(5, 1, 0))
-                results = model.fit()
-                forecast = results.get_forecast(steps=7)
-                previsao = forecast.predicted_mean
-                erro_padrao = forecast.se_mean
-                intervalo_confianca = forecast.conf_int(alpha=0.05)
-                return {
-                    'previsao': [round(val, 2) for val in previsao],
-                    'erro_padrao': [round(val, 4) for val in erro_padrao],
-                    'intervalo_confianca': {
-                        'limite_inferior': [round(val, 2) for val in intervalo_confianca.iloc[:, 0]],
-                        'limite_superior': [round(val, 2) for val in intervalo_confianca.iloc[:, 1]]
-                    }
-                }
-
-            # Verificar e fazer previsões para cada campo
-            campos = ['TempAr_C', 'Bateria_volts', 'NivRegua_m', 'Pluvio_mm']
-            for campo in campos:
-                if df[campo].isnull().sum() == 0:
-                    previsoes[campo] = fazer_previsao(df[campo], campo)
-
-            if not previsoes:
-                return response_template(errors={'mensagem': 'Não há dados suficientes para fazer previsões.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            return response_template(data={
-                'mensagem': 'Previsão para os próximos 7 dias.',
-                'dados': previsoes
-            }, status=status.HTTP_200_OK)
-        
-        else:
-            return response_template(errors={"message": "Sem dados históricos para analisar. Tente novamente com outro ID"}, status=status.HTTP_404_NOT_FOUND)
+        data, errors, code = predict_result(pk, last)
+        return response_template(data=data, errors=errors, status=code)
 
     except Exception as e:
         logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
@@ -389,18 +697,29 @@ def predict(request: HttpRequest, pk: int) -> Optional[Response]:
 @extend_schema(
     description="Realiza uma análise estatística dos dados de uma estação específica.",
     methods=['GET'],
+    parameters=[LAST_PARAMETER, EXACT_PARAMETER, PROFILE_PARAMETER, ASYNC_PARAMETER],
     responses={
         200: OpenApiResponse(description="Análise estatística dos dados"),
+        202: OpenApiResponse(description="Job criado (com ?async=1)"),
         404: OpenApiResponse(description="Estação não encontrada ou sem dados para a analise"),
         401: OpenApiResponse(description="Não autorizado - Autenticação falhou ou não foi fornecida"),
+        429: OpenApiResponse(description="Limite de requisições do usuário excedido"),
+        503: OpenApiResponse(description="Servidor ocupado - fila de processamento cheia"),
     },
 )
 @api_view(["GET"])
+@throttle_classes([AnalyzeThrottle])
+@run_as_job_if_requested("analyze")
+@limit_concurrency("analyze")
+@profile_if_requested
 def analyze(request: HttpRequest, pk: int) -> Optional[Response]:
     """
     Realiza uma análise estatística detalhada dos dados de uma estação específica.
 
     Este endpoint busca todos os registros de dados associados a uma estação pelo seu ID (chave primária) e realiza uma análise estatística descritiva detalhada desses dados, focando nos campos 'Pluvio_mm', 'NivRegua_m' e 'Bateria_volts'.
+    Com o parâmetro `?last=N`, a análise considera apenas os N registros mais recentes. Sem ele, a
+    análise usa os resumos da estação (quantis e moda aproximados); `?exact=1` usa todo o histórico.
+    Com `?async=1`, a análise é calculada em segundo plano (ver `run_as_job_if_requested`).
 
     Args:
         request (HttpRequest): O objeto de requisição HTTP.
@@ -413,39 +732,84 @@ def analyze(request: HttpRequest, pk: int) -> Optional[Response]:
     """  
     try:  
         try:
-            Station.objects.get(pk=pk)
-        except Station.DoesNotExist:
-            return response_template(errors={"message": "Estação não encontrada, verifique o ID da estação"}, status=status.HTTP_404_NOT_FOUND)
+            last = get_last_param(request)
+        except ValueError:
+            return response_template(errors={"message": INVALID_LAST_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
 
-        data = RegistrationData.objects.filter(station_id=pk)
-        serializer = RegistrationDataSerializer(data, many=True)
+        data, errors, code = analyze_result(pk, last, exact_requested(request.query_params.get("exact")))
+        return response_template(data=data, errors=errors, status=code)
+
+    except Exception as e:
+        logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
+        return response_template(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        if serializer.data:
-            df = pd.DataFrame(serializer.data)
-            if df.empty:
-                return response_template(errors={"message": "Sem dados históricos para analisar. Tente novamente com outro ID"}, status=status.HTTP_404_NOT_FOUND)
 
-            campos_interesse = ['Pluvio_mm', 'NivRegua_m', 'Bateria_volts']
-            
-            df[campos_interesse] = df[campos_interesse].apply(pd.to_numeric, errors='coerce')
-
-            # Estatísticas descritivas básicas
-            analysis_result = df[campos_interesse].describe().to_dict()
-
-            # Estatísticas adicionais
-            analysis_result['mediana'] = df[campos_interesse].median().to_dict()
-            analysis_result['valor_mais_frequente'] = df[campos_interesse].mode().iloc[0].to_dict()  
-            analysis_result['quantis '] = df[campos_interesse].quantile([0.25, 0.5, 0.75]).to_dict()
-            analysis_result['variancia'] = df[campos_interesse].var().to_dict()
-            analysis_result['desvio_padrao'] = df[campos_interesse].std().to_dict()
-            analysis_result['assimetria'] = df[campos_interesse].skew().to_dict()
-            analysis_result['curtose'] = df[campos_interesse].kurtosis().to_dict()
-            analysis_result['contagem_nao_nulos'] = df[campos_interesse].count().to_dict()
-
-            return response_template(data=analysis_result, status=status.HTTP_200_OK)
-        else:
-            return response_template(errors={"message": "Sem dados históricos para analisar. Tente novamente com outro ID"}, status=status.HTTP_404_NOT_FOUND)
+# --------------------------------- Controle de admissão --------------------------------- #
+@extend_schema(
+    description="Exibe o estado do controle de admissão dos endpoints de previsão e análise (apenas administradores).",
+    methods=['GET'],
+    responses={
+        200: OpenApiResponse(description="Execuções ativas e fila atual por endpoint, com os limites configurados"),
+        401: OpenApiResponse(description="Não autorizado - Autenticação falhou ou não foi fornecida"),
+        403: OpenApiResponse(description="Acesso negado. Apenas administradores podem acessar esses dados."),
+    },
+)
+@api_view(["GET"])
+def admission_status(request: HttpRequest) -> Optional[Response]:
+    """
+    Exibe o estado do controle de admissão dos endpoints com uso intenso de CPU.
+
+    Args:
+        request (HttpRequest): O objeto de requisição HTTP.
 
+    Returns:
+        Response: Para cada endpoint (`predict` e `analyze`), as execuções ativas e o tamanho atual da fila, 
+        com os limites configurados. Os contadores de requisições admitidas e recusadas e o tempo de espera 
+        na fila são publicados em `/metrics`.
+    """
+    try:
+        if not is_user_admin(request.user):
+            return response_template(errors={"message": "Acesso negado! apenas adminstradores podem acessar esses dados."}, status=status.HTTP_403_FORBIDDEN)
+
+        return response_template(data=admission_stats(), status=status.HTTP_200_OK)
     except Exception as e:
         logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
-        return response_template(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        return response_template(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# --------------------------------- Jobs assíncronos --------------------------------- #
+@extend_schema(
+    description="Consulta o status e o resultado de um job assíncrono (criado com ?async=1 em predict ou analyze).",
+    methods=['GET'],
+    responses={
+        200: JobSerializer,
+        401: OpenApiResponse(description="Não autorizado - Autenticação falhou ou não foi fornecida"),
+        404: OpenApiResponse(description="Job não encontrado"),
+    },
+)
+@api_view(["GET"])
+def job_detail(request: HttpRequest, job_id) -> Optional[Response]:
+    """
+    Consulta um job assíncrono.
+
+    Args:
+        request (HttpRequest): O objeto de requisição HTTP.
+        job_id (UUID): O ID do job, retornado na resposta 202.
+
+    Returns:
+        Response: O status do job (`pending`, `running`, `done` ou `failed`) e, quando concluído, o 
+        resultado: o corpo (`result`) e o código de status (`result_status`) que a requisição síncrona 
+        teria retornado. Jobs concluídos ficam disponíveis por `JOB_RETENTION_HOURS` horas. Jobs de
+        operações restritas (exclusão de estações) só são visíveis para administradores.
+    """
+    try:
+        visible = Job.objects.all() if is_user_admin(request.user) else Job.objects.exclude(kind__in=jobs.ADMIN_JOB_KINDS)
+        try:
+            job = visible.get(pk=job_id)
+        except Job.DoesNotExist:
+            return response_template(errors={"message": "Job não encontrado, verifique o ID do job"}, status=status.HTTP_404_NOT_FOUND)
+
+        return response_template(data=JobSerializer(job).data, status=status.HTTP_200_OK)
+    except Exception as e:
+        logging.error(f"Erro ao processar a requisição: {e}", exc_info=True)
+        return response_template(errors={"message": "Erro interno no servidor."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,117 @@
+"""
+Processos de trabalho dos comandos `run_workers` (jobs) e `import_stations` (importação).
+
+Os dois consomem uma fila no banco com a mesma semântica de encerramento, implementada aqui:
+
+- `run` é o laço de um processo: consome a fila até ela se esgotar ou até receber SIGTERM/SIGINT,
+  concluindo o item em andamento antes de encerrar;
+- `supervise` cria os processos por fork (como os workers do gunicorn), repassa SIGTERM/SIGINT a
+  eles e aguarda o encerramento de todos, removendo as métricas de "processo vivo" de cada um.
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from django.db import close_old_connections, connections
+
+
+def worker_name() -> str:
+    """Identificação do processo gravada nos itens reservados (máquina e PID)."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+@contextmanager
+def stop_on_signals(stop: threading.Event) -> Iterator[threading.Event]:
+    """Define `stop` ao receber SIGTERM/SIGINT (apenas na thread principal) e restaura os handlers ao sair."""
+    previous_handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            previous_handlers[signum] = signal.signal(signum, lambda *args: stop.set())
+    try:
+        yield stop
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+
+def run(step: Callable[[], Optional[bool]], idle: Callable[[], bool], poll_interval: float,
+        stop: Optional[threading.Event] = None, max_items: Optional[int] = None) -> int:
+    """
+    Laço de um processo de trabalho, até receber SIGTERM/SIGINT (ou `stop` ser definido).
+
+    Args:
+        step (callable): Processa o próximo item da fila. Retorna None se a fila estava vazia; caso
+            contrário, se o item deve ser contado.
+        idle (callable): Chamada com a fila vazia (manutenção); retorna False para encerrar o laço.
+            Caso contrário, o laço aguarda `poll_interval` segundos.
+        poll_interval (float): Espera entre consultas à fila vazia.
+        stop (threading.Event, optional): Evento que encerra o laço.
+        max_items (int, optional): Encerra após essa quantidade de itens contados.
+
+    Returns:
+        int: A quantidade de itens contados.
+    """
+    stop = stop or threading.Event()
+    counted = 0
+    with stop_on_signals(stop):
+        while not stop.is_set():
+            # Fora do ciclo de requisição, as conexões não são verificadas pelo Django
+            close_old_connections()
+            result = step()
+            if result is None:
+                if not idle():
+                    break
+                stop.wait(poll_interval)
+                continue
+
+            if result:
+                counted += 1
+                if max_items and counted >= max_items:
+                    break
+    return counted
+
+
+def _child(target: Callable[[], None]) -> None:
+    # Cada processo abre as próprias conexões com o banco
+    connections.close_all()
+    target()
+
+
+def supervise(target: Callable[[], None], processes: int, name: str) -> None:
+    """
+    Executa `target` em `processes` processos criados por fork e aguarda o encerramento de todos.
+
+    SIGTERM e SIGINT são repassados aos processos, que encerram após o item em andamento. No modo
+    multiprocesso do Prometheus, os gauges de cada processo encerrado são descartados, como no
+    `child_exit` do gunicorn.
+
+    Args:
+        target (callable): O laço de cada processo (normalmente, uma chamada a `run`).
+        processes (int): A quantidade de processos.
+        name (str): O prefixo do nome dos processos.
+    """
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_child, args=(target,), name=f'{name}-{i}') for i in range(processes)]
+    for worker in workers:
+        worker.start()
+
+    def forward(signum, frame):
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+    previous_handlers = {signum: signal.signal(signum, forward) for signum in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        for worker in workers:
+            worker.join()
+            if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+                from prometheus_client import multiprocess
+                multiprocess.mark_process_dead(worker.pid)
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
@@ -0,0 +1,60 @@
+"""
+Autenticação JWT com cache do usuário resolvido.
+
+O `JWTAuthentication` padrão consulta a tabela de usuários a cada requisição autenticada.
+`CachedJWTAuthentication` guarda o usuário no cache (chave `user_id` + versão) por um
+tempo curto (`JWT_USER_CACHE_TTL`). A versão é trocada sempre que o usuário é salvo ou
+excluído, no commit da transação (ver `users/signals.py`), invalidando as entradas antigas.
+
+Com `JWT_STATELESS_AUTH` ativo, nenhuma consulta é feita: o usuário é montado a partir das
+claims do token (incluindo `is_staff`, adicionada por `users.tokens.StaffClaimRefreshToken`).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+
+def _version_key(user_id) -> str:
+    return f"jwt_user_version:{user_id}"
+
+
+def user_cache_key(user_id) -> str:
+    """Retorna a chave do cache do usuário, incluindo a versão atual."""
+    version = cache.get(_version_key(user_id), 0)
+    return f"jwt_user:{user_id}:{version}"
+
+
+def invalidate_user(user_id) -> None:
+    """
+    Invalida o usuário em cache trocando a sua versão.
+
+    Uma requisição que leu o usuário do banco antes da invalidação grava o resultado sob a
+    versão antiga, que não é mais consultada.
+    """
+    cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token: Token):
+        if settings.JWT_STATELESS_AUTH:
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken("Token contained no recognizable user identification")
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Usuários inexistentes ou inativos geram erro aqui e nunca vão para o cache
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.JWT_USER_CACHE_TTL)
+        return user
@@ -0,0 +1,16 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance: User, **kwargs) -> None:
+    # Alterações, desativações e exclusões invalidam o usuário em cache na autenticação JWT. A
+    # invalidação espera o commit: antes dele, uma requisição concorrente ainda lê a linha antiga
+    # e a gravaria no cache sob a versão nova
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user(user_id))
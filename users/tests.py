@@ -0,0 +1,113 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from stations.views import is_user_admin
+
+from .authentication import CachedJWTAuthentication
+from .tokens import StaffClaimRefreshToken
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JWT_STATELESS_AUTH=False, JWT_USER_CACHE_TTL=60)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('usuario', password='senha')
+        self.authentication = CachedJWTAuthentication()
+
+    def authenticate(self, user=None):
+        token = StaffClaimRefreshToken.for_user(user or self.user).access_token
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.authentication.authenticate(request)[0]
+
+    def test_cached_user_needs_no_query(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_save_invalidates_cached_user(self):
+        self.authenticate()
+        self.user.first_name = 'Novo'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        self.assertEqual(user.first_name, 'Novo')
+
+    def test_invalidation_waits_for_commit(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.is_staff = True
+            self.user.save()
+            # Antes do commit, a versão em cache continua valendo
+            with self.assertNumQueries(0):
+                self.assertFalse(self.authenticate().is_staff)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.authenticate().is_staff)
+
+    def test_rollback_keeps_cached_user(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.user.save()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_deactivation_invalidates_cached_user(self):
+        self.authenticate()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_delete_invalidates_cached_user(self):
+        self.authenticate()
+        user = User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.user)
+
+    def test_inactive_user_is_not_cached(self):
+        self.user.is_active = False
+        self.user.save()
+        for _ in range(2):
+            with self.assertNumQueries(1), self.assertRaises(AuthenticationFailed):
+                self.authenticate()
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JWT_STATELESS_AUTH=True)
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.authentication = CachedJWTAuthentication()
+
+    def authenticate(self, user):
+        token = StaffClaimRefreshToken.for_user(user).access_token
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        with CaptureQueriesContext(connection) as queries:
+            authenticated = self.authentication.authenticate(request)[0]
+        self.assertEqual(len(queries), 0)
+        return authenticated
+
+    def test_staff_claim(self):
+        admin = User.objects.create_user('admin', password='senha', is_staff=True)
+        user = self.authenticate(admin)
+        self.assertEqual(user.id, admin.pk)
+        self.assertTrue(is_user_admin(user))
+
+    def test_non_staff_claim(self):
+        user = self.authenticate(User.objects.create_user('usuario', password='senha'))
+        self.assertFalse(is_user_admin(user))
@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class StaffClaimRefreshToken(RefreshToken):
+    """
+    Token de atualização que inclui a claim `is_staff`.
+
+    A claim é copiada para os tokens de acesso gerados a partir dele e permite que
+    `is_user_admin` funcione no modo de autenticação sem estado (`JWT_STATELESS_AUTH`).
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['is_staff'] = user.is_staff
+        return token
+
+
+class StaffClaimTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = StaffClaimRefreshToken
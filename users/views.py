@@ -1,7 +1,7 @@
 from rest_framework import status
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import StaffClaimRefreshToken
 from django.http import HttpRequest
 from rest_framework.decorators import permission_classes, api_view
 from rest_framework.permissions import IsAdminUser
@@ -60,7 +60,7 @@ def register_user(request: HttpRequest) -> Optional[Response]:
             user = User.objects.create_user(username=username, password=password)
             user.save()
 
-            refresh = RefreshToken.for_user(user)
+            refresh = StaffClaimRefreshToken.for_user(user)
 
             return Response({
                 'refresh': str(refresh),
@@ -0,0 +1,74 @@
+"""
+Roteamento das consultas entre o banco primário (`default`) e a réplica de leitura (`replica`).
+
+Uma consulta é enviada à réplica somente quando:
+
+- o alias `replica` está configurado (`POSTGRES_REPLICA_HOST`);
+- ela acontece durante uma requisição GET/HEAD a uma das rotas de `DATABASE_REPLICA_VIEWS`;
+- a requisição ainda não escreveu no banco e não está dentro de uma transação no primário;
+- o cliente não fez uma escrita nos últimos `DATABASE_PRIMARY_PIN_SECONDS` (cookie definido pelo
+  `DatabaseRoutingMiddleware`), para que ele leia as próprias alterações apesar do atraso da replicação.
+
+Todo o resto (escritas, demais rotas e comandos do `manage.py`, como o importador) usa o primário.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest
+
+REPLICA_DB_ALIAS = 'replica'
+
+# Cookie que mantém o cliente no primário logo após uma escrita
+PRIMARY_COOKIE = 'db_primary'
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+@dataclass
+class RoutingState:
+    """Requisição em andamento e se ela já escreveu no banco."""
+    request: HttpRequest
+    wrote: bool = False
+
+
+# Estado da requisição em andamento (acompanha a requisição também nas threads do `sync_to_async`)
+routing_state: ContextVar[Optional[RoutingState]] = ContextVar('routing_state', default=None)
+
+
+def replica_configured() -> bool:
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    """Envia as leituras dos endpoints de consulta à réplica e todo o resto ao primário."""
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        state = routing_state.get()
+        if state is None or state.wrote or not replica_configured():
+            return None
+
+        request = state.request
+        if request.method not in SAFE_METHODS or PRIMARY_COOKIE in request.COOKIES:
+            return None
+        match = request.resolver_match
+        if match is None or match.url_name not in settings.DATABASE_REPLICA_VIEWS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> str:
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # A réplica tem os mesmos dados do primário
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> bool:
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,161 @@
+"""
+Configuração de logs não bloqueante e estruturada (JSON).
+
+As threads que atendem as requisições apenas colocam o registro em uma fila em memória
+(`QueueFileHandler`); uma thread em segundo plano (`QueueListener`) formata os registros em
+JSON e os grava em arquivos com rotação. Cada registro inclui o ID da requisição
+(`weather_api.middleware.RequestIdMiddleware`), também devolvido ao cliente no cabeçalho `X-Request-ID`.
+
+Os handlers são configurados pelo `LOGGING` em `settings.py`.
+"""
+import copy
+import fcntl
+import json
+import logging
+import os
+import queue
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+# ID da requisição em andamento (acompanha a requisição também nas threads do `sync_to_async`)
+request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formata cada registro como um objeto JSON em uma única linha.
+
+    Args:
+        timezone (str): Fuso horário usado no campo `timestamp`.
+    """
+
+    def __init__(self, timezone: str = 'America/Sao_Paulo'):
+        super().__init__()
+        self.timezone = ZoneInfo(timezone)
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, self.timezone).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """
+    `RotatingFileHandler` que pode ser usado por vários processos no mesmo arquivo.
+
+    O tamanho considerado é o do arquivo em disco; a rotação é feita por apenas um processo
+    (trava `flock` em `<arquivo>.lock`) e os demais reabrem o arquivo quando percebem que ele
+    foi substituído.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.reopen_if_rotated()
+        super().emit(record)
+
+    def _open(self):
+        # O diretório é criado apenas quando o primeiro registro é gravado
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+    def reopen_if_rotated(self) -> None:
+        if self.stream is None:
+            return
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            current = None
+        opened = os.fstat(self.stream.fileno())
+        if current is None or (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino):
+            self.stream.close()
+            self.stream = self._open()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.maxBytes <= 0:
+            return False
+        try:
+            return os.stat(self.baseFilename).st_size >= self.maxBytes
+        except FileNotFoundError:
+            return False
+
+    def doRollover(self) -> None:
+        fd = os.open(f"{self.baseFilename}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # Outro processo pode ter feito a rotação enquanto esperávamos a trava
+            if self.shouldRollover(None):
+                super().doRollover()
+            else:
+                self.reopen_if_rotated()
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    Handler que apenas enfileira os registros; a gravação no arquivo (JSON, com rotação) é feita
+    por uma thread em segundo plano.
+
+    A thread não sobrevive a um `fork` (workers do gunicorn com `preload_app`), por isso o
+    processo filho cria a sua própria fila e thread logo após o fork.
+
+    Args:
+        filename (str): Caminho do arquivo de log.
+        max_bytes (int): Tamanho máximo do arquivo antes da rotação.
+        backup_count (int): Quantidade de arquivos rotacionados mantidos.
+        timezone (str): Fuso horário dos registros.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, timezone: str = 'America/Sao_Paulo'):
+        self.file_handler = SharedRotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.file_handler.setFormatter(JsonFormatter(timezone))
+        super().__init__(queue.SimpleQueue())
+        self.listener: Optional[QueueListener] = None
+        self.start()
+        os.register_at_fork(after_in_child=self.restart_after_fork)
+
+    def start(self) -> None:
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.file_handler)
+        self.listener.start()
+
+    def restart_after_fork(self) -> None:
+        if self.listener is not None:
+            self.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # O texto da mensagem e o traceback são resolvidos agora (os argumentos podem mudar depois);
+        # a serialização em JSON fica para a thread de gravação
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.file_handler.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = request_id.get()
+        return record
+
+    def close(self) -> None:
+        # Grava o que ainda estiver na fila antes de encerrar
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.file_handler.close()
+        super().close()
+
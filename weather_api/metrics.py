@@ -0,0 +1,185 @@
+"""
+Métricas de desempenho da aplicação, expostas no formato do Prometheus em `/metrics`.
+
+Como a API roda em vários processos (workers do gunicorn, pool de processos das análises e
+comandos do `manage.py`, como o `import_stations`), o `prometheus_client` é usado no modo
+multiprocesso: cada processo grava suas métricas em arquivos no diretório
+`PROMETHEUS_MULTIPROC_DIR`, um subdiretório de `METRICS_DIR` por serviço (ver
+`weather_api/metrics_dir.py`), e o endpoint agrega os arquivos de todos eles. Fora desses
+serviços (por exemplo, em `manage.py check`), as métricas ficam apenas na memória do processo.
+"""
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# --------------------------------- Requisições --------------------------------- #
+REQUEST_DURATION = Histogram(
+    'weather_api_request_duration_seconds',
+    'Tempo total de processamento da requisição',
+    ['view', 'method', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'weather_api_request_db_queries',
+    'Quantidade de consultas ao banco por requisição',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500, float('inf')),
+)
+REQUEST_DB_DURATION = Histogram(
+    'weather_api_request_db_duration_seconds',
+    'Tempo gasto em consultas ao banco por requisição',
+    ['view'],
+)
+REQUEST_RENDER_DURATION = Histogram(
+    'weather_api_request_render_duration_seconds',
+    'Tempo de serialização (renderização do JSON) da resposta',
+    ['view'],
+)
+RESPONSE_SIZE = Histogram(
+    'weather_api_response_size_bytes',
+    'Tamanho do corpo da resposta',
+    ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, float('inf')),
+)
+
+# --------------------------------- Análise e importação --------------------------------- #
+FORECAST_FIT_DURATION = Histogram(
+    'weather_api_forecast_fit_duration_seconds',
+    'Tempo de ajuste do modelo ARIMA por campo',
+    ['field'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf')),
+)
+JOB_DURATION = Histogram(
+    'weather_api_job_duration_seconds',
+    'Tempo de execução dos jobs assíncronos (?async=1)',
+    ['kind', 'status'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, float('inf')),
+)
+JOB_QUEUE_WAIT = Histogram(
+    'weather_api_job_queue_wait_seconds',
+    'Tempo entre o envio do job e o início da execução',
+    ['kind'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, float('inf')),
+)
+STREAM_SUBSCRIBERS = Gauge(
+    'weather_api_stream_subscribers',
+    'Clientes conectados ao stream de leituras (Server-Sent Events)',
+    multiprocess_mode='livesum',
+)
+STREAM_EVENTS = Counter(
+    'weather_api_stream_events',
+    'Leituras enviadas aos clientes do stream',
+)
+ADMISSION_ADMITTED = Counter(
+    'weather_api_admission_admitted',
+    'Requisições de predict/analyze admitidas pelo controle de admissão',
+    ['scope'],
+)
+ADMISSION_REJECTED = Counter(
+    'weather_api_admission_rejected',
+    'Requisições de predict/analyze recusadas (queue_full e timeout: 503; throttled: 429)',
+    ['scope', 'reason'],
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    'weather_api_admission_queue_wait_seconds',
+    'Tempo de espera na fila do controle de admissão (admitidas e recusadas por tempo esgotado)',
+    ['scope'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float('inf')),
+)
+ADMISSION_ACTIVE = Gauge(
+    'weather_api_admission_active',
+    'Execuções de predict/analyze em andamento',
+    ['scope'],
+    multiprocess_mode='livesum',
+)
+ADMISSION_QUEUED = Gauge(
+    'weather_api_admission_queued',
+    'Requisições de predict/analyze aguardando na fila',
+    ['scope'],
+    multiprocess_mode='livesum',
+)
+IMPORT_ROWS = Counter(
+    'weather_api_import_rows',
+    'Registros gravados pelo comando import_stations',
+    ['uf'],
+)
+IMPORT_ROWS_PER_SECOND = Gauge(
+    'weather_api_import_rows_per_second',
+    'Vazão (registros por segundo) da última estação importada',
+    ['uf'],
+    multiprocess_mode='mostrecent',
+)
+
+
+# --------------------------------- Consultas ao banco --------------------------------- #
+@dataclass
+class RequestTimings:
+    """Tempos acumulados durante o processamento de uma requisição."""
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    render_seconds: float = 0.0
+
+
+# A variável de contexto acompanha a requisição também nas threads do `sync_to_async`
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar('current_timings', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """`execute_wrapper` instalado em todas as conexões: contabiliza as consultas da requisição atual."""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_queries += 1
+        timings.db_seconds += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder, dispatch_uid='weather_api.metrics.install_query_recorder')
+
+# Conexões abertas antes deste módulo ser importado
+for connection in connections.all(initialized_only=True):
+    install_query_recorder(None, connection)
+
+
+# --------------------------------- Endpoint --------------------------------- #
+class ServicesCollector:
+    """Agrega os arquivos de métricas de todos os serviços (subdiretórios de `METRICS_DIR`)."""
+
+    def collect(self):
+        files = [str(path) for path in Path(settings.METRICS_DIR).glob('*/*.db')]
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Exibe as métricas de todos os processos no formato de texto do Prometheus.
+
+    Se `METRICS_TOKEN` estiver definido, exige o cabeçalho `Authorization: Bearer <token>`.
+    """
+    if settings.METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {settings.METRICS_TOKEN}":
+        return HttpResponse(status=401)
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        registry.register(ServicesCollector())
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,70 @@
+"""
+Diretório das métricas do Prometheus no modo multiprocesso (ver `weather_api/metrics.py`).
+
+O `prometheus_client` escolhe o modo ao ser importado, pela variável `PROMETHEUS_MULTIPROC_DIR`,
+e cria nesse diretório os arquivos de cada processo. Por isso a variável é definida, e o diretório
+criado, apenas na inicialização dos serviços que publicam métricas, antes de a aplicação ser
+carregada: o servidor gunicorn (`gunicorn.conf.py`) e os comandos de `METRICS_COMMANDS`
+(`manage.py`). Os demais comandos (`check`, `migrate`, `shell`...) não gravam arquivos de métricas.
+
+Cada serviço grava em um subdiretório próprio de `METRICS_DIR`; o endpoint `/metrics` agrega todos.
+Ao iniciar, o gunicorn descarta o seu subdiretório; os comandos descartam os arquivos de processos
+já encerrados (`discard_dead`), preservando os de outra execução do mesmo comando em andamento.
+"""
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+
+# Comandos do manage.py cujas métricas são publicadas em /metrics
+METRICS_COMMANDS = ('import_stations', 'run_workers')
+
+
+def enable(service: str, clear: bool = False) -> Path:
+    """
+    Ativa o modo multiprocesso no processo atual e nos que ele criar.
+
+    Args:
+        service (str): O nome do serviço (subdiretório de `METRICS_DIR`).
+        clear (bool): Descarta as métricas de uma execução anterior do serviço.
+
+    Returns:
+        Path: O diretório de métricas do serviço.
+    """
+    directory = Path(settings.METRICS_DIR) / service
+    if clear:
+        shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True, exist_ok=True)
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = str(directory)
+    return directory
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # O processo existe, mas pertence a outro usuário
+        return True
+    return True
+
+
+def discard_dead(directory: Path) -> int:
+    """
+    Remove os arquivos de métricas de processos que não estão mais em execução.
+
+    O `prometheus_client` nomeia os arquivos com o PID do processo (`counter_<pid>.db`,
+    `gauge_livesum_<pid>.db`...).
+
+    Returns:
+        int: A quantidade de arquivos removidos.
+    """
+    removed = 0
+    for path in directory.glob('*.db'):
+        pid = path.stem.rsplit('_', 1)[-1]
+        if pid.isdigit() and not _alive(int(pid)):
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
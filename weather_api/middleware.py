@@ -0,0 +1,185 @@
+import re
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from .db_router import PRIMARY_COOKIE, RoutingState, replica_configured, routing_state
+from .log import request_id
+from .metrics import (
+    REQUEST_DB_DURATION,
+    REQUEST_DB_QUERIES,
+    REQUEST_DURATION,
+    REQUEST_RENDER_DURATION,
+    RESPONSE_SIZE,
+    RequestTimings,
+    current_timings,
+)
+
+# IDs recebidos no cabeçalho X-Request-ID são aceitos apenas neste formato
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestIdMiddleware:
+    """
+    Associa um ID a cada requisição, incluído nos logs e no cabeçalho `X-Request-ID` da resposta.
+
+    Um `X-Request-ID` válido enviado pelo cliente (ou por um proxy) é reaproveitado.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        value = self.request_id_for(request)
+        token = request_id.set(value)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response['X-Request-ID'] = value
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        value = self.request_id_for(request)
+        token = request_id.set(value)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response['X-Request-ID'] = value
+        return response
+
+    @staticmethod
+    def request_id_for(request: HttpRequest) -> str:
+        incoming = request.headers.get('X-Request-ID', '')
+        return incoming if VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+
+class MetricsMiddleware:
+    """
+    Registra, para cada requisição, o tempo total, a quantidade e o tempo das consultas ao banco,
+    o tempo de renderização e o tamanho da resposta.
+
+    Os valores alimentam os histogramas de `weather_api.metrics` (rotulados pelo nome da view) e
+    são enviados ao cliente no cabeçalho `Server-Timing`. Funciona tanto sob WSGI quanto sob ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        self.finish(request, response, timings, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        self.finish(request, response, timings, time.perf_counter() - started)
+        return response
+
+    def process_template_response(self, request: HttpRequest, response):
+        # Respostas do DRF são renderizadas após a view; mede o tempo até o fim da renderização
+        timings = current_timings.get()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timings.render_seconds += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request: HttpRequest, response: HttpResponse, timings: RequestTimings, elapsed: float) -> None:
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+
+        REQUEST_DURATION.labels(view, request.method, response.status_code).observe(elapsed)
+        REQUEST_DB_QUERIES.labels(view).observe(timings.db_queries)
+        REQUEST_DB_DURATION.labels(view).observe(timings.db_seconds)
+        REQUEST_RENDER_DURATION.labels(view).observe(timings.render_seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view).observe(len(response.content))
+
+        response['Server-Timing'] = (
+            f'total;dur={elapsed * 1000:.1f}, '
+            f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.db_queries} queries", '
+            f'render;dur={timings.render_seconds * 1000:.1f}'
+        )
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Disponibiliza a requisição em andamento ao roteador de banco (`weather_api.db_router`).
+
+    Quando a requisição escreve no banco e a resposta é bem-sucedida, define um cookie que mantém o
+    cliente no primário por `DATABASE_PRIMARY_PIN_SECONDS` (leitura das próprias escritas).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        state = RoutingState(request)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        self.pin_to_primary(state, response)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        state = RoutingState(request)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        self.pin_to_primary(state, response)
+        return response
+
+    @staticmethod
+    def pin_to_primary(state: RoutingState, response: HttpResponse) -> None:
+        if state.wrote and response.status_code < 400 and replica_configured():
+            response.set_cookie(
+                PRIMARY_COOKIE, '1', max_age=settings.DATABASE_PRIMARY_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
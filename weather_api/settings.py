@@ -13,9 +13,6 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
-import logging
-from datetime import datetime
-from pytz import timezone
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -32,20 +29,6 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
-# Criar pasta para salvar os logs
-Path("./logs").mkdir(parents=True, exist_ok=True)
-
-logging.Formatter.converter = lambda *args: datetime.now(tz=timezone("America/Sao_Paulo")).timetuple()  # type: ignore
-fileHandler = logging.FileHandler("./logs/system.log")
-fileHandler.setLevel(logging.ERROR)
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    datefmt="[ %d/%m/%Y %H:%M:%S ]",
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[fileHandler]
-)
-
 # Application definition
 
 INSTALLED_APPS = [
@@ -64,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'weather_api.middleware.RequestIdMiddleware',
+    'weather_api.middleware.MetricsMiddleware',
+    'weather_api.middleware.DatabaseRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -97,6 +83,9 @@ WSGI_APPLICATION = 'weather_api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Views assíncronas para os endpoints de leitura (usar com o servidor ASGI: weather_api.asgi)
+ASYNC_VIEWS = config('ASYNC_VIEWS', cast=bool, default=False)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -105,14 +94,43 @@ DATABASES = {
         'PASSWORD': config('POSTGRES_PASSWORD', cast=str, default='admin'),
         'HOST': config('POSTGRES_HOST', cast=str, default='localhost'),
         'PORT': config('POSTGRES_PORT', cast=int, default=5432),
+        # Conexões persistentes: cada worker reaproveita a sua conexão por até DB_CONN_MAX_AGE segundos e
+        # verifica se ela continua ativa antes do primeiro uso em cada requisição. Sob ASGI cada requisição
+        # usa uma thread própria e a conexão não é reaproveitada, por isso o padrão é 0 e o pool fica a
+        # cargo do PgBouncer (docker-compose.yml)
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', cast=int, default=0 if ASYNC_VIEWS else 60),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', cast=bool, default=True),
+        # Cursores no servidor não funcionam com o PgBouncer em modo de transação
+        'DISABLE_SERVER_SIDE_CURSORS': config('POSTGRES_PGBOUNCER', cast=bool, default=False),
     }
 }
 
+# Réplica de leitura opcional: com POSTGRES_REPLICA_HOST definido, os endpoints de consulta leem da
+# réplica (weather_api/db_router.py); os demais dados de conexão são, por padrão, os do primário
+POSTGRES_REPLICA_HOST = config('POSTGRES_REPLICA_HOST', cast=str, default='')
+if POSTGRES_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': POSTGRES_REPLICA_HOST,
+        'PORT': config('POSTGRES_REPLICA_PORT', cast=int, default=DATABASES['default']['PORT']),
+        'USER': config('POSTGRES_REPLICA_USER', cast=str, default=DATABASES['default']['USER']),
+        'PASSWORD': config('POSTGRES_REPLICA_PASSWORD', cast=str, default=DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['weather_api.db_router.PrimaryReplicaRouter']
+
+# Rotas cujas requisições GET/HEAD leem da réplica
+DATABASE_REPLICA_VIEWS = ['stations', 'stations-by-id', 'historical-data', 'historical-data-by-id', 'analyze', 'predict']
+
+# Após uma escrita, o cliente lê do primário por este tempo (em segundos), para ver as próprias alterações
+DATABASE_PRIMARY_PIN_SECONDS = config('DB_PRIMARY_PIN_SECONDS', cast=int, default=10)
+
 
 REST_FRAMEWORK = {
     
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -162,6 +180,7 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.StaffClaimTokenObtainPairSerializer',
     'TOKEN_TYPE_CLAIM': 'token_type',
 
     'JTI_CLAIM': 'jti',
@@ -170,6 +189,133 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=config('SLIDING_TOKEN_REFRESH_LIFETIME', cast=int, default=30)),
 }
 
+# Cache de dados recentes das estações (buffers circulares em arquivos mapeados em memória)
+HOT_DATA_DIR = config('HOT_DATA_DIR', cast=str, default=str(BASE_DIR / 'hot_data'))
+HOT_DATA_CAPACITY = config('HOT_DATA_CAPACITY', cast=int, default=2048)
+
+# Cache compartilhado entre os workers (por padrão em arquivos no servidor local)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', cast=str, default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', cast=str, default=str(BASE_DIR / 'cache')),
+    }
+}
+
+# Tempo (em segundos) que o usuário resolvido a partir do JWT fica em cache
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', cast=int, default=60)
+
+# Autenticação sem estado: o usuário (incluindo is_staff) é lido das claims do token, sem consultar o banco
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', cast=bool, default=False)
+
+# Controle de admissão dos endpoints com uso intenso de CPU (coordenado entre workers por arquivos com trava)
+ADMISSION_DIR = config('ADMISSION_DIR', cast=str, default=str(BASE_DIR / 'run' / 'admission'))
+
+ADMISSION_CONTROL = {
+    'predict': {
+        'concurrency': config('PREDICT_CONCURRENCY', cast=int, default=2),  # Execuções simultâneas
+        'queue': config('PREDICT_QUEUE', cast=int, default=4),  # Requisições aguardando
+        'queue_timeout': config('PREDICT_QUEUE_TIMEOUT', cast=float, default=10),  # Espera máxima na fila (segundos)
+        'retry_after': 10,  # Valor do cabeçalho Retry-After (segundos)
+        'rate': config('PREDICT_RATE', cast=float, default=0.2),  # Fichas por segundo por usuário
+        'burst': config('PREDICT_BURST', cast=int, default=5),  # Capacidade do token bucket
+    },
+    'analyze': {
+        'concurrency': config('ANALYZE_CONCURRENCY', cast=int, default=4),
+        'queue': config('ANALYZE_QUEUE', cast=int, default=8),
+        'queue_timeout': config('ANALYZE_QUEUE_TIMEOUT', cast=float, default=5),
+        'retry_after': 5,
+        'rate': config('ANALYZE_RATE', cast=float, default=1),
+        'burst': config('ANALYZE_BURST', cast=int, default=10),
+    },
+}
+
+# Processos usados pelas views assíncronas para o trabalho de CPU de predict/analyze
+ANALYTICS_EXECUTOR_WORKERS = config('ANALYTICS_EXECUTOR_WORKERS', cast=int, default=2)
+
+# Resumos das leituras usados pelo analyze (stations/sketches.py): compressão do t-digest (erro de rank
+# de cerca de π·√(q(1−q))/δ por quantil) e máximo de classes do histograma da moda
+SKETCH_COMPRESSION = config('SKETCH_COMPRESSION', cast=int, default=500)
+SKETCH_MAX_BINS = config('SKETCH_MAX_BINS', cast=int, default=2048)
+
+# Linhas apagadas por transação na exclusão do histórico das estações (stations/purge.py)
+PURGE_BATCH_SIZE = config('PURGE_BATCH_SIZE', cast=int, default=5000)
+
+# Quantidade máxima de estações por requisição em POST /api/stations/bulk/
+STATION_BULK_MAX_ITEMS = config('STATION_BULK_MAX_ITEMS', cast=int, default=1000)
+
+# Jobs assíncronos de predict/analyze (?async=1), executados pelo comando run_workers
+JOB_WORKERS = config('JOB_WORKERS', cast=int, default=2)  # Processos iniciados pelo run_workers
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', cast=float, default=1)  # Espera entre consultas à fila vazia (segundos)
+JOB_TIMEOUT = config('JOB_TIMEOUT', cast=int, default=600)  # Jobs sem sinal de vida há mais tempo são considerados perdidos (segundos)
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', cast=int, default=3)  # Tentativas antes de marcar o job como falho
+JOB_RETENTION_HOURS = config('JOB_RETENTION_HOURS', cast=float, default=24)  # Tempo que os resultados ficam disponíveis
+
+# Stream de leituras novas (Server-Sent Events, apenas com ASYNC_VIEWS). O LISTEN do PostgreSQL não funciona
+# através do PgBouncer em modo de transação: STREAM_LISTEN_HOST/PORT apontam para o PostgreSQL diretamente
+STREAM_LISTEN_HOST = config('STREAM_LISTEN_HOST', cast=str, default='')
+STREAM_LISTEN_PORT = config('STREAM_LISTEN_PORT', cast=int, default=DATABASES['default']['PORT'])
+STREAM_POLL_INTERVAL = config('STREAM_POLL_INTERVAL', cast=float, default=5)  # Consulta periódica de eventos (sem NOTIFY)
+STREAM_HEARTBEAT = config('STREAM_HEARTBEAT', cast=float, default=15)  # Comentário enviado a clientes ociosos (segundos)
+STREAM_QUEUE_SIZE = config('STREAM_QUEUE_SIZE', cast=int, default=1000)  # Eventos pendentes por cliente antes de recorrer ao banco
+STREAM_BATCH_SIZE = config('STREAM_BATCH_SIZE', cast=int, default=500)  # Eventos lidos do banco por consulta
+STREAM_EVENT_RETENTION_HOURS = config('STREAM_EVENT_RETENTION_HOURS', cast=float, default=24)  # Janela de retomada (Last-Event-ID)
+
+# Métricas do Prometheus: cada serviço (gunicorn, run_workers e import_stations) grava as métricas dos
+# seus processos em um subdiretório deste diretório, criado na inicialização do serviço
+# (weather_api/metrics_dir.py), e o endpoint /metrics agrega todos
+METRICS_DIR = config('METRICS_DIR', cast=str, default=str(BASE_DIR / 'run' / 'metrics'))
+
+# Token exigido pelo endpoint /metrics (cabeçalho "Authorization: Bearer <token>"); vazio = sem autenticação
+METRICS_TOKEN = config('METRICS_TOKEN', cast=str, default='')
+
+# Logs: gravados em JSON por uma thread em segundo plano (weather_api/log.py), com rotação dos arquivos.
+# Registros abaixo de LOG_LEVEL são descartados pelo próprio logger, antes de serem criados.
+# O diretório é criado quando o primeiro registro é gravado
+LOG_DIR = config('LOG_DIR', cast=str, default=str(BASE_DIR / 'logs'))
+LOG_LEVEL = config('LOG_LEVEL', cast=str, default='ERROR')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'file': {
+            'class': 'weather_api.log.QueueFileHandler',
+            'level': LOG_LEVEL,
+            'filename': str(Path(LOG_DIR) / 'system.log'),
+            'max_bytes': config('LOG_MAX_BYTES', cast=int, default=10 * 1024 * 1024),
+            'backup_count': config('LOG_BACKUP_COUNT', cast=int, default=5),
+            'timezone': 'America/Sao_Paulo',
+        },
+    },
+    'root': {
+        'handlers': ['file'],
+        'level': LOG_LEVEL,
+    },
+}
+
+# Perfilamento sob demanda (?profile=1, apenas administradores)
+PROFILE_DIR = config('PROFILE_DIR', cast=str, default=str(BASE_DIR / 'run' / 'profiles'))
+PROFILE_SAMPLE_INTERVAL = config('PROFILE_SAMPLE_INTERVAL', cast=float, default=0.005)  # Segundos entre amostras da pilha
+PROFILE_TOP_N = config('PROFILE_TOP_N', cast=int, default=25)  # Funções listadas na resposta
+
+# Endereço do SINDA usado pelo import_stations (os benchmarks apontam para um servidor local de fixtures)
+SINDA_BASE_URL = config('SINDA_BASE_URL', cast=str, default='http://sinda.crn.inpe.br/PCD/SITE/novo/site').rstrip('/')
+
+# Pausa (em segundos) entre as estações durante a importação, para não sobrecarregar o SINDA
+SINDA_REQUEST_DELAY = config('SINDA_REQUEST_DELAY', cast=float, default=3)
+
+# Parser das páginas HTML do SINDA (stations/sinda.py): lxml (XPath) ou bs4 (BeautifulSoup)
+SINDA_HTML_PARSER = config('SINDA_HTML_PARSER', default='lxml')
+
+# Linhas do CSV de cada estação lidas, convertidas e gravadas por vez pelo import_stations
+IMPORT_CHUNK_SIZE = config('IMPORT_CHUNK_SIZE', cast=int, default=5000)
+
+# Fila de importação (tabela ImportTask), consumida pelos processos do import_stations em uma ou mais máquinas
+IMPORT_WORKERS = config('IMPORT_WORKERS', cast=int, default=1)  # Processos importadores por máquina
+IMPORT_POLL_INTERVAL = config('IMPORT_POLL_INTERVAL', cast=float, default=5)  # Espera enquanto outras máquinas concluem as estações (segundos)
+IMPORT_LEASE_TIMEOUT = config('IMPORT_LEASE_TIMEOUT', cast=int, default=300)  # Reservas sem sinal de vida há mais tempo voltam para a fila (segundos)
+IMPORT_MAX_ATTEMPTS = config('IMPORT_MAX_ATTEMPTS', cast=int, default=3)  # Tentativas antes de marcar a estação como falha
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 